@@ -0,0 +1,67 @@
+"""Benchmark uncrossing a large auction.
+
+Orders are spread over a band of prices around a common mid, so most of the
+book is crossed. The time to find the uncrossing price, which visits only the
+crossed levels, is reported separately from the time to generate the fills.
+
+Run with:
+
+    python -m benchmarks.auction
+"""
+
+from decimal import Decimal
+import random
+from time import perf_counter
+
+from jetblack_order_book import AuctionTieBreak, OrderBook, Side, Style
+from jetblack_order_book.auction import find_uncross
+
+
+def build_book(count: int) -> OrderBook:
+    """Build a book in an auction.
+
+    Args:
+        count (int): The number of orders.
+
+    Returns:
+        OrderBook: The order book.
+    """
+    rng = random.Random(42)
+    order_book = OrderBook()
+    order_book.start_auction()
+    for _ in range(count):
+        side = rng.choice((Side.BUY, Side.SELL))
+        offset = rng.randint(-500, 500)
+        price = Decimal(
+            10_000 + offset if side == Side.BUY else 10_000 - offset)
+        order_book.add_order(
+            side, price / 100, rng.randint(1, 100), Style.LIMIT)
+    return order_book
+
+
+def main() -> None:
+    """Run the benchmark"""
+    for count in (1_000, 10_000, 100_000):
+        order_book = build_book(count)
+
+        start = perf_counter()
+        uncross = find_uncross(
+            order_book.bids.depth_at_or_better(order_book.offers.best.price),
+            order_book.offers.depth_at_or_better(order_book.bids.best.price),
+            AuctionTieBreak.HIGHEST
+        )
+        price_time = perf_counter() - start
+
+        start = perf_counter()
+        price, fills = order_book.uncross()
+        uncross_time = perf_counter() - start
+
+        assert uncross is not None and uncross.price == price
+        print(
+            f"orders={count:>7}: price {price_time * 1e3:7.2f}ms, "
+            f"uncross {uncross_time * 1e3:7.2f}ms ({len(fills)} fills)"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark immediate-or-cancel orders against deep price levels.
+
+Each aggressive immediate-or-cancel order is matched against a book whose best
+levels hold many orders of mixed styles. The cost per order should not grow
+with the depth of the levels.
+
+Run with:
+
+    python -m benchmarks.immediate_or_cancel
+"""
+
+from decimal import Decimal
+from itertools import cycle
+from time import perf_counter
+
+from jetblack_order_book import OrderBook, Side, Style
+
+RESTING_STYLES = (
+    Style.LIMIT,
+    Style.BOOK_OR_CANCEL,
+    Style.LIMIT,
+    Style.FILL_OR_KILL,
+)
+
+
+def build_book(depth: int) -> OrderBook:
+    """Build a book with `depth` orders at each of the best levels.
+
+    Args:
+        depth (int): The number of orders at each level.
+
+    Returns:
+        OrderBook: The order book.
+    """
+    order_book = OrderBook()
+    styles = cycle(RESTING_STYLES)
+    for _ in range(depth):
+        order_book.add_order(Side.BUY, Decimal('99'), 10, next(styles))
+        order_book.add_order(Side.SELL, Decimal('101'), 10, next(styles))
+        order_book.add_order(Side.BUY, Decimal('98'), 10, Style.LIMIT)
+        order_book.add_order(Side.SELL, Decimal('102'), 10, Style.LIMIT)
+    return order_book
+
+
+def run(depth: int, count: int) -> float:
+    """Time aggressive immediate-or-cancel orders.
+
+    Args:
+        depth (int): The number of orders at each level.
+        count (int): The number of immediate-or-cancel orders.
+
+    Returns:
+        float: The time per order in microseconds.
+    """
+    order_book = build_book(depth)
+    sides = cycle(
+        (
+            (Side.BUY, Decimal('101')),
+            (Side.SELL, Decimal('99')),
+        )
+    )
+    start = perf_counter()
+    for _ in range(count):
+        side, price = next(sides)
+        # Each order partially fills the first resting order, leaving the rest
+        # of the level to be checked for immediate-or-cancel orders.
+        order_book.add_order(side, price, 1, Style.IMMEDIATE_OR_CANCEL)
+        order_book.add_order(side, price, 2, Style.IMMEDIATE_OR_CANCEL)
+    return (perf_counter() - start) / (2 * count) * 1e6
+
+
+def main() -> None:
+    """Run the benchmark"""
+    for depth in (100, 1_000, 10_000, 50_000):
+        print(f"depth={depth:>6}: {run(depth, 2_000):8.1f}us per order")
+
+
+if __name__ == '__main__':
+    main()
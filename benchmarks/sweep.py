@@ -0,0 +1,87 @@
+"""Benchmark aggressive orders sweeping many price levels.
+
+Each aggressive order sweeps a number of levels, generating a fill for every
+resting order. The book is run with the default plugins, and with self-trade
+prevention added, where the owners differ (the common case) and where every
+other resting order has the owner of the aggressor.
+
+Run with:
+
+    python -m benchmarks.sweep
+"""
+
+from decimal import Decimal
+from functools import partial
+from time import perf_counter
+from typing import Optional, Sequence
+
+from jetblack_order_book import OrderBook, Side, Style
+from jetblack_order_book.abstract_types import PluginFactory
+from jetblack_order_book.constants import ALL_PLUGINS
+from jetblack_order_book.plugins import (
+    SelfTradePrevention,
+    SelfTradePreventionPlugin
+)
+
+LEVELS = 20
+ORDERS_PER_LEVEL = 5
+
+
+def run(
+        plugins: Sequence[PluginFactory],
+        self_owner: Optional[str],
+        count: int
+) -> float:
+    """Time aggressive orders sweeping the offers.
+
+    Args:
+        plugins (Sequence[PluginFactory]): The plugins.
+        self_owner (Optional[str]): The owner of every other resting order.
+        count (int): The number of aggressive orders.
+
+    Returns:
+        float: The time per resting order swept in microseconds.
+    """
+    order_book = OrderBook(plugins)
+    elapsed = 0.0
+    for _ in range(count):
+        for level in range(LEVELS):
+            for index in range(ORDERS_PER_LEVEL):
+                order_book.add_order(
+                    Side.SELL,
+                    Decimal(100 + level),
+                    10,
+                    Style.LIMIT,
+                    owner=self_owner if index % 2 else f'mm{index}'
+                )
+        start = perf_counter()
+        order_book.add_order(
+            Side.BUY,
+            Decimal(100 + LEVELS),
+            10 * LEVELS * ORDERS_PER_LEVEL,
+            Style.IMMEDIATE_OR_CANCEL,
+            owner='taker'
+        )
+        elapsed += perf_counter() - start
+        for order_id in order_book.owner_order_ids('taker'):
+            order_book.cancel_order(order_id)
+    return elapsed / (count * LEVELS * ORDERS_PER_LEVEL) * 1e6
+
+
+def main() -> None:
+    """Run the benchmark"""
+    self_trade_prevention = (
+        *ALL_PLUGINS,
+        partial(SelfTradePreventionPlugin, SelfTradePrevention.CANCEL_OLDEST)
+    )
+    cases = (
+        ('default plugins', ALL_PLUGINS, None),
+        ('self-trade prevention', self_trade_prevention, None),
+        ('self-trade prevention, self trades', self_trade_prevention, 'taker'),
+    )
+    for name, plugins, self_owner in cases:
+        print(f"{name:>36}: {run(plugins, self_owner, 200):6.2f}us per order")
+
+
+if __name__ == '__main__':
+    main()
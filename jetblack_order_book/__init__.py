@@ -2,18 +2,30 @@
 
 from .aggregate_order import AggregateOrder
 from .aggregate_order_side import AggregateOrderSide
+from .allocation import Allocation, ProRataAllocation
+from .auction import AuctionTieBreak
+from .depth_arrays import DepthArrays
 from .exchange_order_book import ExchangeOrderBook
 from .fill import Fill
 from .order import Order, Side, Style
 from .order_book import OrderBook
+from .snapshot import BookSnapshot, LevelSnapshot
+from .top_of_book import TopOfBook
 
 __all__ = [
     'AggregateOrder',
     'AggregateOrderSide',
+    'Allocation',
+    'AuctionTieBreak',
+    'BookSnapshot',
+    'DepthArrays',
     'ExchangeOrderBook',
     'Fill',
+    'LevelSnapshot',
     'Order',
     'OrderBook',
+    'ProRataAllocation',
     'Side',
-    'Style'
+    'Style',
+    'TopOfBook'
 ]
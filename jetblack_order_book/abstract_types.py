@@ -3,11 +3,14 @@
 from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
+from copy import deepcopy
 from decimal import Decimal
-from typing import Callable, List, Optional, Sequence, Tuple
+from typing import Callable, Collection, List, Optional, Sequence, Tuple
 
 from .aggregate_order import AggregateOrder
 from .aggregate_order_side import AggregateOrderSide
+from .auction import AuctionTieBreak
+from .depth_arrays import DepthArrays
 from .fill import Fill
 from .order import Order, Side, Style
 
@@ -50,13 +53,38 @@ class AbstractOrderBook(metaclass=ABCMeta):
                 bids and offers.
         """
 
+    @abstractmethod
+    def depth_arrays(
+            self,
+            levels: Optional[int],
+            counts: bool = False,
+            cumulative: bool = False
+    ) -> Tuple[DepthArrays, DepthArrays]:
+        """The best bids and offers as arrays, best first.
+
+        Args:
+            levels (Optional[int]): An optional book depth.
+            counts (bool, optional): If True include the number of orders at
+                each level. Defaults to False.
+            cumulative (bool, optional): If True include the cumulative sizes.
+                Defaults to False.
+
+        Returns:
+            Tuple[DepthArrays, DepthArrays]: The best bids and offers.
+        """
+
     @abstractmethod
     def add_order(
             self,
             side: Side,
-            price: Decimal,
+            price: Optional[Decimal],
             size: int,
-            style: Style
+            style: Style,
+            *,
+            display_size: Optional[int] = None,
+            owner: Optional[str] = None,
+            expires: Optional[float] = None,
+            limit_price: Optional[Decimal] = None
     ) -> Tuple[Optional[int], List[Fill], List[int]]:
         """Add an order to the order book.
 
@@ -65,28 +93,118 @@ class AbstractOrderBook(metaclass=ABCMeta):
         Any fills generated by the new order will be returned, along with any
         orders that were cancelled.
 
+        Iceberg orders display at most their display size. When the displayed
+        size is filled it is replenished from the reserve, and the order moves
+        to the back of the queue at its price.
+
+        Market orders never rest in the book. They are filled at the prices of
+        the resting orders they sweep, and any unfilled size is cancelled.
+
+        An order with an expiry time is cancelled by `expire` once the clock
+        of the order book reaches that time.
+
         Args:
             side (Side): Buy or sell.
-            price (Decimal): The price at which the order should be executed.
+            price (Optional[Decimal]): The price at which the order should be
+                executed. For a market order this is an optional protection
+                price.
             size (int): The size of the order.
+            style (Style): The order style.
+            display_size (Optional[int], optional): The display size of an
+                iceberg order. Defaults to None.
+            owner (Optional[str], optional): The owner or session placing the
+                order. Defaults to None.
+            expires (Optional[float], optional): The time at which the order
+                expires. Defaults to None.
+            limit_price (Optional[Decimal], optional): The price of the limit
+                order placed when a stop limit order triggers. Defaults to
+                None.
+
+        Raises:
+            ValueError: If the order has already expired.
 
         Returns:
             Tuple[int, List[Fill], List[int]]: The order id, any fills that were
             generated, and any orders that were cancelled.
         """
 
+    @abstractmethod
+    def what_if(
+            self,
+            side: Side,
+            price: Optional[Decimal],
+            size: int,
+            style: Style,
+            *,
+            display_size: Optional[int] = None,
+            owner: Optional[str] = None,
+            expires: Optional[float] = None,
+            limit_price: Optional[Decimal] = None
+    ) -> Tuple[Optional[int], List[Fill], List[int]]:
+        """Find the result of adding an order without changing the book.
+
+        Args:
+            side (Side): Buy or sell.
+            price (Optional[Decimal]): The price at which the order should be
+                executed. For a market order this is an optional protection
+                price.
+            size (int): The size of the order.
+            style (Style): The order style.
+            display_size (Optional[int], optional): The display size of an
+                iceberg order. Defaults to None.
+            owner (Optional[str], optional): The owner or session placing the
+                order. Defaults to None.
+            expires (Optional[float], optional): The time at which the order
+                expires. Defaults to None.
+            limit_price (Optional[Decimal], optional): The price of the limit
+                order placed when a stop limit order triggers. Defaults to
+                None.
+
+        Returns:
+            Tuple[int, List[Fill], List[int]]: The order id, the fills, and the
+            cancelled orders which adding the order would generate.
+        """
+
     @abstractmethod
     def amend_order(self, order_id: int, size: int) -> None:
         """Amend the size of an order.
 
-        The size must be greater than zero.
+        The size must be greater than zero. The size of an iceberg order
+        includes its reserve.
+
+        Args:
+            order_id (int): The order id.
+            size (int): The new size of the order.
+
+        Raises:
+            ValueError: When the size is less than or equal to 0.
+        """
+
+    @abstractmethod
+    def replace_order(
+            self,
+            order_id: int,
+            price: Decimal,
+            size: int
+    ) -> Tuple[List[Fill], List[int]]:
+        """Replace the price and size of an order in one step.
+
+        The order keeps its id. It keeps its time priority if the price is
+        unchanged and the size is not increased; otherwise it moves to the
+        back of the queue at the new price, and is matched with the book. An
+        order moved to a price its plugins would reject is cancelled.
 
         Args:
             order_id (int): The order id.
+            price (Decimal): The new price.
             size (int): The new size of the order.
 
         Raises:
             ValueError: When the size is less than or equal to 0.
+
+        Returns:
+            Tuple[List[Fill], List[int]]: Any fills and the ids of any
+            cancelled orders.
         """
 
     @abstractmethod
@@ -100,6 +218,185 @@ class AbstractOrderBook(metaclass=ABCMeta):
             ValueError: If the order cannot be found.
         """
 
+    @property
+    @abstractmethod
+    def in_auction(self) -> bool:
+        """True if the order book is in an auction"""
+
+    @abstractmethod
+    def start_auction(self) -> None:
+        """Start an auction.
+
+        During an auction orders accumulate without matching. Only limit, stop
+        and iceberg orders can be placed.
+        """
+
+    @abstractmethod
+    def uncross(
+            self,
+            tie_break: AuctionTieBreak = AuctionTieBreak.HIGHEST,
+            reference: Optional[Decimal] = None
+    ) -> Tuple[Optional[Decimal], List[Fill], List[int]]:
+        """End an auction, filling the crossed orders at a single price.
+
+        The price is the one that maximises the volume executed, including the
+        reserves of iceberg orders. Prices with the same volume are decided by
+        the smallest imbalance, then by the tie break. The stops triggered by
+        the new prices are then matched.
+
+        Args:
+            tie_break (AuctionTieBreak, optional): The tie break. Defaults to
+                AuctionTieBreak.HIGHEST.
+            reference (Optional[Decimal], optional): The reference price for
+                the REFERENCE tie break. Defaults to None.
+
+        Raises:
+            ValueError: If the order book is not in an auction, or the tie
+                break is REFERENCE without a reference price.
+
+        Returns:
+            Tuple[Optional[Decimal], List[Fill], List[int]]: The uncrossing
+            price, or None if the book was not crossed, the fills and the ids
+            of any cancelled orders.
+        """
+
+    @abstractmethod
+    def expire(self) -> List[int]:
+        """Cancel the orders which have expired by the current time.
+
+        Returns:
+            List[int]: The ids of the expired orders, in order of expiry.
+        """
+
+    @abstractmethod
+    def expiring_order_count(self) -> int:
+        """The number of live orders with an expiry time.
+
+        Returns:
+            int: The number of orders.
+        """
+
+    @abstractmethod
+    def mass_cancel(
+            self,
+            owner: str,
+            side: Optional[Side] = None,
+            min_price: Optional[Decimal] = None,
+            max_price: Optional[Decimal] = None
+    ) -> List[int]:
+        """Cancel the orders of an owner.
+
+        The cost is proportional to the number of orders the owner has.
+
+        Args:
+            owner (str): The owner.
+            side (Optional[Side], optional): If given only cancel orders for
+                this side. Defaults to None.
+            min_price (Optional[Decimal], optional): If given only cancel
+                orders at or above this price. Defaults to None.
+            max_price (Optional[Decimal], optional): If given only cancel
+                orders at or below this price. Defaults to None.
+
+        Returns:
+            List[int]: The ids of the cancelled orders.
+        """
+
+    @abstractmethod
+    def mass_quote(
+            self,
+            owner: str,
+            bids: Sequence[Tuple[Decimal, int]],
+            offers: Sequence[Tuple[Decimal, int]]
+    ) -> Tuple[List[int], List[Fill], List[int]]:
+        """Replace the quotes of an owner.
+
+        The quotes of an owner are the orders placed by its earlier mass
+        quotes, and its other orders are left alone. An existing quote at the
+        same price is kept if its size is unchanged, and amended, keeping its
+        priority, if its size is reduced. Other existing quotes are cancelled
+        and new orders are created. The new quotes are all placed before they
+        are matched, in a single pass.
+
+        Args:
+            owner (str): The owner.
+            bids (Sequence[Tuple[Decimal, int]]): The prices and sizes of the
+                bids.
+            offers (Sequence[Tuple[Decimal, int]]): The prices and sizes of the
+                offers.
+
+        Raises:
+            ValueError: If the prices for a side are not distinct, a size is
+                less than or equal to 0, or a bid is at or above an offer.
+
+        Returns:
+            Tuple[List[int], List[Fill], List[int]]: The order ids of the bids
+            then the offers, any fills that were generated, and any orders that
+            were cancelled.
+        """
+
+    @abstractmethod
+    def owner_order_ids(self, owner: str) -> List[int]:
+        """Find the ids of the live orders of an owner.
+
+        Args:
+            owner (str): The owner.
+
+        Returns:
+            List[int]: The order ids.
+        """
+
+    @abstractmethod
+    def owners(self) -> Collection[str]:
+        """The owners with live orders.
+
+        Returns:
+            Collection[str]: The owners.
+        """
+
+    @abstractmethod
+    def order_owner(self, order_id: int) -> Optional[str]:
+        """Find the owner of a live order.
+
+        Args:
+            order_id (int): The order id.
+
+        Raises:
+            KeyError: If the order is not found.
+
+        Returns:
+            Optional[str]: The owner, or None if the order has no owner.
+        """
+
+    @abstractmethod
+    def size_ahead(self, order_id: int) -> int:
+        """Find the total size of the orders ahead of an order at its price.
+
+        Args:
+            order_id (int): The order id.
+
+        Raises:
+            KeyError: If the order cannot be found.
+            ValueError: If the order is not queued at a price.
+
+        Returns:
+            int: The size ahead.
+        """
+
+    @abstractmethod
+    def queue_position(self, order_id: int) -> int:
+        """Find the number of orders ahead of an order at its price.
+
+        Args:
+            order_id (int): The order id.
+
+        Raises:
+            KeyError: If the order cannot be found.
+            ValueError: If the order is not queued at a price.
+
+        Returns:
+            int: The position, from zero.
+        """
+
 
 class AbstractOrderBookManager(AbstractOrderBook):
     """An order book manager"""
@@ -110,7 +407,12 @@ class AbstractOrderBookManager(AbstractOrderBook):
             side: Side,
             price: Decimal,
             size: int,
-            style: Style
+            style: Style,
+            *,
+            display_size: Optional[int] = None,
+            owner: Optional[str] = None,
+            expires: Optional[float] = None,
+            limit_price: Optional[Decimal] = None
     ) -> Tuple[Optional[Order], List[Order]]:
         """Create aa order.
 
@@ -125,6 +427,15 @@ class AbstractOrderBookManager(AbstractOrderBook):
             price (Decimal): The price.
             size (int): The size.
             style (Style): The style.
+            display_size (Optional[int], optional): The display size of an
+                iceberg order. Defaults to None.
+            owner (Optional[str], optional): The owner or session placing the
+                order. Defaults to None.
+            expires (Optional[float], optional): The time at which the order
+                expires. Defaults to None.
+            limit_price (Optional[Decimal], optional): The price of the limit
+                order placed when a stop limit order triggers. Defaults to
+                None.
 
         Returns:
             Tuple[Optional[Order], List[Order]]: An order or None
@@ -132,6 +443,43 @@ class AbstractOrderBookManager(AbstractOrderBook):
                 generated by the new order.
         """
 
+    @abstractmethod
+    def best_price(self, side: Side) -> Optional[Decimal]:
+        """The best price of the limit and pegged orders for a side.
+
+        Args:
+            side (Side): The side.
+
+        Returns:
+            Optional[Decimal]: The price, or None if there are no orders.
+        """
+
+    @abstractmethod
+    def size_at_or_better(self, side: Side, price: Decimal) -> int:
+        """The size of the limit and pegged orders for a side at or better
+        than a price, including the reserves of iceberg orders.
+
+        The cost is logarithmic in the number of levels.
+
+        Args:
+            side (Side): The side.
+            price (Decimal): The price.
+
+        Returns:
+            int: The total size.
+        """
+
+    @abstractmethod
+    def fork(self) -> AbstractOrderBookManager:
+        """Create a copy of the manager which shares the book.
+
+        Changes to the fork do not affect this manager, which must not be
+        changed while the fork is in use.
+
+        Returns:
+            AbstractOrderBookManager: The fork.
+        """
+
     @abstractmethod
     def find(self, order_id: int) -> Order:
         """Find an order by its id.
@@ -164,6 +512,16 @@ class Plugin(metaclass=ABCMeta):
             Sequence[Style]: A sequence of supported styles.
         """
 
+    def fork(self) -> Plugin:
+        """Copy the plugin for use by a forked order book manager.
+
+        The copy must not share mutable state with the original.
+
+        Returns:
+            Plugin: The copy.
+        """
+        return deepcopy(self)
+
     # pylint: disable=unused-argument
     def pre_create(
             self,
@@ -224,6 +582,26 @@ class Plugin(metaclass=ABCMeta):
         """
         return
 
+    def pre_match(
+            self,
+            manager: AbstractOrderBookManager,
+            aggressor: Order
+    ) -> List[Order]:
+        """A hook called once before matching a new order.
+
+        If the hook returns orders, these orders will be cancelled before
+        matching starts. This can be used to decide once whether an order can
+        be matched, rather than checking each fill.
+
+        Args:
+            manager (AbstractOrderBookManager): The manager.
+            aggressor (Order): The order that initiated the matching.
+
+        Returns:
+            List[Order]: A list of cancellable orders.
+        """
+        return []
+
     def pre_fill(
             self,
             manager: AbstractOrderBookManager,
@@ -247,6 +625,34 @@ class Plugin(metaclass=ABCMeta):
         """
         return []
 
+    def pre_allocate(
+            self,
+            manager: AbstractOrderBookManager,
+            own: AggregateOrderSide,
+            resting: AggregateOrderSide,
+            allocations: Sequence[Tuple[Order, int]],
+            aggressor: Order
+    ) -> List[Order]:
+        """A hook called before an aggressor is filled across a price level by
+        an allocation policy.
+
+        The pre_fill hook only sees the first order at the level, so this hook
+        is given every order the allocation would fill. If the hook returns
+        orders, these orders will be cancelled and the fill will be aborted.
+
+        Args:
+            manager (AbstractOrderBookManager): The manager.
+            own (AggregateOrderSide): The side of the aggressor.
+            resting (AggregateOrderSide): The side being filled.
+            allocations (Sequence[Tuple[Order, int]]): The orders at the best
+                level of the resting side and the size allocated to each.
+            aggressor (Order): The order that initiated the matching.
+
+        Returns:
+            List[Order]: A list of cancellable orders.
+        """
+        return []
+
     def post_match(self, manager: AbstractOrderBookManager) -> List[Order]:
         """A hook called after a match.
 
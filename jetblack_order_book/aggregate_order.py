@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
-from collections import deque
+from collections import OrderedDict
+from copy import copy
 from decimal import Decimal
-from typing import Callable, List
+from typing import Callable, List, Optional, Sequence, Tuple
 
-from .utils import index_of
 from .order import Order
+from .queue_index import QueueIndex
+from .snapshot import LevelSnapshot
 
 
 class AggregateOrder:
@@ -18,6 +20,11 @@ class AggregateOrder:
 
     Orders at the beginning were placed before later orders, and should be
     executed first.
+
+    The orders are kept in an ordered dictionary keyed by order id, so an
+    order can be found or removed from anywhere in the queue in constant time.
+    The position of an order in the queue is indexed when first asked for,
+    and maintained thereafter.
     """
 
     def __init__(self, order: Order) -> None:
@@ -28,7 +35,13 @@ class AggregateOrder:
                 aggregate order.
         """
         self._price = order.price
-        self._orders = deque([order])
+        self._orders: 'OrderedDict[int, Order]' = OrderedDict(
+            ((order.order_id, order),)
+        )
+        self._size = order.size
+        self._reserve = order.reserve
+        self._index: Optional[QueueIndex] = None
+        self._snapshot: Optional[LevelSnapshot] = None
 
     @property
     def price(self) -> Decimal:
@@ -42,12 +55,17 @@ class AggregateOrder:
     @property
     def size(self) -> int:
         """The aggregate size of the order."""
-        return sum(order.size for order in self._orders)
+        return self._size
+
+    @property
+    def reserve(self) -> int:
+        """The total reserve of the iceberg orders."""
+        return self._reserve
 
     @property
     def first(self) -> Order:
         """The first order to process."""
-        return self._orders[0]
+        return next(iter(self._orders.values()))
 
     @property
     def orders(self) -> List[Order]:
@@ -56,11 +74,109 @@ class AggregateOrder:
         Returns:
             List[Order]: A list of the orders.
         """
-        return list(self._orders)
+        return list(self._orders.values())
+
+    def snapshot(self) -> LevelSnapshot:
+        """An immutable record of the level.
+
+        The record is reused until the size or number of orders changes.
+
+        Returns:
+            LevelSnapshot: The record.
+        """
+        snapshot = self._snapshot
+        if (
+                snapshot is None or
+                snapshot.size != self._size or
+                snapshot.count != len(self._orders)
+        ):
+            snapshot = self._snapshot = LevelSnapshot(
+                self._price,
+                self._size,
+                len(self._orders)
+            )
+        return snapshot
+
+    def copy(self) -> AggregateOrder:
+        """Copy the aggregate order and its orders.
+
+        Returns:
+            AggregateOrder: The copy.
+        """
+        aggregate_order = copy(self)
+        aggregate_order._index = None
+        aggregate_order._orders = OrderedDict(
+            (order_id, copy(order))
+            for order_id, order in self._orders.items()
+        )
+        return aggregate_order
+
+    def reduce_first(self, size: int) -> None:
+        """Reduce the size of the first order.
+
+        Args:
+            size (int): The amount by which to reduce the first order.
+        """
+        order = self.first
+        order.size -= size
+        self._size -= size
+        if self._index is not None:
+            self._index.update(order.order_id, -size)
+
+    def reduce(self, allocations: Sequence[Tuple[Order, int]]) -> int:
+        """Reduce the sizes of orders.
+
+        Args:
+            allocations (Sequence[Tuple[Order, int]]): The orders and the
+                amounts by which to reduce them.
+
+        Returns:
+            int: The total reduction.
+        """
+        total = 0
+        for order, size in allocations:
+            order.size -= size
+            total += size
+            if self._index is not None:
+                self._index.update(order.order_id, -size)
+        self._size -= total
+        return total
+
+    def replenish_first(self) -> int:
+        """Replenish the first order from its reserve, moving it to the back
+        of the queue.
+
+        Returns:
+            int: The replenished size.
+        """
+        return self.replenish(self.first.order_id)
+
+    def replenish(self, order_id: int) -> int:
+        """Replenish an order from its reserve, moving it to the back of the
+        queue.
+
+        Args:
+            order_id (int): The order id.
+
+        Returns:
+            int: The replenished size.
+        """
+        order = self._orders[order_id]
+        self._remove_from_index(order)
+        order.replenish()
+        self._orders.move_to_end(order_id)
+        self._size += order.size
+        self._reserve -= order.size
+        if self._index is not None:
+            self._index.append(order)
+        return order.size
 
     def delete_first(self) -> None:
         """Delete the first order"""
-        del self._orders[0]
+        _, order = self._orders.popitem(last=False)
+        self._size -= order.size
+        self._reserve -= order.reserve
+        self._remove_from_index(order)
 
     def append(self, order: Order) -> None:
         """Add a new order at the price level of this aggregate order.
@@ -69,9 +185,18 @@ class AggregateOrder:
             order (Order): The new order.
         """
         assert order.price == self.price, "aggregate orders must be the same price"
-        self._orders.append(order)
-
-    def change_size(self, order_id: int, size: int) -> None:
+        self._orders[order.order_id] = order
+        self._size += order.size
+        self._reserve += order.reserve
+        if self._index is not None:
+            self._index.append(order)
+
+    def change_size(
+            self,
+            order_id: int,
+            size: int,
+            reserve: Optional[int] = None
+    ) -> None:
         """Change the size of an order in the aggregate order.
 
         It is not possible to set the order size to zero (this would be a
@@ -85,6 +210,8 @@ class AggregateOrder:
         Args:
             order_id (int): The order id.
             size (int): The new size.
+            reserve (Optional[int], optional): The new reserve of an iceberg
+                order. Defaults to None.
 
         Raises:
             ValueError: When the size is less than or equal to zero.
@@ -92,11 +219,17 @@ class AggregateOrder:
         """
         if size <= 0:
             raise ValueError("changes is size must be >= 0")
-        index = index_of(self._orders, lambda x: x.order_id == order_id)
-        if index == -1:
+        if order_id not in self._orders:
             raise KeyError("order not found")
 
-        self._orders[index].size = size
+        order = self._orders[order_id]
+        self._size += size - order.size
+        if self._index is not None:
+            self._index.update(order_id, size - order.size)
+        order.size = size
+        if reserve is not None:
+            self._reserve += reserve - order.reserve
+            order.reserve = reserve
 
     def cancel(self, order_id: int) -> None:
         """Cancel and order.
@@ -107,11 +240,55 @@ class AggregateOrder:
         Raises:
             KeyError: If the order is not in the aggregate order.
         """
-        index = index_of(self._orders, lambda x: x.order_id == order_id)
-        if index == -1:
+        if order_id not in self._orders:
+            raise KeyError("order not found")
+
+        order = self._orders.pop(order_id)
+        self._size -= order.size
+        self._reserve -= order.reserve
+        self._remove_from_index(order)
+
+    def size_ahead(self, order_id: int) -> int:
+        """The total size of the orders ahead of an order in the queue.
+
+        Args:
+            order_id (int): The order id.
+
+        Raises:
+            KeyError: If the order is not in the aggregate order.
+
+        Returns:
+            int: The size ahead.
+        """
+        return self._queue_index(order_id).size_ahead(order_id)
+
+    def queue_position(self, order_id: int) -> int:
+        """The number of orders ahead of an order in the queue.
+
+        Args:
+            order_id (int): The order id.
+
+        Raises:
+            KeyError: If the order is not in the aggregate order.
+
+        Returns:
+            int: The position, from zero.
+        """
+        return self._queue_index(order_id).position(order_id)
+
+    def _queue_index(self, order_id: int) -> QueueIndex:
+        if order_id not in self._orders:
             raise KeyError("order not found")
+        if self._index is None:
+            self._index = QueueIndex(self._orders.values())
+        return self._index
 
-        del self._orders[index]
+    def _remove_from_index(self, order: Order) -> None:
+        if self._index is not None:
+            self._index.remove(order.order_id, order.size)
+            if self._index.is_sparse:
+                # Rebuild the index without the empty slots when next used.
+                self._index = None
 
     def find_all(self, predicate: Callable[[Order], bool]) -> List[Order]:
         """Find orders which match a predicate.
@@ -124,14 +301,14 @@ class AggregateOrder:
         """
         return [
             order
-            for order in self._orders
+            for order in self._orders.values()
             if predicate(order)
         ]
 
     def __eq__(self, other: object) -> bool:
         return (
             isinstance(other, AggregateOrder) and
-            self._orders == other._orders
+            self.orders == other.orders
         )
 
     def __bool__(self) -> bool:
@@ -142,10 +319,10 @@ class AggregateOrder:
         return len(self._orders)
 
     def __contains__(self, order_id: int) -> bool:
-        return any(x.order_id == order_id for x in self._orders)
+        return order_id in self._orders
 
     def __repr__(self) -> str:
-        return f"AggregateOrder({self._orders})"
+        return f"AggregateOrder({self.orders})"
 
     def __str__(self) -> str:
         return f"{self.price}x{self.size}"
@@ -1,12 +1,19 @@
 """Aggregate order side"""
 
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
 from collections import deque
+from copy import copy
+from decimal import Decimal
 from itertools import islice
-from typing import Deque, Sequence, Optional
+from typing import Deque, Dict, List, Sequence, Set, Optional, Tuple
 
 from .aggregate_order import AggregateOrder
+from .depth_arrays import DepthArrays, create_depth_arrays
+from .depth_index import DepthIndex
 from .order import Order
-from .utils import index_of
+from .snapshot import LevelSnapshot
 
 
 class AggregateOrderSide:
@@ -14,6 +21,9 @@ class AggregateOrderSide:
 
     This class handles side specific logic, in particular which orders are
     "best"; higher for bids, lower for offers.
+
+    The cumulative sizes of the levels are indexed, so the cost of sweeping
+    the side can be found in logarithmic time.
     """
 
     def __init__(self, low_is_best: bool) -> None:
@@ -24,6 +34,29 @@ class AggregateOrderSide:
         """
         self._low_is_best = low_is_best
         self._orders: Deque[AggregateOrder] = deque()
+        self._prices: List[Decimal] = []
+        self._index: Optional[DepthIndex] = None
+        # The ids of the levels owned by a fork, or None if all are owned.
+        self._owned: Optional[Set[int]] = None
+        # True while a fork shares the levels and prices of another side.
+        self._is_shared = False
+
+    def fork(self) -> AggregateOrderSide:
+        """Create a copy of the side which shares the price levels.
+
+        The sequence of levels is copied when the fork first changes it, and
+        a shared level when the fork first accesses or changes it, so changes
+        to the fork do not affect this side. This side must not be changed
+        while the fork is in use.
+
+        Returns:
+            AggregateOrderSide: The fork.
+        """
+        side = copy(self)
+        side._index = None
+        side._owned = set()
+        side._is_shared = True
+        return side
 
     def depth(self, levels: Optional[int]) -> Sequence[AggregateOrder]:
         """Return the orders for the side.
@@ -46,17 +79,130 @@ class AggregateOrderSide:
                 len(self._orders)
             ))
 
+    def depth_arrays(
+            self,
+            levels: Optional[int],
+            counts: bool = False,
+            cumulative: bool = False
+    ) -> DepthArrays:
+        """Return the price levels for the side as arrays, best first.
+
+        Args:
+            levels (Optional[int]): The market depth to return.
+            counts (bool, optional): If True include the number of orders at
+                each level. Defaults to False.
+            cumulative (bool, optional): If True include the cumulative size
+                from the best level. Defaults to False.
+
+        Returns:
+            DepthArrays: The prices and sizes, with optional counts and
+                cumulative sizes.
+        """
+        count = (
+            len(self._orders) if levels is None
+            else min(levels, len(self._orders))
+        )
+        if self._low_is_best:
+            orders = islice(self._orders, 0, count)
+        else:
+            orders = islice(reversed(self._orders), 0, count)
+        return create_depth_arrays(tuple(orders), counts, cumulative)
+
+    def snapshot(self, levels: Optional[int]) -> Tuple[LevelSnapshot, ...]:
+        """Return immutable records of the price levels, best first.
+
+        Args:
+            levels (Optional[int]): The market depth to return.
+
+        Returns:
+            Tuple[LevelSnapshot, ...]: The records.
+        """
+        count = (
+            len(self._orders) if levels is None
+            else min(levels, len(self._orders))
+        )
+        if self._low_is_best:
+            orders = islice(self._orders, 0, count)
+        else:
+            orders = islice(reversed(self._orders), 0, count)
+        return tuple(aggregate_order.snapshot() for aggregate_order in orders)
+
+    def depth_at_or_better(self, price: Decimal) -> Sequence[AggregateOrder]:
+        """Return the price levels at or better than a price.
+
+        Args:
+            price (Decimal): The price.
+
+        Returns:
+            Sequence[AggregateOrder]: The levels, best first.
+        """
+        if self._low_is_best:
+            count = bisect_right(self._prices, price)
+            return list(islice(self._orders, 0, count))
+        count = len(self._prices) - bisect_left(self._prices, price)
+        return list(islice(reversed(self._orders), 0, count))
+
     @property
     def best(self) -> AggregateOrder:
         """Get the order at the best price level."""
+        if self._owned is not None:
+            return self._own(0 if self._low_is_best else -1)
         return self._orders[0] if self._low_is_best else self._orders[-1]
 
     def delete_best(self) -> None:
         """Delete the order at the best price level."""
+        self._unshare()
         if self._low_is_best:
             del self._orders[0]
+            del self._prices[0]
         else:
             del self._orders[-1]
+            del self._prices[-1]
+        if self._index is not None:
+            self._index.pop()
+
+    def reduce_best(self, size: int) -> None:
+        """Reduce the size of the first order at the best price level.
+
+        Args:
+            size (int): The amount by which to reduce the order.
+        """
+        best = self.best
+        best.reduce_first(size)
+        if self._index is not None:
+            self._index.update(len(self._orders) - 1, best.price, -size)
+
+    def reduce_best_orders(
+            self,
+            allocations: Sequence[Tuple[Order, int]]
+    ) -> None:
+        """Reduce the sizes of orders at the best price level.
+
+        Args:
+            allocations (Sequence[Tuple[Order, int]]): The orders at the best
+                level and the amounts by which to reduce them.
+        """
+        best = self.best
+        size = best.reduce(allocations)
+        if self._index is not None:
+            self._index.update(len(self._orders) - 1, best.price, -size)
+
+    def replenish_best(self, order_id: Optional[int] = None) -> None:
+        """Replenish an order at the best price level from its reserve.
+
+        The order moves to the back of the queue, losing time priority.
+
+        Args:
+            order_id (Optional[int], optional): The order id. Defaults to the
+                first order.
+        """
+        best = self.best
+        size = (
+            best.replenish_first() if order_id is None
+            else best.replenish(order_id)
+        )
+        if self._index is not None:
+            self._index.update(len(self._orders) - 1, best.price, size, -size)
 
     def add_order(self, order: Order) -> None:
         """Add an order.
@@ -65,41 +211,102 @@ class AggregateOrderSide:
             order (Order): The order.
         """
         # Find where the order should go.
-        index = index_of(
-            self._orders,
-            lambda x: x.price >= order.price
-        )
-        if index == -1:
-            # Add new highest price level.
-            self._orders.append(AggregateOrder(order))
-        elif self._orders[index].price == order.price:
+        index = bisect_left(self._prices, order.price)
+        if index < len(self._prices) and self._prices[index] == order.price:
             # Add the order to an existing price level. Adding to the end
-            # means newer orders are executed first (time weighted).
-            self._orders[index].append(order)
-        else:
-            # Insert a new lowest price level
-            self._orders.insert(index, AggregateOrder(order))
+            # means newer orders are executed last (time weighted).
+            self._own(index).append(order)
+            self._update_index(index, order.price, order.size, order.reserve)
+            return
+
+        # Insert a new price level.
+        self._unshare()
+        aggregate_order = AggregateOrder(order)
+        self._orders.insert(index, aggregate_order)
+        self._prices.insert(index, order.price)
+        if self._owned is not None:
+            self._owned.add(id(aggregate_order))
+        if self._index is not None:
+            self._index.insert(self._position(index), aggregate_order)
+
+    def add_orders(self, orders: Sequence[Order]) -> None:
+        """Add a batch of orders.
+
+        The orders keep their sequence within each price level, and each
+        level is found once however many orders are added to it.
+
+        Args:
+            orders (Sequence[Order]): The orders.
+        """
+        levels: Dict[Decimal, List[Order]] = {}
+        for order in orders:
+            levels.setdefault(order.price, []).append(order)
+
+        for price, batch in levels.items():
+            index = self._find(price)
+            if index == -1:
+                self.add_order(batch[0])
+                batch = batch[1:]
+                if not batch:
+                    continue
+                index = self._find(price)
+            aggregate_order = self._own(index)
+            for order in batch:
+                aggregate_order.append(order)
+            self._update_index(
+                index,
+                price,
+                sum(order.size for order in batch),
+                sum(order.reserve for order in batch)
+            )
+
+    def take_at_or_better(self, price: Decimal) -> List[AggregateOrder]:
+        """Remove the price levels at or better than a price.
+
+        Args:
+            price (Decimal): The price.
+
+        Returns:
+            List[AggregateOrder]: The removed levels, best first.
+        """
+        levels = self.depth_at_or_better(price)
+        for _ in levels:
+            self.delete_best()
+        return levels
 
-    def amend_order(self, order: Order, size: int) -> None:
+    def amend_order(
+            self,
+            order: Order,
+            size: int,
+            reserve: Optional[int] = None
+    ) -> None:
         """Amend an order.
 
         Args:
             order (Order): The order.
             size (int): The new size.
+            reserve (Optional[int], optional): The new reserve of an iceberg
+                order. Defaults to None.
 
         Raises:
             ValueError: If there are no orders at the price.
         """
         # Find the position of the order in the aggregate orders.
-        index = index_of(
-            self._orders,
-            lambda x: x.price == order.price
-        )
+        index = self._find(order.price)
         if index == -1:
             raise ValueError("no order at this price")
 
         # Change the size.
-        self._orders[index].change_size(order.order_id, size)
+        aggregate_order = self._own(index)
+        previous_size = aggregate_order.size
+        previous_reserve = aggregate_order.reserve
+        aggregate_order.change_size(order.order_id, size, reserve)
+        self._update_index(
+            index,
+            order.price,
+            aggregate_order.size - previous_size,
+            aggregate_order.reserve - previous_reserve
+        )
 
     def cancel_order(self, order: Order) -> None:
         """Cancel an order.
@@ -110,19 +317,211 @@ class AggregateOrderSide:
         Raises:
             KeyError: If the order is not in this side.
         """
-        index = index_of(
-            self._orders,
-            lambda x: x.price == order.price
-        )
+        index = self._find(order.price)
         if index == -1:
             raise KeyError("The aggregate order could not be found")
 
-        aggregate_order = self._orders[index]
+        aggregate_order = self._own(index)
+        previous_size = aggregate_order.size
+        previous_reserve = aggregate_order.reserve
         aggregate_order.cancel(order.order_id)
-        if len(aggregate_order) == 0:
+        if len(aggregate_order) != 0:
+            self._update_index(
+                index,
+                order.price,
+                aggregate_order.size - previous_size,
+                aggregate_order.reserve - previous_reserve
+            )
+        elif aggregate_order is self.best:
+            self.delete_best()
+        else:
             # If there are no orders left at this price level, delete the
             # aggregate order.
+            if self._index is not None:
+                self._index.remove(self._position(index))
+            self._unshare()
             del self._orders[index]
+            del self._prices[index]
+
+    def size_ahead(self, order: Order) -> int:
+        """The total size of the orders ahead of an order at its price.
+
+        Args:
+            order (Order): The order.
+
+        Raises:
+            KeyError: If the order is not in this side.
+
+        Returns:
+            int: The size ahead.
+        """
+        return self._level(order).size_ahead(order.order_id)
+
+    def queue_position(self, order: Order) -> int:
+        """The number of orders ahead of an order at its price.
+
+        Args:
+            order (Order): The order.
+
+        Raises:
+            KeyError: If the order is not in this side.
+
+        Returns:
+            int: The position, from zero.
+        """
+        return self._level(order).queue_position(order.order_id)
+
+    def size_at_or_better(self, price: Decimal) -> int:
+        """The size available at or better than a price.
+
+        Args:
+            price (Decimal): The price.
+
+        Returns:
+            int: The total size of the levels at or better than the price.
+        """
+        return self._depth_index.best_size(self._count_at_or_better(price))
+
+    def reserve_at_or_better(self, price: Decimal) -> int:
+        """The reserve of the iceberg orders at or better than a price.
+
+        Args:
+            price (Decimal): The price.
+
+        Returns:
+            int: The total reserve of the levels at or better than the price.
+        """
+        return self._depth_index.best_reserve(self._count_at_or_better(price))
+
+    def size_within(self, distance: Decimal) -> int:
+        """The size available within a price distance of the best price.
+
+        Args:
+            distance (Decimal): The distance from the best price.
+
+        Returns:
+            int: The total size of the levels within the distance.
+        """
+        if not self._orders:
+            return 0
+        if self._low_is_best:
+            return self.size_at_or_better(self.best.price + distance)
+        else:
+            return self.size_at_or_better(self.best.price - distance)
+
+    def price_for_size(self, size: int) -> Optional[Decimal]:
+        """The worst price reached when sweeping the side for a size.
+
+        Args:
+            size (int): The size.
+
+        Raises:
+            ValueError: When the size is less than or equal to 0.
+
+        Returns:
+            Optional[Decimal]: The price, or None if there is insufficient
+                size.
+        """
+        if size <= 0:
+            raise ValueError("size must be greater than 0")
+        count, _ = self._depth_index.levels_for_size(size)
+        if count == 0:
+            return None
+        return self._prices[count - 1 if self._low_is_best else -count]
+
+    def cost_to_fill(self, size: int) -> Optional[Decimal]:
+        """The notional (price times size) of sweeping the side for a size.
+
+        Args:
+            size (int): The size.
+
+        Raises:
+            ValueError: When the size is less than or equal to 0.
+
+        Returns:
+            Optional[Decimal]: The notional, or None if there is insufficient
+                size.
+        """
+        if size <= 0:
+            raise ValueError("size must be greater than 0")
+        index = self._depth_index
+        count, size_before = index.levels_for_size(size)
+        if count == 0:
+            return None
+        price = self._prices[count - 1 if self._low_is_best else -count]
+        return index.best_notional(count - 1) + price * (size - size_before)
+
+    def vwap(self, size: int) -> Optional[Decimal]:
+        """The volume weighted average price of sweeping the side for a size.
+
+        Args:
+            size (int): The size.
+
+        Raises:
+            ValueError: When the size is less than or equal to 0.
+
+        Returns:
+            Optional[Decimal]: The average price, or None if there is
+                insufficient size.
+        """
+        cost = self.cost_to_fill(size)
+        return None if cost is None else cost / size
+
+    @property
+    def _depth_index(self) -> DepthIndex:
+        # The index is built when first used, and maintained thereafter.
+        if self._index is None:
+            self._index = DepthIndex(
+                reversed(self._orders) if self._low_is_best
+                else self._orders
+            )
+        return self._index
+
+    def _update_index(
+            self,
+            index: int,
+            price: Decimal,
+            delta: int,
+            reserve: int = 0
+    ) -> None:
+        if self._index is not None:
+            self._index.update(self._position(index), price, delta, reserve)
+
+    def _count_at_or_better(self, price: Decimal) -> int:
+        if self._low_is_best:
+            return bisect_right(self._prices, price)
+        return len(self._prices) - bisect_left(self._prices, price)
+
+    def _position(self, index: int) -> int:
+        # The index holds the levels worst first.
+        return len(self._orders) - 1 - index if self._low_is_best else index
+
+    def _own(self, index: int) -> AggregateOrder:
+        aggregate_order = self._orders[index]
+        if self._owned is not None and id(aggregate_order) not in self._owned:
+            self._unshare()
+            aggregate_order = aggregate_order.copy()
+            self._orders[index] = aggregate_order
+            self._owned.add(id(aggregate_order))
+        return aggregate_order
+
+    def _unshare(self) -> None:
+        if self._is_shared:
+            self._orders = deque(self._orders)
+            self._prices = list(self._prices)
+            self._is_shared = False
+
+    def _level(self, order: Order) -> AggregateOrder:
+        index = self._find(order.price)
+        if index == -1:
+            raise KeyError("The aggregate order could not be found")
+        return self._orders[index]
+
+    def _find(self, price: Decimal) -> int:
+        index = bisect_left(self._prices, price)
+        if index < len(self._prices) and self._prices[index] == price:
+            return index
+        return -1
 
     def __eq__(self, other: object) -> bool:
         return (
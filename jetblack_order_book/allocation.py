@@ -0,0 +1,128 @@
+"""Allocation"""
+
+from __future__ import annotations
+
+from abc import ABCMeta, abstractmethod
+from array import array
+from typing import List, Sequence, Tuple
+
+from .order import Order
+
+
+class Allocation(metaclass=ABCMeta):
+    """A policy for allocating an aggressive order across the orders resting
+    at a price level."""
+
+    @abstractmethod
+    def allocate(
+            self,
+            orders: Sequence[Order],
+            size: int
+    ) -> List[Tuple[Order, int]]:
+        """Allocate a size across the orders at a price level.
+
+        Args:
+            orders (Sequence[Order]): The orders at the level, in time
+                priority.
+            size (int): The size to allocate, which is not more than the size
+                of the level.
+
+        Returns:
+            List[Tuple[Order, int]]: The orders which are filled and the size
+            of each fill, in time priority.
+        """
+
+
+class ProRataAllocation(Allocation):
+    """Allocate in proportion to the size of the resting orders.
+
+    The allocation is made in stages. If there is a top order it is filled
+    first. A share of what remains is then allocated in time priority (the
+    price-time-pro-rata split). The rest is allocated pro-rata to the unfilled
+    sizes, rounding down, with allocations below the minimum dropped. Any size
+    left by rounding is allocated in time priority.
+    """
+
+    def __init__(
+            self,
+            top_order: bool = False,
+            minimum: int = 1,
+            time_share: float = 0.0
+    ) -> None:
+        """Initialise the allocation.
+
+        Args:
+            top_order (bool, optional): If True the first order at the level
+                is filled before the others. Defaults to False.
+            minimum (int, optional): The smallest pro-rata allocation.
+                Defaults to 1.
+            time_share (float, optional): The share of the size allocated in
+                time priority before the pro-rata allocation. Defaults to 0.0.
+
+        Raises:
+            ValueError: If the minimum is less than 1 or the time share is not
+                between 0 and 1.
+        """
+        if minimum < 1:
+            raise ValueError("minimum must be at least 1")
+        if not 0 <= time_share <= 1:
+            raise ValueError("time share must be between 0 and 1")
+        self._top_order = top_order
+        self._minimum = minimum
+        self._time_share = time_share
+
+    def allocate(
+            self,
+            orders: Sequence[Order],
+            size: int
+    ) -> List[Tuple[Order, int]]:
+        unfilled = array('q', (order.size for order in orders))
+        allocated = array('q', bytes(unfilled.itemsize * len(unfilled)))
+
+        if self._top_order and orders:
+            size -= self._allocate_in_time(unfilled, allocated, 1, size)
+        if self._time_share:
+            shared = int(size * self._time_share)
+            size -= self._allocate_in_time(
+                unfilled, allocated, len(unfilled), shared
+            )
+
+        total = sum(unfilled)
+        if size and total:
+            shares = array(
+                'q',
+                (
+                    share if share >= self._minimum else 0
+                    for share in (size * open // total for open in unfilled)
+                )
+            )
+            for index, share in enumerate(shares):
+                if share:
+                    unfilled[index] -= share
+                    allocated[index] += share
+            size -= sum(shares)
+
+        self._allocate_in_time(unfilled, allocated, len(unfilled), size)
+
+        return [
+            (order, fill_size)
+            for order, fill_size in zip(orders, allocated)
+            if fill_size
+        ]
+
+    @staticmethod
+    def _allocate_in_time(
+            unfilled: array,
+            allocated: array,
+            count: int,
+            size: int
+    ) -> int:
+        remaining = size
+        for index in range(count):
+            if not remaining:
+                break
+            fill_size = min(unfilled[index], remaining)
+            unfilled[index] -= fill_size
+            allocated[index] += fill_size
+            remaining -= fill_size
+        return size - remaining
@@ -0,0 +1,138 @@
+"""Auction"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+from enum import Enum, auto
+from itertools import accumulate
+from typing import NamedTuple, Optional, Sequence
+
+from .aggregate_order import AggregateOrder
+
+
+class AuctionTieBreak(Enum):
+    """How to choose between uncrossing prices with the same volume and
+    imbalance."""
+
+    HIGHEST = auto()
+    LOWEST = auto()
+    REFERENCE = auto()
+
+
+class Uncross(NamedTuple):
+    """The result of finding the uncrossing price"""
+
+    price: Decimal
+    volume: int
+    imbalance: int
+
+
+def find_uncross(
+        bids: Sequence[AggregateOrder],
+        offers: Sequence[AggregateOrder],
+        tie_break: AuctionTieBreak,
+        reference: Optional[Decimal] = None
+) -> Optional[Uncross]:
+    """Find the price which maximises the volume executed by an auction.
+
+    Only the levels in the crossed range of prices can trade, so only those
+    levels are visited. The cumulative sizes of each side are built once as
+    arrays, and the volume at each candidate price is found by a binary
+    search, so the cost depends on the number of levels rather than orders.
+
+    The size of a level includes the reserves of its iceberg orders, as they
+    are replenished while the auction fills them.
+
+    Prices with the same volume are decided by the smallest imbalance between
+    the sizes available to buy and to sell, then by the tie break.
+
+    Args:
+        bids (Sequence[AggregateOrder]): The bids at or above the best offer,
+            best first.
+        offers (Sequence[AggregateOrder]): The offers at or below the best bid,
+            best first.
+        tie_break (AuctionTieBreak): The tie break.
+        reference (Optional[Decimal], optional): The reference price for the
+            REFERENCE tie break. Defaults to None.
+
+    Raises:
+        ValueError: If the tie break is REFERENCE without a reference price.
+
+    Returns:
+        Optional[Uncross]: The uncrossing price, volume and imbalance, or None
+        if the book is not crossed.
+    """
+    if tie_break == AuctionTieBreak.REFERENCE and reference is None:
+        raise ValueError("a reference price is required")
+    if not bids or not offers:
+        return None
+
+    # Order both sides by ascending price. The bid volume at a price is the
+    # size of the bids at or above it, and the offer volume the size of the
+    # offers at or below it.
+    bid_prices = [level.price for level in reversed(bids)]
+    bid_volumes = array(
+        'q',
+        accumulate(level.size + level.reserve for level in bids)
+    )
+    bid_volumes.reverse()
+    offer_prices = [level.price for level in offers]
+    offer_volumes = array(
+        'q',
+        accumulate(level.size + level.reserve for level in offers)
+    )
+
+    def uncross_at(price: Decimal) -> Uncross:
+        index = bisect_left(bid_prices, price)
+        bid_volume = bid_volumes[index] if index < len(bid_volumes) else 0
+        index = bisect_right(offer_prices, price)
+        offer_volume = offer_volumes[index - 1] if index else 0
+        return Uncross(
+            price,
+            min(bid_volume, offer_volume),
+            abs(bid_volume - offer_volume)
+        )
+
+    # The volumes only change at the prices of the levels.
+    candidates = [
+        candidate
+        for candidate in map(
+            uncross_at,
+            sorted(set(bid_prices).union(offer_prices))
+        )
+        if candidate.volume
+    ]
+
+    if not candidates:
+        return None
+
+    best_volume = max(candidate.volume for candidate in candidates)
+    candidates = [
+        candidate for candidate in candidates
+        if candidate.volume == best_volume
+    ]
+    least_imbalance = min(candidate.imbalance for candidate in candidates)
+    candidates = [
+        candidate for candidate in candidates
+        if candidate.imbalance == least_imbalance
+    ]
+
+    if tie_break == AuctionTieBreak.HIGHEST:
+        return candidates[-1]
+    if tie_break == AuctionTieBreak.LOWEST:
+        return candidates[0]
+    # The reference price itself if it is as good, otherwise the closest
+    # price, taking the lower of two prices equally close.
+    assert reference is not None
+    candidate = uncross_at(reference)
+    if (
+            candidate.volume == best_volume and
+            candidate.imbalance == least_imbalance
+    ):
+        return candidate
+    return min(
+        candidates,
+        key=lambda candidate: abs(candidate.price - reference)
+    )
@@ -0,0 +1,186 @@
+"""Conflated market data.
+
+Subscribers receive the changes to the price levels of the books of an
+exchange at most once per interval. The changes in between are coalesced, so
+a level which changes many times is sent once with its latest size, and the
+cost of publishing depends on the number of changed levels rather than the
+number of orders.
+
+    publisher = ConflatingPublisher(exchange)
+    publisher.subscribe(send_to_ui, interval=0.25, levels=10)
+    publisher.subscribe(send_to_risk, interval=1.0, levels=1)
+
+    # In the matching loop.
+    exchange.add_order(...)
+    publisher.publish()
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from .exchange_order_book import ExchangeOrderBook
+from .order import Side
+from .snapshot import BookSnapshot, LevelSnapshot
+
+
+class LevelUpdate(NamedTuple):
+    """A change to a price level.
+
+    A level which has been removed has a size and count of zero.
+    """
+
+    ticker: str
+    side: Side
+    price: Decimal
+    size: int
+    count: int
+
+
+class Subscription:
+    """A subscriber to conflated updates."""
+
+    def __init__(
+            self,
+            callback: Callable[[List[LevelUpdate]], None],
+            interval: float,
+            levels: Optional[int]
+    ) -> None:
+        """Initialise the subscription.
+
+        Args:
+            callback (Callable[[List[LevelUpdate]], None]): The function
+                called with the updates.
+            interval (float): The minimum time between updates.
+            levels (Optional[int]): The market depth, or None for all levels.
+        """
+        self.callback = callback
+        self.interval = interval
+        self.levels = levels
+        # The time at which the next updates may be sent.
+        self.due = float('-inf')
+        # The sequence number of the exchange at the last updates.
+        self.sequence = 0
+        # The snapshots last sent for each ticker.
+        self.sent: Dict[str, BookSnapshot] = {}
+
+
+def _diff(
+        ticker: str,
+        side: Side,
+        before: Sequence[LevelSnapshot],
+        after: Sequence[LevelSnapshot]
+) -> List[LevelUpdate]:
+    updates: List[LevelUpdate] = []
+    previous = {level.price: level for level in before}
+    for level in after:
+        # Unchanged levels share their record, so are usually found by
+        # identity.
+        sent = previous.pop(level.price, None)
+        if sent is not level and sent != level:
+            updates.append(
+                LevelUpdate(ticker, side, level.price, level.size, level.count)
+            )
+    for price in previous:
+        updates.append(LevelUpdate(ticker, side, price, 0, 0))
+    return updates
+
+
+class ConflatingPublisher:
+    """Publish coalesced changes to the price levels of an exchange."""
+
+    def __init__(
+            self,
+            exchange: ExchangeOrderBook,
+            clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Initialise the publisher.
+
+        Args:
+            exchange (ExchangeOrderBook): The exchange.
+            clock (Callable[[], float], optional): The clock used to throttle
+                the updates. Defaults to `time.monotonic`.
+        """
+        self._exchange = exchange
+        self._clock = clock
+        self._subscriptions: List[Subscription] = []
+
+    def subscribe(
+            self,
+            callback: Callable[[List[LevelUpdate]], None],
+            interval: float,
+            levels: Optional[int] = None
+    ) -> Subscription:
+        """Add a subscriber.
+
+        The first updates contain every level of every book.
+
+        Args:
+            callback (Callable[[List[LevelUpdate]], None]): The function
+                called with the updates.
+            interval (float): The minimum time between updates.
+            levels (Optional[int], optional): The market depth. Defaults to
+                None for all levels.
+
+        Raises:
+            ValueError: If the interval is negative or the levels are not
+                greater than zero.
+
+        Returns:
+            Subscription: The subscription.
+        """
+        if interval < 0:
+            raise ValueError('interval must not be negative')
+        if not (levels is None or levels > 0):
+            raise ValueError('levels should be > 0')
+
+        subscription = Subscription(callback, interval, levels)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Remove a subscriber.
+
+        Args:
+            subscription (Subscription): The subscription.
+
+        Raises:
+            ValueError: If the subscription is not found.
+        """
+        self._subscriptions.remove(subscription)
+
+    def publish(self) -> None:
+        """Send the changes to the subscribers which are due updates.
+
+        Only the books which have changed since a subscriber's last updates
+        are compared.
+        """
+        now = self._clock()
+        for subscription in self._subscriptions:
+            if now < subscription.due:
+                continue
+
+            updates: List[LevelUpdate] = []
+            tickers = (
+                self._exchange.changed_since(subscription.sequence)
+                if subscription.sent
+                else self._exchange.tickers
+            )
+            for ticker in tickers:
+                snapshot = self._exchange.snapshot(ticker)
+                sent = subscription.sent.get(ticker)
+                levels = subscription.levels
+                bids, offers = snapshot.bids[:levels], snapshot.offers[:levels]
+                updates += _diff(
+                    ticker, Side.BUY, sent.bids if sent else (), bids)
+                updates += _diff(
+                    ticker, Side.SELL, sent.offers if sent else (), offers)
+                subscription.sent[ticker] = BookSnapshot(
+                    bids, offers, snapshot.sequence)
+
+            subscription.sequence = self._exchange.sequence
+            if updates:
+                subscription.due = now + subscription.interval
+                subscription.callback(updates)
@@ -0,0 +1,52 @@
+"""Depth arrays"""
+
+from __future__ import annotations
+
+from array import array
+from itertools import accumulate
+from operator import attrgetter
+from typing import NamedTuple, Optional, Sequence
+
+from .aggregate_order import AggregateOrder
+
+
+class DepthArrays(NamedTuple):
+    """The price levels of a side as columnar arrays.
+
+    The levels are ordered from best to worst. Each column is a contiguous
+    `array.array`, so it can be wrapped without copying by anything supporting
+    the buffer protocol (e.g. `numpy.frombuffer`).
+    """
+
+    prices: array
+    sizes: array
+    counts: Optional[array]
+    cumulative_sizes: Optional[array]
+
+
+_price = attrgetter('price')
+_size = attrgetter('size')
+
+
+def create_depth_arrays(
+        levels: Sequence[AggregateOrder],
+        counts: bool,
+        cumulative: bool
+) -> DepthArrays:
+    """Create the depth arrays for price levels.
+
+    Args:
+        levels (Sequence[AggregateOrder]): The price levels, best first.
+        counts (bool): If True include the number of orders at each level.
+        cumulative (bool): If True include the cumulative size.
+
+    Returns:
+        DepthArrays: The depth arrays.
+    """
+    sizes = array('q', map(_size, levels))
+    return DepthArrays(
+        array('d', map(float, map(_price, levels))),
+        sizes,
+        array('q', map(len, levels)) if counts else None,
+        array('q', accumulate(sizes)) if cumulative else None
+    )
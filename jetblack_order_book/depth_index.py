@@ -0,0 +1,340 @@
+"""Depth index"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from random import random
+from typing import Iterable, List, Optional, Tuple
+
+from .aggregate_order import AggregateOrder
+
+
+class _Node:
+    """A level in the tree, with the totals of its subtree."""
+
+    __slots__ = (
+        'priority',
+        'left',
+        'right',
+        'size',
+        'notional',
+        'reserve',
+        'count',
+        'total_size',
+        'total_notional',
+        'total_reserve'
+    )
+
+    def __init__(self, level: AggregateOrder) -> None:
+        self.priority = random()
+        self.left: Optional[_Node] = None
+        self.right: Optional[_Node] = None
+        self.size = level.size
+        self.notional = level.price * level.size
+        self.reserve = level.reserve
+        self.count = 1
+        self.total_size = self.size
+        self.total_notional = self.notional
+        self.total_reserve = self.reserve
+
+    def refresh(self) -> None:
+        """Recalculate the totals from the children."""
+        count, size = 1, self.size
+        notional, reserve = self.notional, self.reserve
+        for child in (self.left, self.right):
+            if child is not None:
+                count += child.count
+                size += child.total_size
+                notional += child.total_notional
+                reserve += child.total_reserve
+        self.count = count
+        self.total_size = size
+        self.total_notional = notional
+        self.total_reserve = reserve
+
+
+def _count(node: Optional[_Node]) -> int:
+    return 0 if node is None else node.count
+
+
+def _split(
+        node: Optional[_Node],
+        count: int
+) -> Tuple[Optional[_Node], Optional[_Node]]:
+    # Split the first `count` levels from the rest.
+    if node is None:
+        return None, None
+    left_count = _count(node.left)
+    if count <= left_count:
+        left, node.left = _split(node.left, count)
+        node.refresh()
+        return left, node
+    node.right, right = _split(node.right, count - left_count - 1)
+    node.refresh()
+    return node, right
+
+
+def _merge(left: Optional[_Node], right: Optional[_Node]) -> Optional[_Node]:
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        left.refresh()
+        return left
+    right.left = _merge(left, right.left)
+    right.refresh()
+    return right
+
+
+def _refresh_all(node: Optional[_Node]) -> None:
+    if node is not None:
+        _refresh_all(node.left)
+        _refresh_all(node.right)
+        node.refresh()
+
+
+class DepthIndex:
+    """Cumulative sizes, notionals and reserves of the price levels of a
+    side.
+
+    The levels are indexed from the worst price to the best, and kept in a
+    treap (a binary search tree balanced by random priorities) holding the
+    totals of each subtree. Levels can be inserted and removed at any
+    position, and the totals of the best levels found, in O(log n). Position
+    zero is the worst level.
+    """
+
+    def __init__(self, levels: Iterable[AggregateOrder]) -> None:
+        """Initialise the index in O(n).
+
+        Args:
+            levels (Iterable[AggregateOrder]): The levels, worst first.
+        """
+        # Build the tree from the right spine of a Cartesian tree.
+        spine: List[_Node] = []
+        for level in levels:
+            node = _Node(level)
+            last: Optional[_Node] = None
+            while spine and spine[-1].priority < node.priority:
+                last = spine.pop()
+            node.left = last
+            if spine:
+                spine[-1].right = node
+            spine.append(node)
+        self._root = spine[0] if spine else None
+        _refresh_all(self._root)
+
+    def __len__(self) -> int:
+        return _count(self._root)
+
+    def insert(self, position: int, level: AggregateOrder) -> None:
+        """Insert a new level.
+
+        Args:
+            position (int): The position of the level.
+            level (AggregateOrder): The level.
+        """
+        node = _Node(level)
+        # Descend to where the priority of the new node places it, adding it
+        # to the totals of the nodes above, then split the subtree there.
+        parent: Optional[_Node] = None
+        is_left = False
+        current = self._root
+        while current is not None and current.priority > node.priority:
+            current.count += 1
+            current.total_size += node.size
+            current.total_notional += node.notional
+            current.total_reserve += node.reserve
+            parent = current
+            left_count = _count(current.left)
+            is_left = position <= left_count
+            if is_left:
+                current = current.left
+            else:
+                position -= left_count + 1
+                current = current.right
+        node.left, node.right = _split(current, position)
+        node.refresh()
+        self._attach(parent, is_left, node)
+
+    def remove(self, position: int) -> None:
+        """Remove a level.
+
+        Args:
+            position (int): The position of the level.
+        """
+        path: List[Tuple[_Node, bool]] = []
+        node = self._root
+        while node is not None:
+            left_count = _count(node.left)
+            if position == left_count:
+                break
+            path.append((node, position < left_count))
+            if position < left_count:
+                node = node.left
+            else:
+                position -= left_count + 1
+                node = node.right
+        if node is None:
+            raise IndexError('position out of range')
+
+        for parent, _ in path:
+            parent.count -= 1
+            parent.total_size -= node.size
+            parent.total_notional -= node.notional
+            parent.total_reserve -= node.reserve
+        parent, is_left = path[-1] if path else (None, False)
+        self._attach(parent, is_left, _merge(node.left, node.right))
+
+    def append(self, level: AggregateOrder) -> None:
+        """Add a new best level.
+
+        Args:
+            level (AggregateOrder): The level.
+        """
+        self.insert(len(self), level)
+
+    def pop(self) -> None:
+        """Remove the best level."""
+        self.remove(len(self) - 1)
+
+    def update(
+            self,
+            position: int,
+            price: Decimal,
+            delta: int,
+            reserve: int = 0
+    ) -> None:
+        """Update the size of a level.
+
+        Args:
+            position (int): The position of the level.
+            price (Decimal): The price of the level.
+            delta (int): The change in size.
+            reserve (int, optional): The change in reserve. Defaults to 0.
+        """
+        notional = price * delta
+        node = self._root
+        while node is not None:
+            node.total_size += delta
+            node.total_notional += notional
+            node.total_reserve += reserve
+            left_count = _count(node.left)
+            if position < left_count:
+                node = node.left
+            elif position == left_count:
+                node.size += delta
+                node.notional += notional
+                node.reserve += reserve
+                return
+            else:
+                position -= left_count + 1
+                node = node.right
+
+    def best_size(self, count: int) -> int:
+        """The size of the best levels.
+
+        Args:
+            count (int): The number of levels.
+
+        Returns:
+            int: The total size.
+        """
+        subtrees, nodes = self._best(count)
+        return (
+            sum(node.total_size for node in subtrees) +
+            sum(node.size for node in nodes)
+        )
+
+    def best_notional(self, count: int) -> Decimal:
+        """The notional (price times size) of the best levels.
+
+        Args:
+            count (int): The number of levels.
+
+        Returns:
+            Decimal: The total notional.
+        """
+        subtrees, nodes = self._best(count)
+        return (
+            sum((node.total_notional for node in subtrees), Decimal(0)) +
+            sum((node.notional for node in nodes), Decimal(0))
+        )
+
+    def best_reserve(self, count: int) -> int:
+        """The reserve of the iceberg orders in the best levels.
+
+        Args:
+            count (int): The number of levels.
+
+        Returns:
+            int: The total reserve.
+        """
+        subtrees, nodes = self._best(count)
+        return (
+            sum(node.total_reserve for node in subtrees) +
+            sum(node.reserve for node in nodes)
+        )
+
+    def levels_for_size(self, size: int) -> Tuple[int, int]:
+        """Find the number of best levels required to reach a size.
+
+        Args:
+            size (int): The size.
+
+        Returns:
+            Tuple[int, int]: The number of levels required, and the size of the
+                levels before the last one. If there is insufficient size the
+                number of levels is zero.
+        """
+        count, before = 0, 0
+        node = self._root
+        total = 0 if node is None else node.total_size
+        if size > total:
+            return 0, total
+        # Walk down from the best level, taking whole subtrees while they
+        # fall short of the size.
+        while node is not None:
+            right_size = 0 if node.right is None else node.right.total_size
+            if before + right_size >= size:
+                node = node.right
+                continue
+            before += right_size
+            count += _count(node.right) + 1
+            if before + node.size >= size:
+                return count, before
+            before += node.size
+            node = node.left
+        return count, before
+
+    def _attach(
+            self,
+            parent: Optional[_Node],
+            is_left: bool,
+            node: Optional[_Node]
+    ) -> None:
+        if parent is None:
+            self._root = node
+        elif is_left:
+            parent.left = node
+        else:
+            parent.right = node
+
+    def _best(self, count: int) -> Tuple[List[_Node], List[_Node]]:
+        # The subtrees and the single nodes which make up the best levels.
+        subtrees: List[_Node] = []
+        nodes: List[_Node] = []
+        node = self._root
+        while node is not None and count > 0:
+            right_count = _count(node.right)
+            if count <= right_count:
+                node = node.right
+                continue
+            if node.right is not None:
+                subtrees.append(node.right)
+            nodes.append(node)
+            count -= right_count + 1
+            node = node.left
+        return subtrees, nodes
@@ -0,0 +1,389 @@
+"""Binary encoding of market data.
+
+Fills, price levels (L2) and order events (L3) are encoded as fixed size,
+little endian records, each starting with a one byte record type. Prices are
+encoded exactly as a 64 bit mantissa and an 8 bit decimal exponent.
+
+The encoding of a price level is cached with its immutable snapshot record,
+so a level is only encoded again when it changes. Records are decoded in
+place from any buffer, without slicing it.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from enum import IntEnum
+import struct
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    NamedTuple,
+    Tuple,
+    Union
+)
+
+from .fill import Fill
+from .order import Side
+from .snapshot import BookSnapshot, LevelSnapshot
+
+MIN_MANTISSA, MAX_MANTISSA = -(1 << 63), (1 << 63) - 1
+MIN_EXPONENT, MAX_EXPONENT = -128, 127
+
+SIDES = (Side.BUY, Side.SELL)
+SIDE_CODES = {side: code for code, side in enumerate(SIDES)}
+
+
+class RecordType(IntEnum):
+    """The type of a record"""
+
+    FILL = 1
+    LEVEL = 2
+    ORDER_ADDED = 3
+    ORDER_CHANGED = 4
+    ORDER_DELETED = 5
+
+
+FILL_RECORD = struct.Struct('<BIqqqbq')
+LEVEL_RECORD = struct.Struct('<BIBqbqI')
+ORDER_ADDED_RECORD = struct.Struct('<BIqBqbq')
+ORDER_CHANGED_RECORD = struct.Struct('<BIqq')
+ORDER_DELETED_RECORD = struct.Struct('<BIq')
+
+
+class FillEvent(NamedTuple):
+    """A fill in a book."""
+
+    instrument_id: int
+    buy_order_id: int
+    sell_order_id: int
+    price: Decimal
+    size: int
+
+
+class LevelEvent(NamedTuple):
+    """The state of a price level, with a size of zero if it was removed."""
+
+    instrument_id: int
+    side: Side
+    price: Decimal
+    size: int
+    count: int
+
+
+class OrderAdded(NamedTuple):
+    """An order was added to a book."""
+
+    instrument_id: int
+    order_id: int
+    side: Side
+    price: Decimal
+    size: int
+
+
+class OrderChanged(NamedTuple):
+    """The size of an order changed."""
+
+    instrument_id: int
+    order_id: int
+    size: int
+
+
+class OrderDeleted(NamedTuple):
+    """An order was removed from a book."""
+
+    instrument_id: int
+    order_id: int
+
+
+Event = Union[FillEvent, LevelEvent, OrderAdded, OrderChanged, OrderDeleted]
+
+
+def encode_price(price: Decimal) -> Tuple[int, int]:
+    """Encode a price as a mantissa and a decimal exponent.
+
+    Args:
+        price (Decimal): The price.
+
+    Raises:
+        ValueError: If the price is not finite, or does not fit.
+
+    Returns:
+        Tuple[int, int]: The mantissa and exponent.
+    """
+    exponent = price.as_tuple().exponent
+    if not isinstance(exponent, int):
+        raise ValueError('price must be finite')
+    mantissa = int(price.scaleb(-exponent))
+    if not (
+            MIN_MANTISSA <= mantissa <= MAX_MANTISSA and
+            MIN_EXPONENT <= exponent <= MAX_EXPONENT
+    ):
+        raise ValueError('price cannot be encoded')
+    return mantissa, exponent
+
+
+def decode_price(mantissa: int, exponent: int) -> Decimal:
+    """Decode a price from a mantissa and a decimal exponent.
+
+    Args:
+        mantissa (int): The mantissa.
+        exponent (int): The exponent.
+
+    Returns:
+        Decimal: The price.
+    """
+    return Decimal(mantissa).scaleb(exponent)
+
+
+def encode_fill(instrument_id: int, fill: Fill) -> bytes:
+    """Encode a fill.
+
+    Args:
+        instrument_id (int): The instrument id.
+        fill (Fill): The fill.
+
+    Returns:
+        bytes: The record.
+    """
+    return FILL_RECORD.pack(
+        RecordType.FILL,
+        instrument_id,
+        fill.buy_order_id,
+        fill.sell_order_id,
+        *encode_price(fill.price),
+        fill.size
+    )
+
+
+def encode_level(
+        instrument_id: int,
+        side: Side,
+        price: Decimal,
+        size: int,
+        count: int
+) -> bytes:
+    """Encode the state of a price level.
+
+    Args:
+        instrument_id (int): The instrument id.
+        side (Side): The side.
+        price (Decimal): The price.
+        size (int): The size, or zero if the level was removed.
+        count (int): The number of orders.
+
+    Returns:
+        bytes: The record.
+    """
+    return LEVEL_RECORD.pack(
+        RecordType.LEVEL,
+        instrument_id,
+        SIDE_CODES[side],
+        *encode_price(price),
+        size,
+        count
+    )
+
+
+def encode_order_added(
+        instrument_id: int,
+        order_id: int,
+        side: Side,
+        price: Decimal,
+        size: int
+) -> bytes:
+    """Encode the addition of an order.
+
+    Args:
+        instrument_id (int): The instrument id.
+        order_id (int): The order id.
+        side (Side): The side.
+        price (Decimal): The price.
+        size (int): The size.
+
+    Returns:
+        bytes: The record.
+    """
+    return ORDER_ADDED_RECORD.pack(
+        RecordType.ORDER_ADDED,
+        instrument_id,
+        order_id,
+        SIDE_CODES[side],
+        *encode_price(price),
+        size
+    )
+
+
+def encode_order_changed(
+        instrument_id: int,
+        order_id: int,
+        size: int
+) -> bytes:
+    """Encode a change to the size of an order.
+
+    Args:
+        instrument_id (int): The instrument id.
+        order_id (int): The order id.
+        size (int): The new size.
+
+    Returns:
+        bytes: The record.
+    """
+    return ORDER_CHANGED_RECORD.pack(
+        RecordType.ORDER_CHANGED,
+        instrument_id,
+        order_id,
+        size
+    )
+
+
+def encode_order_deleted(instrument_id: int, order_id: int) -> bytes:
+    """Encode the removal of an order.
+
+    Args:
+        instrument_id (int): The instrument id.
+        order_id (int): The order id.
+
+    Returns:
+        bytes: The record.
+    """
+    return ORDER_DELETED_RECORD.pack(
+        RecordType.ORDER_DELETED,
+        instrument_id,
+        order_id
+    )
+
+
+class DepthEncoder:
+    """Encode the price levels of books.
+
+    The encoding of each level is kept with the snapshot record it was made
+    from. As a record is shared between snapshots until its level changes,
+    only the changed levels are encoded again.
+    """
+
+    def __init__(self) -> None:
+        self._cache: Dict[
+            Tuple[int, Side],
+            Dict[Decimal, Tuple[LevelSnapshot, bytes]]
+        ] = {}
+
+    def encode(self, instrument_id: int, snapshot: BookSnapshot) -> bytes:
+        """Encode the levels of a book snapshot, bids then offers, best
+        first.
+
+        Args:
+            instrument_id (int): The instrument id.
+            snapshot (BookSnapshot): The snapshot.
+
+        Returns:
+            bytes: The level records.
+        """
+        return b''.join(
+            self._encode_side(instrument_id, side, levels)
+            for side, levels in (
+                (Side.BUY, snapshot.bids),
+                (Side.SELL, snapshot.offers)
+            )
+        )
+
+    def _encode_side(
+            self,
+            instrument_id: int,
+            side: Side,
+            levels: Tuple[LevelSnapshot, ...]
+    ) -> bytes:
+        cached = self._cache.get((instrument_id, side), {})
+        # Levels no longer in the snapshot are dropped from the cache.
+        encodings: Dict[Decimal, Tuple[LevelSnapshot, bytes]] = {}
+        for level in levels:
+            entry = cached.get(level.price)
+            if entry is None or entry[0] is not level:
+                entry = level, encode_level(
+                    instrument_id,
+                    side,
+                    level.price,
+                    level.size,
+                    level.count
+                )
+            encodings[level.price] = entry
+        self._cache[(instrument_id, side)] = encodings
+        return b''.join(encoding for _, encoding in encodings.values())
+
+
+def _fill_event(values: tuple) -> Event:
+    _, instrument_id, buy_id, sell_id, mantissa, exponent, size = values
+    return FillEvent(
+        instrument_id,
+        buy_id,
+        sell_id,
+        decode_price(mantissa, exponent),
+        size
+    )
+
+
+def _level_event(values: tuple) -> Event:
+    _, instrument_id, side, mantissa, exponent, size, count = values
+    return LevelEvent(
+        instrument_id,
+        SIDES[side],
+        decode_price(mantissa, exponent),
+        size,
+        count
+    )
+
+
+def _order_added(values: tuple) -> Event:
+    _, instrument_id, order_id, side, mantissa, exponent, size = values
+    return OrderAdded(
+        instrument_id,
+        order_id,
+        SIDES[side],
+        decode_price(mantissa, exponent),
+        size
+    )
+
+
+def _order_changed(values: tuple) -> Event:
+    return OrderChanged(*values[1:])
+
+
+def _order_deleted(values: tuple) -> Event:
+    return OrderDeleted(*values[1:])
+
+
+DECODERS: Dict[int, Tuple[struct.Struct, Callable[[tuple], Event]]] = {
+    RecordType.FILL: (FILL_RECORD, _fill_event),
+    RecordType.LEVEL: (LEVEL_RECORD, _level_event),
+    RecordType.ORDER_ADDED: (ORDER_ADDED_RECORD, _order_added),
+    RecordType.ORDER_CHANGED: (ORDER_CHANGED_RECORD, _order_changed),
+    RecordType.ORDER_DELETED: (ORDER_DELETED_RECORD, _order_deleted),
+}
+
+
+def decode(buffer: Union[bytes, bytearray, memoryview]) -> Iterator[Event]:
+    """Decode the records in a buffer.
+
+    The records are unpacked in place, without copying the buffer.
+
+    Args:
+        buffer (Union[bytes, bytearray, memoryview]): The buffer.
+
+    Raises:
+        ValueError: If a record has an unknown type, or is truncated.
+
+    Yields:
+        Event: The decoded records.
+    """
+    view = memoryview(buffer)
+    offset, end = 0, len(view)
+    while offset < end:
+        decoder = DECODERS.get(view[offset])
+        if decoder is None:
+            raise ValueError('unknown record type')
+        record, create = decoder
+        if offset + record.size > end:
+            raise ValueError('truncated record')
+        yield create(record.unpack_from(view, offset))
+        offset += record.size
+
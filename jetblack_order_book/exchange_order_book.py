@@ -1,25 +1,47 @@
 """Exchange Order Book"""
 
+from collections import OrderedDict
 from decimal import Decimal
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import time
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple
+)
 
 from .abstract_types import PluginFactory
+from .allocation import Allocation
+from .auction import AuctionTieBreak
 from .constants import ALL_PLUGINS
 from .fill import Fill
 from .order import Side, Style
 from .order_book import OrderBook
+from .snapshot import BookSnapshot
+from .top_of_book import TopOfBook, TopOfBookArrays
 
 
 class ExchangeOrderBook:
     """An order book for an exchange.
 
     This maintains the order book for each ticker.
+
+    Every change made through the exchange order book is given a sequence
+    number, so consumers can find the books which changed since they last
+    looked without visiting every book.
     """
 
     def __init__(
             self,
             tickers: Iterable[str],
-            plugins: Sequence[PluginFactory] = ALL_PLUGINS
+            plugins: Sequence[PluginFactory] = ALL_PLUGINS,
+            clock: Callable[[], float] = time.time,
+            allocations: Optional[Mapping[str, Allocation]] = None
     ) -> None:
         """Initialise the exchange order book.
 
@@ -27,28 +49,185 @@ class ExchangeOrderBook:
             tickers (Iterable[str]): The tickers for which order books are kept.
             plugins (Sequence[PluginFactory], Optional): The plugins. Defaults
                 to `ALL_PLUGINS`.
+            clock (Callable[[], float], optional): The clock used to expire
+                orders. Defaults to `time.time`.
+            allocations (Optional[Mapping[str, Allocation]], optional): The
+                allocation policies of tickers which do not use time priority.
+                Defaults to None.
         """
+        allocations = allocations or {}
         self.books: Dict[str, OrderBook] = {
-            ticker: OrderBook(plugins)
+            ticker: OrderBook(plugins, clock, allocations.get(ticker))
             for ticker in tickers
         }
+        self.tickers: Tuple[str, ...] = tuple(self.books)
+        self._instrument_ids = {
+            ticker: instrument_id
+            for instrument_id, ticker in enumerate(self.tickers)
+        }
+        self._sequence = 0
+        # The tickers ordered by the sequence of their last change.
+        self._changes: 'OrderedDict[str, int]' = OrderedDict()
+        self._top_of_book = TopOfBookArrays(len(self.tickers))
+        self._top_of_book_sequence = 0
+        # The latest snapshot of each book.
+        self._snapshots: Dict[str, BookSnapshot] = {}
+        # The tickers in which each owner may have live orders. An owner
+        # whose orders are filled or expired is forgotten when it next
+        # cancels in the book.
+        self._owner_tickers: Dict[str, Set[str]] = {}
+        # The tickers with live orders which have an expiry time.
+        self._expiring_tickers: Set[str] = set()
+
+    @property
+    def sequence(self) -> int:
+        """The sequence number of the last change.
+
+        Returns:
+            int: The sequence number.
+        """
+        return self._sequence
+
+    def changed_since(self, sequence: int) -> List[str]:
+        """Find the tickers whose books have changed since a sequence number.
+
+        The cost is proportional to the number of changed books.
+
+        Args:
+            sequence (int): The sequence number.
+
+        Returns:
+            List[str]: The changed tickers, most recently changed first.
+        """
+        tickers: List[str] = []
+        for ticker, last_change in reversed(self._changes.items()):
+            if last_change <= sequence:
+                break
+            tickers.append(ticker)
+        return tickers
+
+    def top_of_book(self, since: Optional[int] = None) -> TopOfBook:
+        """The best bids and offers of the books as columnar arrays.
+
+        The instrument id is the index of the ticker in `tickers`. Only the
+        books that changed since the previous call are revisited. Passing the
+        sequence number of an earlier snapshot returns just the rows which
+        have changed since, so the cost is proportional to the number of
+        changed books rather than all of them.
+
+        Args:
+            since (Optional[int], optional): If given only return the rows of
+                the books changed since this sequence number, ordered by
+                instrument id. Defaults to None.
+
+        Returns:
+            TopOfBook: The top of book columns.
+        """
+        for ticker in self.changed_since(self._top_of_book_sequence):
+            order_book = self.books[ticker]
+            self._top_of_book.update(
+                self._instrument_ids[ticker],
+                order_book.bids,
+                order_book.offers,
+                self._changes[ticker]
+            )
+        self._top_of_book_sequence = self._sequence
+        if since is None:
+            return self._top_of_book.snapshot()
+
+        return self._top_of_book.snapshot(sorted(
+            self._instrument_ids[ticker]
+            for ticker in self.changed_since(since)
+        ))
+
+    def snapshot(
+            self,
+            ticker: str,
+            levels: Optional[int] = None
+    ) -> BookSnapshot:
+        """Take an immutable snapshot of the price levels of a book.
+
+        The snapshot is tagged with the sequence number of the last change to
+        the book. A snapshot of all the levels is reused until the book
+        changes again, while one of the top levels is taken afresh, as it
+        only visits those levels.
+
+        Args:
+            ticker (str): The ticker.
+            levels (Optional[int], optional): The market depth to take.
+                Defaults to None for all levels.
+
+        Returns:
+            BookSnapshot: The snapshot.
+        """
+        sequence = self._changes.get(ticker, 0)
+        if levels is not None:
+            return self.books[ticker].snapshot(levels)._replace(
+                sequence=sequence
+            )
+
+        snapshot = self._snapshots.get(ticker)
+        if snapshot is None or snapshot.sequence != sequence:
+            snapshot = self.books[ticker].snapshot()._replace(
+                sequence=sequence)
+            self._snapshots[ticker] = snapshot
+        return snapshot
+
+    def _changed(self, ticker: str) -> None:
+        self._sequence += 1
+        self._changes[ticker] = self._sequence
+        self._changes.move_to_end(ticker)
+        if (
+                ticker in self._expiring_tickers and
+                not self.books[ticker].expiring_order_count()
+        ):
+            self._expiring_tickers.discard(ticker)
+
+    def _update_owner(self, ticker: str, owner: Optional[str]) -> None:
+        # Record whether the owner has live orders in the book.
+        if owner is None:
+            return
+        if owner in self.books[ticker].owners():
+            self._owner_tickers.setdefault(owner, set()).add(ticker)
+            return
+        tickers = self._owner_tickers.get(owner)
+        if tickers is not None:
+            tickers.discard(ticker)
+            if not tickers:
+                del self._owner_tickers[owner]
 
     def add_order(
             self,
             ticker: str,
             side: Side,
-            price: Decimal,
+            price: Optional[Decimal],
             size: int,
-            style: Style
+            style: Style,
+            *,
+            display_size: Optional[int] = None,
+            owner: Optional[str] = None,
+            expires: Optional[float] = None,
+            limit_price: Optional[Decimal] = None
     ) -> Tuple[Optional[int], List[Fill], List[int]]:
         """Add an order for a ticker.
 
         Args:
             ticker (str): The ticker.
             side (Side): Buy or sell.
-            price (Decimal): The price at which the order should be executed.
+            price (Optional[Decimal]): The price at which the order should be
+                executed. For a market order this is an optional protection
+                price.
             size (int): The size of the order.
             style (Style): The order style.
+            display_size (Optional[int], optional): The display size of an
+                iceberg order. Defaults to None.
+            owner (Optional[str], optional): The owner or session placing the
+                order. Defaults to None.
+            expires (Optional[float], optional): The time at which the order
+                expires. Defaults to None.
+            limit_price (Optional[Decimal], optional): The price of the limit
+                order placed when a stop limit order triggers. Defaults to
+                None.
 
         Returns:
             Tuple[Optional[int], List[Fill], List[int]]: The id of the order (if
@@ -56,7 +235,71 @@ class ExchangeOrderBook:
             list of cancelled order ids.
         """
         order_book = self.books[ticker]
-        return order_book.add_order(side, price, size, style)
+        result = order_book.add_order(
+            side,
+            price,
+            size,
+            style,
+            display_size=display_size,
+            owner=owner,
+            expires=expires,
+            limit_price=limit_price
+        )
+        self._update_owner(ticker, owner)
+        if expires is not None and result[0] is not None:
+            self._expiring_tickers.add(ticker)
+        self._changed(ticker)
+        return result
+
+    def what_if(
+            self,
+            ticker: str,
+            side: Side,
+            price: Optional[Decimal],
+            size: int,
+            style: Style,
+            *,
+            display_size: Optional[int] = None,
+            owner: Optional[str] = None,
+            expires: Optional[float] = None,
+            limit_price: Optional[Decimal] = None
+    ) -> Tuple[Optional[int], List[Fill], List[int]]:
+        """Find the result of adding an order for a ticker without changing
+        the book.
+
+        Args:
+            ticker (str): The ticker.
+            side (Side): Buy or sell.
+            price (Optional[Decimal]): The price at which the order should be
+                executed. For a market order this is an optional protection
+                price.
+            size (int): The size of the order.
+            style (Style): The order style.
+            display_size (Optional[int], optional): The display size of an
+                iceberg order. Defaults to None.
+            owner (Optional[str], optional): The owner or session placing the
+                order. Defaults to None.
+            expires (Optional[float], optional): The time at which the order
+                expires. Defaults to None.
+            limit_price (Optional[Decimal], optional): The price of the limit
+                order placed when a stop limit order triggers. Defaults to
+                None.
+
+        Returns:
+            Tuple[Optional[int], List[Fill], List[int]]: The id the order
+            would have, the fills, and the cancelled order ids.
+        """
+        order_book = self.books[ticker]
+        return order_book.what_if(
+            side,
+            price,
+            size,
+            style,
+            display_size=display_size,
+            owner=owner,
+            expires=expires,
+            limit_price=limit_price
+        )
 
     def amend_order(self, ticker: str, order_id: int, size: int) -> None:
         """Amend aa order.
@@ -67,7 +310,36 @@ class ExchangeOrderBook:
             size (int): The new size.
         """
         order_book = self.books[ticker]
+        owner = order_book.order_owner(order_id)
         order_book.amend_order(order_id, size)
+        self._update_owner(ticker, owner)
+        self._changed(ticker)
+
+    def replace_order(
+            self,
+            ticker: str,
+            order_id: int,
+            price: Decimal,
+            size: int
+    ) -> Tuple[List[Fill], List[int]]:
+        """Replace the price and size of an order in one step.
+
+        Args:
+            ticker (str): The ticker.
+            order_id (int): The id of the order.
+            price (Decimal): The new price.
+            size (int): The new size.
+
+        Returns:
+            Tuple[List[Fill], List[int]]: Any fills and the ids of any
+            cancelled orders.
+        """
+        order_book = self.books[ticker]
+        owner = order_book.order_owner(order_id)
+        result = order_book.replace_order(order_id, price, size)
+        self._update_owner(ticker, owner)
+        self._changed(ticker)
+        return result
 
     def cancel_order(self, ticker: str, order_id: int) -> None:
         """Cancel an order.
@@ -77,4 +349,170 @@ class ExchangeOrderBook:
             order_id (int): The order id.
         """
         order_book = self.books[ticker]
+        owner = order_book.order_owner(order_id)
         order_book.cancel_order(order_id)
+        self._update_owner(ticker, owner)
+        self._changed(ticker)
+
+    def order_owner(self, ticker: str, order_id: int) -> Optional[str]:
+        """Find the owner of a live order.
+
+        Args:
+            ticker (str): The ticker.
+            order_id (int): The order id.
+
+        Returns:
+            Optional[str]: The owner, or None if the order has no owner.
+        """
+        return self.books[ticker].order_owner(order_id)
+
+    def size_ahead(self, ticker: str, order_id: int) -> int:
+        """Find the total size of the orders ahead of an order at its price.
+
+        Args:
+            ticker (str): The ticker.
+            order_id (int): The order id.
+
+        Returns:
+            int: The size ahead.
+        """
+        return self.books[ticker].size_ahead(order_id)
+
+    def queue_position(self, ticker: str, order_id: int) -> int:
+        """Find the number of orders ahead of an order at its price.
+
+        Args:
+            ticker (str): The ticker.
+            order_id (int): The order id.
+
+        Returns:
+            int: The position, from zero.
+        """
+        return self.books[ticker].queue_position(order_id)
+
+    def start_auction(self, ticker: str) -> None:
+        """Start an auction for a ticker.
+
+        Args:
+            ticker (str): The ticker.
+        """
+        self.books[ticker].start_auction()
+
+    def uncross(
+            self,
+            ticker: str,
+            tie_break: AuctionTieBreak = AuctionTieBreak.HIGHEST,
+            reference: Optional[Decimal] = None
+    ) -> Tuple[Optional[Decimal], List[Fill], List[int]]:
+        """End the auction for a ticker.
+
+        Args:
+            ticker (str): The ticker.
+            tie_break (AuctionTieBreak, optional): The tie break. Defaults to
+                AuctionTieBreak.HIGHEST.
+            reference (Optional[Decimal], optional): The reference price for
+                the REFERENCE tie break. Defaults to None.
+
+        Returns:
+            Tuple[Optional[Decimal], List[Fill], List[int]]: The uncrossing
+            price, or None if the book was not crossed, the fills and the ids
+            of any cancelled orders.
+        """
+        result = self.books[ticker].uncross(tie_break, reference)
+        self._changed(ticker)
+        return result
+
+    def expire(self) -> Dict[str, List[int]]:
+        """Cancel the orders which have expired by the current time.
+
+        Only the books with live orders which have an expiry time are
+        visited.
+
+        Returns:
+            Dict[str, List[int]]: The expired order ids for each ticker.
+        """
+        expired: Dict[str, List[int]] = {}
+        # Visit the books in a fixed order, so the sequence numbers are
+        # repeatable.
+        for ticker in sorted(
+                self._expiring_tickers,
+                key=self._instrument_ids.__getitem__
+        ):
+            order_ids = self.books[ticker].expire()
+            if order_ids:
+                expired[ticker] = order_ids
+                self._changed(ticker)
+        return expired
+
+    def mass_quote(
+            self,
+            ticker: str,
+            owner: str,
+            bids: Sequence[Tuple[Decimal, int]],
+            offers: Sequence[Tuple[Decimal, int]]
+    ) -> Tuple[List[int], List[Fill], List[int]]:
+        """Replace the quotes of an owner for a ticker.
+
+        Args:
+            ticker (str): The ticker.
+            owner (str): The owner.
+            bids (Sequence[Tuple[Decimal, int]]): The prices and sizes of the
+                bids.
+            offers (Sequence[Tuple[Decimal, int]]): The prices and sizes of the
+                offers.
+
+        Returns:
+            Tuple[List[int], List[Fill], List[int]]: The order ids of the bids
+            then the offers, any fills that were generated, and any orders that
+            were cancelled.
+        """
+        order_book = self.books[ticker]
+        result = order_book.mass_quote(owner, bids, offers)
+        self._update_owner(ticker, owner)
+        self._changed(ticker)
+        return result
+
+    def mass_cancel(
+            self,
+            owner: str,
+            side: Optional[Side] = None,
+            min_price: Optional[Decimal] = None,
+            max_price: Optional[Decimal] = None
+    ) -> Dict[str, List[int]]:
+        """Cancel the orders of an owner in all books.
+
+        This can be used to cancel the orders of a session when it
+        disconnects. Only the books in which the owner has placed orders are
+        visited.
+
+        Args:
+            owner (str): The owner.
+            side (Optional[Side], optional): If given only cancel orders for
+                this side. Defaults to None.
+            min_price (Optional[Decimal], optional): If given only cancel
+                orders at or above this price. Defaults to None.
+            max_price (Optional[Decimal], optional): If given only cancel
+                orders at or below this price. Defaults to None.
+
+        Returns:
+            Dict[str, List[int]]: The cancelled order ids for each ticker.
+        """
+        tickers = self._owner_tickers.get(owner)
+        if tickers is None:
+            return {}
+
+        cancels: Dict[str, List[int]] = {}
+        for ticker in list(tickers):
+            order_book = self.books[ticker]
+            order_ids = order_book.mass_cancel(
+                owner,
+                side,
+                min_price,
+                max_price
+            )
+            self._update_owner(ticker, owner)
+            if order_ids:
+                cancels[ticker] = order_ids
+                self._changed(ticker)
+
+        return cancels
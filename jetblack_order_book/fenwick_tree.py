@@ -0,0 +1,107 @@
+"""Fenwick tree"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Iterable, List, Union
+
+Number = Union[int, Decimal]
+
+
+class FenwickTree:
+    """A Fenwick (binary indexed) tree of prefix sums.
+
+    Values can be updated, and prefix sums found, in O(log n). Values can be
+    appended in O(log n) and removed from the end in O(1).
+    """
+
+    def __init__(self, values: Iterable[Number] = ()) -> None:
+        """Initialise the tree in O(n).
+
+        Args:
+            values (Iterable[Number], optional): The initial values. Defaults
+                to ().
+        """
+        self._tree: List[Number] = [0]  # The tree is indexed from one.
+        self._tree.extend(values)
+        size = len(self._tree)
+        for index in range(1, size):
+            parent = index + (index & -index)
+            if parent < size:
+                self._tree[parent] += self._tree[index]
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    @property
+    def total(self) -> Number:
+        """The sum of all the values."""
+        return self.prefix_sum(len(self))
+
+    def prefix_sum(self, count: int) -> Number:
+        """The sum of the first `count` values.
+
+        Args:
+            count (int): The number of values to sum.
+
+        Returns:
+            Number: The sum.
+        """
+        total: Number = 0
+        while count > 0:
+            total += self._tree[count]
+            count -= count & -count
+        return total
+
+    def add(self, index: int, delta: Number) -> None:
+        """Add to the value at an index.
+
+        Args:
+            index (int): The zero based index of the value.
+            delta (Number): The amount to add.
+        """
+        index += 1
+        size = len(self._tree)
+        while index < size:
+            self._tree[index] += delta
+            index += index & -index
+
+    def append(self, value: Number) -> None:
+        """Append a value.
+
+        Args:
+            value (Number): The value.
+        """
+        index = len(self._tree)
+        low = index - (index & -index)
+        self._tree.append(
+            value + self.prefix_sum(index - 1) - self.prefix_sum(low))
+
+    def pop(self) -> None:
+        """Remove the last value."""
+        # Nodes only cover values at or before their own index, so the
+        # remaining nodes are unaffected.
+        self._tree.pop()
+
+    def search(self, value: Number) -> int:
+        """Find the largest count for which the prefix sum does not exceed a
+        value.
+
+        The values must not be negative.
+
+        Args:
+            value (Number): The value.
+
+        Returns:
+            int: The number of values.
+        """
+        count = 0
+        size = len(self._tree)
+        step = 1 << size.bit_length()
+        while step:
+            index = count + step
+            if index < size and self._tree[index] <= value:
+                count = index
+                value -= self._tree[index]
+            step >>= 1
+        return count
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from decimal import Decimal
 from enum import Enum, auto
+from typing import Optional
 
 
 class Side(Enum):
@@ -21,6 +22,12 @@ class Style(Enum):
     FILL_OR_KILL = auto()
     IMMEDIATE_OR_CANCEL = auto()
     BOOK_OR_CANCEL = auto()
+    MARKET = auto()
+    ICEBERG = auto()
+    PRIMARY_PEG = auto()
+    MIDPOINT_PEG = auto()
+    TRAILING_STOP = auto()
+    STOP_LIMIT = auto()
 
 
 class Order:
@@ -32,25 +39,54 @@ class Order:
             side: Side,
             price: Decimal,
             size: int,
-            style: Style
+            style: Style,
+            *,
+            display_size: Optional[int] = None,
+            owner: Optional[str] = None,
+            expires: Optional[float] = None,
+            limit_price: Optional[Decimal] = None
     ) -> None:
         """Initialise aa order.
 
         The order_id is an ordinal integer which represents the order in which
         orders are placed.
 
+        An order with a display size (an iceberg order) shows at most that
+        size, holding the rest in reserve.
+
+        A stop limit order has a limit price as well as its stop price.
+
         Args:
             order_id (int): The order id.
             side (Side): Buy or sell.
             price (Decimal): The price.
             size (int): The order size.
             style (Style): The order style.
+            display_size (Optional[int], optional): The size to display.
+                Defaults to None.
+            owner (Optional[str], optional): The owner or session which placed
+                the order. Defaults to None.
+            expires (Optional[float], optional): The time at which the order
+                expires. Defaults to None.
+            limit_price (Optional[Decimal], optional): The price of the limit
+                order placed when a stop limit order triggers. Defaults to
+                None.
         """
         self._order_id = order_id
         self._side = side
         self._price = price
-        self.size = size  # The size is mutable.
         self._style = style
+        self._display_size = display_size
+        self._owner = owner
+        self._expires = expires
+        self._limit_price = limit_price
+        # The sizes are mutable.
+        if display_size is None:
+            self.size = size
+            self.reserve = 0
+        else:
+            self.size = min(size, display_size)
+            self.reserve = size - self.size
 
     @property
     def order_id(self) -> int:
@@ -88,6 +124,53 @@ class Order:
         """
         return self._style
 
+    @property
+    def display_size(self) -> Optional[int]:
+        """The size to display for an iceberg order.
+
+        Returns:
+            Optional[int]: The display size, or None if the whole order is
+                displayed.
+        """
+        return self._display_size
+
+    @property
+    def owner(self) -> Optional[str]:
+        """The owner or session which placed the order.
+
+        Returns:
+            Optional[str]: The owner, if any.
+        """
+        return self._owner
+
+    @property
+    def expires(self) -> Optional[float]:
+        """The time at which the order expires.
+
+        Returns:
+            Optional[float]: The expiry time, or None if the order does not
+                expire.
+        """
+        return self._expires
+
+    @property
+    def limit_price(self) -> Optional[Decimal]:
+        """The price of the limit order placed when a stop limit order
+        triggers.
+
+        Returns:
+            Optional[Decimal]: The limit price, or None if the order is not a
+                stop limit order.
+        """
+        return self._limit_price
+
+    def replenish(self) -> None:
+        """Replenish the displayed size from the reserve."""
+        assert self._display_size is not None, (
+            "only iceberg orders have a reserve")
+        self.size = min(self._display_size, self.reserve)
+        self.reserve -= self.size
+
     def __repr__(self) -> str:
         return f"Order({self._order_id}, {self._side}, {self._price}, {self.size})"
 
@@ -3,15 +3,20 @@
 from __future__ import annotations
 
 from decimal import Decimal
-from typing import List, Optional, Sequence, Tuple
+import time
+from typing import Callable, Collection, List, Optional, Sequence, Tuple
 
 from .abstract_types import AbstractOrderBook, PluginFactory
 from .aggregate_order import AggregateOrder
 from .aggregate_order_side import AggregateOrderSide
+from .allocation import Allocation
+from .auction import AuctionTieBreak
 from .constants import ALL_PLUGINS
+from .depth_arrays import DepthArrays
 from .fill import Fill
 from .order import Side, Style
 from .order_book_manager import OrderBookManager
+from .snapshot import BookSnapshot
 
 
 class OrderBook(AbstractOrderBook):
@@ -23,15 +28,22 @@ class OrderBook(AbstractOrderBook):
 
     def __init__(
             self,
-            plugins: Sequence[PluginFactory] = ALL_PLUGINS
+            plugins: Sequence[PluginFactory] = ALL_PLUGINS,
+            clock: Callable[[], float] = time.time,
+            allocation: Optional[Allocation] = None
     ) -> None:
         """Initialise the order book.
 
         Args:
             plugins (Sequence[PluginFactory], optional): Plugins to use to
                 handle order styles. Defaults to `ALL_PLUGINS`.
+            clock (Callable[[], float], optional): The clock used to expire
+                orders. Defaults to `time.time`.
+            allocation (Optional[Allocation], optional): The policy for
+                allocating an aggressor across a price level, or None for time
+                priority. Defaults to None.
         """
-        self._manager = OrderBookManager(plugins)
+        self._manager = OrderBookManager(plugins, clock, allocation)
 
     @property
     def bids(self) -> AggregateOrderSide:
@@ -55,21 +67,145 @@ class OrderBook(AbstractOrderBook):
     ) -> Tuple[Sequence[AggregateOrder], Sequence[AggregateOrder]]:
         return self._manager.depth(levels)
 
+    def depth_arrays(
+            self,
+            levels: Optional[int],
+            counts: bool = False,
+            cumulative: bool = False
+    ) -> Tuple[DepthArrays, DepthArrays]:
+        return self._manager.depth_arrays(levels, counts, cumulative)
+
     def add_order(
             self,
             side: Side,
-            price: Decimal,
+            price: Optional[Decimal],
+            size: int,
+            style: Style,
+            *,
+            display_size: Optional[int] = None,
+            owner: Optional[str] = None,
+            expires: Optional[float] = None,
+            limit_price: Optional[Decimal] = None
+    ) -> Tuple[Optional[int], List[Fill], List[int]]:
+        return self._manager.add_order(
+            side,
+            price,
+            size,
+            style,
+            display_size=display_size,
+            owner=owner,
+            expires=expires,
+            limit_price=limit_price
+        )
+
+    def what_if(
+            self,
+            side: Side,
+            price: Optional[Decimal],
             size: int,
-            style: Style
+            style: Style,
+            *,
+            display_size: Optional[int] = None,
+            owner: Optional[str] = None,
+            expires: Optional[float] = None,
+            limit_price: Optional[Decimal] = None
     ) -> Tuple[Optional[int], List[Fill], List[int]]:
-        return self._manager.add_order(side, price, size, style)
+        return self._manager.what_if(
+            side,
+            price,
+            size,
+            style,
+            display_size=display_size,
+            owner=owner,
+            expires=expires,
+            limit_price=limit_price
+        )
 
     def amend_order(self, order_id: int, size: int) -> None:
         self._manager.amend_order(order_id, size)
 
+    def replace_order(
+            self,
+            order_id: int,
+            price: Decimal,
+            size: int
+    ) -> Tuple[List[Fill], List[int]]:
+        return self._manager.replace_order(order_id, price, size)
+
     def cancel_order(self, order_id: int) -> None:
         self._manager.cancel_order(order_id)
 
+    @property
+    def in_auction(self) -> bool:
+        return self._manager.in_auction
+
+    def start_auction(self) -> None:
+        self._manager.start_auction()
+
+    def uncross(
+            self,
+            tie_break: AuctionTieBreak = AuctionTieBreak.HIGHEST,
+            reference: Optional[Decimal] = None
+    ) -> Tuple[Optional[Decimal], List[Fill], List[int]]:
+        return self._manager.uncross(tie_break, reference)
+
+    def expire(self) -> List[int]:
+        return self._manager.expire()
+
+    def expiring_order_count(self) -> int:
+        return self._manager.expiring_order_count()
+
+    def mass_cancel(
+            self,
+            owner: str,
+            side: Optional[Side] = None,
+            min_price: Optional[Decimal] = None,
+            max_price: Optional[Decimal] = None
+    ) -> List[int]:
+        return self._manager.mass_cancel(owner, side, min_price, max_price)
+
+    def mass_quote(
+            self,
+            owner: str,
+            bids: Sequence[Tuple[Decimal, int]],
+            offers: Sequence[Tuple[Decimal, int]]
+    ) -> Tuple[List[int], List[Fill], List[int]]:
+        return self._manager.mass_quote(owner, bids, offers)
+
+    def owner_order_ids(self, owner: str) -> List[int]:
+        return self._manager.owner_order_ids(owner)
+
+    def owners(self) -> Collection[str]:
+        return self._manager.owners()
+
+    def order_owner(self, order_id: int) -> Optional[str]:
+        return self._manager.order_owner(order_id)
+
+    def size_ahead(self, order_id: int) -> int:
+        return self._manager.size_ahead(order_id)
+
+    def queue_position(self, order_id: int) -> int:
+        return self._manager.queue_position(order_id)
+
+    def snapshot(self, levels: Optional[int] = None) -> BookSnapshot:
+        """Take an immutable snapshot of the price levels.
+
+        The snapshot must be taken between changes to the book, but can then
+        be read while the book changes. The cost is proportional to the
+        number of levels, and the records of unchanged levels are reused.
+
+        Args:
+            levels (Optional[int], optional): The market depth to take.
+                Defaults to None for all levels.
+
+        Returns:
+            BookSnapshot: The snapshot.
+        """
+        return BookSnapshot(
+            self._manager.bids.snapshot(levels),
+            self._manager.offers.snapshot(levels)
+        )
+
     def __eq__(self, other: object) -> bool:
         return (
             isinstance(other, OrderBook) and
@@ -2,8 +2,20 @@
 
 from __future__ import annotations
 
+from copy import copy
 from decimal import Decimal
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import (
+    Callable,
+    Collection,
+    Dict,
+    List,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union
+)
 
 from .abstract_types import (
     AbstractOrderBookManager,
@@ -11,19 +23,50 @@ from .abstract_types import (
 )
 from .aggregate_order import AggregateOrder
 from .aggregate_order_side import AggregateOrderSide
+from .allocation import Allocation
+from .auction import AuctionTieBreak, find_uncross
+from .depth_arrays import DepthArrays
 from .fill import Fill
 from .order import Order, Side, Style
+from .pegged_order_side import PeggedOrderSide
+from .timer_wheel import TimerWheel
+from .trailing_stops import TrailingStops
+from .utils import Overlay
+
+
+# The styles which can be placed during an auction.
+AUCTION_STYLES = (Style.LIMIT, Style.STOP, Style.ICEBERG, Style.STOP_LIMIT)
+
+# The pegged styles, in priority order at the same price.
+PEG_STYLES = (Style.PRIMARY_PEG, Style.MIDPOINT_PEG)
+
+# The side of an aggressor, the opposite side, and the allocation of the
+# aggressor across the best level of the opposite side.
+Allocated = Tuple[
+    AggregateOrderSide,
+    AggregateOrderSide,
+    List[Tuple[Order, int]]
+]
 
 
 class OrderBookManager(AbstractOrderBookManager):
     """An order book manager"""
 
-    def __init__(self, plugin_factories: Sequence[PluginFactory]) -> None:
+    def __init__(
+            self,
+            plugin_factories: Sequence[PluginFactory],
+            clock: Callable[[], float],
+            allocation: Optional[Allocation] = None
+    ) -> None:
         """Initialise the order book manager.
 
         Args:
             plugins (Sequence[PluginFactory]): Plugins used to managed order
                 styles.
+            clock (Callable[[], float]): The clock used to expire orders.
+            allocation (Optional[Allocation], optional): The policy for
+                allocating an aggressor across a price level, or None for time
+                priority. Defaults to None.
         """
         self._plugins = [
             factory() for factory in plugin_factories
@@ -36,9 +79,25 @@ class OrderBookManager(AbstractOrderBookManager):
         )
         self._supported_styles.add(Style.LIMIT)
         self._supported_styles.add(Style.STOP)
-
-        self._orders: Dict[int, Order] = {}
+        self._supported_styles.add(Style.MARKET)
+        self._supported_styles.add(Style.ICEBERG)
+        self._supported_styles.update(PEG_STYLES)
+        self._supported_styles.add(Style.TRAILING_STOP)
+        self._supported_styles.add(Style.STOP_LIMIT)
+
+        self._orders: MutableMapping[int, Order] = {}
+        self._owners: MutableMapping[str, Dict[int, Order]] = {}
+        # The owners of the orders placed by mass quotes, by order id.
+        self._quotes: MutableMapping[int, str] = {}
+        # The owners whose orders have been copied by a fork, or None if the
+        # manager is not a fork.
+        self._forked_owners: Optional[Set[str]] = None
         self._next_order_id = 1
+        self._clock = clock
+        # The expiry times of orders, or None if the manager is a fork.
+        self._timers: Optional[TimerWheel] = TimerWheel(clock())
+        self._auction = False
+        self._allocation = allocation
         self._limit_sides = {
             Side.BUY: AggregateOrderSide(False),
             Side.SELL: AggregateOrderSide(True)
@@ -47,12 +106,38 @@ class OrderBookManager(AbstractOrderBookManager):
             Side.BUY: AggregateOrderSide(True),
             Side.SELL: AggregateOrderSide(False)
         }
+        # The pegged orders are kept by offset from a reference price, which
+        # is fixed at the start of each event.
+        self._peg_sides = {
+            (style, side): PeggedOrderSide(side == Side.SELL)
+            for style in PEG_STYLES
+            for side in (Side.BUY, Side.SELL)
+        }
+        # The stop limit orders are kept by stop price, and become limit
+        # orders when they trigger.
+        self._stop_limit_sides = {
+            Side.BUY: AggregateOrderSide(True),
+            Side.SELL: AggregateOrderSide(False)
+        }
+        # The trailing stops become stop orders when they trigger.
+        self._trailing_stops = {
+            Side.BUY: TrailingStops(False),
+            Side.SELL: TrailingStops(True)
+        }
 
-    def _side(self, order: Order) -> AggregateOrderSide:
-        return (
-            self._limit_sides[order.side] if order.style != Style.STOP
-            else self._stop_sides[order.side]
-        )
+    def _side(
+            self,
+            order: Order
+    ) -> Union[AggregateOrderSide, TrailingStops]:
+        if order.style == Style.STOP:
+            return self._stop_sides[order.side]
+        if order.style == Style.TRAILING_STOP:
+            return self._trailing_stops[order.side]
+        if order.style == Style.STOP_LIMIT:
+            return self._stop_limit_sides[order.side]
+        if order.style in PEG_STYLES:
+            return self._peg_sides[(order.style, order.side)]
+        return self._limit_sides[order.side]
 
     @property
     def bids(self) -> AggregateOrderSide:
@@ -76,67 +161,526 @@ class OrderBookManager(AbstractOrderBookManager):
     ) -> Tuple[Sequence[AggregateOrder], Sequence[AggregateOrder]]:
         return self.bids.depth(levels), self.offers.depth(levels)
 
+    def depth_arrays(
+            self,
+            levels: Optional[int],
+            counts: bool = False,
+            cumulative: bool = False
+    ) -> Tuple[DepthArrays, DepthArrays]:
+        return (
+            self.bids.depth_arrays(levels, counts, cumulative),
+            self.offers.depth_arrays(levels, counts, cumulative)
+        )
+
     def add_order(
             self,
             side: Side,
-            price: Decimal,
+            price: Optional[Decimal],
             size: int,
-            style: Style
+            style: Style,
+            *,
+            display_size: Optional[int] = None,
+            owner: Optional[str] = None,
+            expires: Optional[float] = None,
+            limit_price: Optional[Decimal] = None
     ) -> Tuple[Optional[int], List[Fill], List[int]]:
-        if style not in self._supported_styles:
-            raise ValueError('unsupported style')
+        price = self._validate(
+            side,
+            price,
+            style,
+            display_size,
+            expires,
+            limit_price
+        )
+
+        self._update_references()
 
         order, cancels = self.create(
             side,
             price,
             size,
-            style
+            style,
+            display_size=display_size,
+            owner=owner,
+            expires=expires,
+            limit_price=limit_price
         )
 
         if order is None:
             return None, [], []
 
-        self._side(order).add_order(order)
+        if order.style == Style.MARKET:
+            # Market orders never rest, so they sweep the book directly.
+            fills, cancels = self._sweep(order, cancels)
+        else:
+            self._side(order).add_order(order)
 
-        # Try to match the new order with the book. The id of the order that
-        # instigated the changes is supplied. The match may generated fills and
-        # cancellations.
-        fills, cancels = self._match(order, cancels)
+            # Try to match the new order with the book. The id of the order
+            # that instigated the changes is supplied. The match may generated
+            # fills and cancellations.
+            fills, cancels = self._match(order, cancels)
 
         # Return the order id and any fills and cancels that were generated.
         return order.order_id, fills, list(map(lambda x: x.order_id, cancels))
 
+    def _validate(
+            self,
+            side: Side,
+            price: Optional[Decimal],
+            style: Style,
+            display_size: Optional[int],
+            expires: Optional[float],
+            limit_price: Optional[Decimal]
+    ) -> Decimal:
+        """Check an order against the rules for its style.
+
+        Raises:
+            ValueError: If the order is invalid.
+
+        Returns:
+            Decimal: The price, which is unbounded for a market order without
+            a protection price.
+        """
+        if style not in self._supported_styles:
+            raise ValueError('unsupported style')
+        if self._auction and style not in AUCTION_STYLES:
+            raise ValueError('unsupported style in an auction')
+        if (style == Style.ICEBERG) != (display_size is not None):
+            raise ValueError('only iceberg orders have a display size')
+        if (style == Style.STOP_LIMIT) != (limit_price is not None):
+            raise ValueError('only stop limit orders have a limit price')
+        if display_size is not None and display_size <= 0:
+            raise ValueError('display size must be greater than 0')
+        if price is None:
+            if style != Style.MARKET:
+                raise ValueError('only market orders can be without a price')
+            # Without a protection price a market order can be filled at any
+            # price.
+            price = (
+                Decimal('Infinity') if side == Side.BUY
+                else Decimal('-Infinity')
+            )
+        if (
+                style in PEG_STYLES and
+                (price > 0 if side == Side.BUY else price < 0)
+        ):
+            raise ValueError('pegged orders cannot improve on their reference')
+        if style == Style.TRAILING_STOP and price <= 0:
+            raise ValueError('trailing stops must have a positive offset')
+        if expires is not None and expires <= self._clock():
+            raise ValueError('order has already expired')
+        return price
+
+    def what_if(
+            self,
+            side: Side,
+            price: Optional[Decimal],
+            size: int,
+            style: Style,
+            *,
+            display_size: Optional[int] = None,
+            owner: Optional[str] = None,
+            expires: Optional[float] = None,
+            limit_price: Optional[Decimal] = None
+    ) -> Tuple[Optional[int], List[Fill], List[int]]:
+        return self.fork().add_order(
+            side,
+            price,
+            size,
+            style,
+            display_size=display_size,
+            owner=owner,
+            expires=expires,
+            limit_price=limit_price
+        )
+
+    def best_price(self, side: Side) -> Optional[Decimal]:
+        source = self._best_source(side)
+        return None if source is None else source[1]
+
+    def size_at_or_better(self, side: Side, price: Decimal) -> int:
+        limit_side = self._limit_sides[side]
+        size = (
+            limit_side.size_at_or_better(price) +
+            limit_side.reserve_at_or_better(price)
+        )
+        for style in PEG_STYLES:
+            peg_side = self._peg_sides[(style, side)]
+            if peg_side.is_active:
+                assert peg_side.reference is not None, "the side is active"
+                size += peg_side.size_at_or_better(price - peg_side.reference)
+        return size
+
+    def fork(self) -> OrderBookManager:
+        """Create a copy of the manager which shares the book.
+
+        The copy shares the price levels, orders and order lookup of this
+        manager, copying the parts it changes. This manager must not be
+        changed while the fork is in use. The fork does not expire orders.
+
+        Returns:
+            OrderBookManager: The fork.
+        """
+        manager = copy(self)
+        manager._plugins = [plugin.fork() for plugin in self._plugins]
+        manager._orders = Overlay(self._orders)
+        manager._owners = Overlay(self._owners)
+        manager._quotes = Overlay(self._quotes)
+        manager._forked_owners = set()
+        manager._timers = None
+        manager._limit_sides = {
+            side: order_side.fork()
+            for side, order_side in self._limit_sides.items()
+        }
+        manager._stop_sides = {
+            side: order_side.fork()
+            for side, order_side in self._stop_sides.items()
+        }
+        manager._peg_sides = {
+            key: order_side.fork()
+            for key, order_side in self._peg_sides.items()
+        }
+        manager._stop_limit_sides = {
+            side: order_side.fork()
+            for side, order_side in self._stop_limit_sides.items()
+        }
+        manager._trailing_stops = {
+            side: trailing_stops.fork()
+            for side, trailing_stops in self._trailing_stops.items()
+        }
+        return manager
+
     def amend_order(self, order_id: int, size: int) -> None:
         if size <= 0:
             raise ValueError("size must be greater than 0")
 
         order = self.find(order_id)
-        self._side(order).amend_order(order, size)
+        if order.display_size is not None:
+            # The size of an iceberg order includes its reserve.
+            display_size = min(size, order.display_size)
+            self._limit_sides[order.side].amend_order(
+                order,
+                display_size,
+                size - display_size
+            )
+        else:
+            self._side(order).amend_order(order, size)
+
+    def replace_order(
+            self,
+            order_id: int,
+            price: Decimal,
+            size: int
+    ) -> Tuple[List[Fill], List[int]]:
+        if size <= 0:
+            raise ValueError("size must be greater than 0")
+
+        order = self.find(order_id)
+        self._validate(
+            order.side,
+            price,
+            order.style,
+            order.display_size,
+            order.expires,
+            order.limit_price
+        )
+        total_size = order.size + order.reserve
+        if price == order.price and size <= total_size:
+            # A reduction in size keeps the time priority of the order.
+            if size < total_size:
+                self.amend_order(order_id, size)
+            return [], []
+
+        self._update_references()
+
+        # The order is moved to the back of the queue at its new price. The
+        # plugins see the old order deleted and the replacement created, and
+        # may reject the replacement, which leaves the order cancelled.
+        self._side(order).cancel_order(order)
+        quote_owner = self._quotes.get(order_id)
+        self.delete(order)
+        if not self._pre_create(order.side, price, order.style):
+            return [], [order_id]
+
+        replacement = Order(
+            order.order_id,
+            order.side,
+            price,
+            size,
+            order.style,
+            display_size=order.display_size,
+            owner=order.owner,
+            expires=order.expires,
+            limit_price=order.limit_price
+        )
+        if quote_owner is not None:
+            self._quotes[order_id] = quote_owner
+        cancels = self._register(replacement)
+        self._side(replacement).add_order(replacement)
+
+        fills, cancels = self._match(replacement, cancels)
+        return fills, [cancel.order_id for cancel in cancels]
 
     def cancel_order(self, order_id: int) -> None:
         order = self.find(order_id)
         self._side(order).cancel_order(order)
         self.delete(order)
 
+    def expire(self) -> List[int]:
+        if self._timers is None:
+            return []
+
+        order_ids = self._timers.advance(self._clock())
+        for order_id in order_ids:
+            self.cancel_order(order_id)
+        return order_ids
+
+    def expiring_order_count(self) -> int:
+        return 0 if self._timers is None else len(self._timers)
+
+    @property
+    def in_auction(self) -> bool:
+        return self._auction
+
+    def start_auction(self) -> None:
+        self._auction = True
+
+    def uncross(
+            self,
+            tie_break: AuctionTieBreak = AuctionTieBreak.HIGHEST,
+            reference: Optional[Decimal] = None
+    ) -> Tuple[Optional[Decimal], List[Fill], List[int]]:
+        if not self._auction:
+            raise ValueError('not in an auction')
+
+        uncross = find_uncross(
+            self.bids.depth_at_or_better(self.offers.best.price)
+            if self.offers else [],
+            self.offers.depth_at_or_better(self.bids.best.price)
+            if self.bids else [],
+            tie_break,
+            reference
+        )
+        self._auction = False
+
+        # Every order at or better than the price can trade, so the orders
+        # are filled in priority order until the volume is reached.
+        fills: List[Fill] = []
+        remaining = 0 if uncross is None else uncross.volume
+        while remaining:
+            assert uncross is not None
+            bid, offer = self.bids.best.first, self.offers.best.first
+            size = min(bid.size, offer.size, remaining)
+            fills.append(
+                Fill(bid.order_id, offer.order_id, uncross.price, size)
+            )
+            remaining -= size
+            for side in (self.bids, self.offers):
+                side.reduce_best(size)
+                if side.best.first.size == 0:
+                    self._complete_best(side)
+                if not side.best:
+                    side.delete_best()
+
+        # The stops triggered by the new prices are matched as usual, with the
+        # best order of each side as the aggressor.
+        self._update_references()
+        cancels: List[Order] = []
+        for side in (self.bids, self.offers):
+            if side:
+                stop_fills, cancels = self._match(side.best.first, cancels)
+                fills += stop_fills
+
+        return (
+            None if uncross is None else uncross.price,
+            fills,
+            [order.order_id for order in cancels]
+        )
+
+    def mass_cancel(
+            self,
+            owner: str,
+            side: Optional[Side] = None,
+            min_price: Optional[Decimal] = None,
+            max_price: Optional[Decimal] = None
+    ) -> List[int]:
+        orders = self._owners.get(owner)
+        if not orders:
+            return []
+
+        cancels = [
+            order
+            for order in orders.values()
+            if (
+                (side is None or order.side == side) and
+                (min_price is None or order.price >= min_price) and
+                (max_price is None or order.price <= max_price)
+            )
+        ]
+        for order in cancels:
+            self._side(order).cancel_order(order)
+            self.delete(order)
+
+        return [order.order_id for order in cancels]
+
+    def mass_quote(
+            self,
+            owner: str,
+            bids: Sequence[Tuple[Decimal, int]],
+            offers: Sequence[Tuple[Decimal, int]]
+    ) -> Tuple[List[int], List[Fill], List[int]]:
+        for quotes in (bids, offers):
+            if len(set(price for price, _ in quotes)) != len(quotes):
+                raise ValueError("quotes must have distinct prices")
+            if any(size <= 0 for _, size in quotes):
+                raise ValueError("size must be greater than 0")
+        if (
+                bids and
+                offers and
+                max(price for price, _ in bids) >=
+                min(price for price, _ in offers)
+        ):
+            raise ValueError("quotes must not cross")
+
+        self._update_references()
+
+        # Find the existing quotes, leaving the other orders of the owner.
+        existing: Dict[Tuple[Side, Decimal], Order] = {}
+        cancels: List[Order] = []
+        for order in self._owners.get(owner, {}).values():
+            key = (order.side, order.price)
+            if order.order_id not in self._quotes:
+                continue
+            if key in existing:
+                cancels.append(order)
+            else:
+                existing[key] = order
+
+        # Decide which quotes are kept, amended or replaced.
+        kept: Dict[Tuple[Side, Decimal], Order] = {}
+        amends: List[Tuple[Order, int]] = []
+        creates: List[Tuple[Side, Decimal, int]] = []
+        for side, quotes in ((Side.BUY, bids), (Side.SELL, offers)):
+            for price, size in quotes:
+                order = existing.pop((side, price), None)
+                if order is not None and size <= order.size:
+                    # An unchanged or reduced quote keeps its priority.
+                    kept[(side, price)] = order
+                    if size != order.size:
+                        amends.append((order, size))
+                else:
+                    if order is not None:
+                        cancels.append(order)
+                    creates.append((side, price, size))
+        cancels += existing.values()
+
+        for order in cancels:
+            self._side(order).cancel_order(order)
+            self.delete(order)
+        for order, size in amends:
+            self._side(order).amend_order(order, size)
+
+        # The new quotes are all placed, then matched together.
+        created: List[Order] = []
+        for side, price, size in creates:
+            order, create_cancels = self.create(
+                side,
+                price,
+                size,
+                Style.LIMIT,
+                owner=owner
+            )
+            assert order is not None, "limit orders are always created"
+            cancels += create_cancels
+            self._quotes[order.order_id] = owner
+            self._side(order).add_order(order)
+            kept[(side, price)] = order
+            created.append(order)
+
+        fills: List[Fill] = []
+        if created:
+            aggressor = self._quote_aggressor(created)
+            fills, cancels = self._match(aggressor, cancels)
+
+        order_ids = [
+            kept[(side, price)].order_id
+            for side, quotes in ((Side.BUY, bids), (Side.SELL, offers))
+            for price, _ in quotes
+        ]
+        return order_ids, fills, [order.order_id for order in cancels]
+
+    def owner_order_ids(self, owner: str) -> List[int]:
+        return list(self._owners.get(owner, ()))
+
+    def owners(self) -> Collection[str]:
+        return self._owners.keys()
+
+    def order_owner(self, order_id: int) -> Optional[str]:
+        return self.find(order_id).owner
+
+    def size_ahead(self, order_id: int) -> int:
+        order = self.find(order_id)
+        return self._queue(order).size_ahead(order)
+
+    def queue_position(self, order_id: int) -> int:
+        order = self.find(order_id)
+        return self._queue(order).queue_position(order)
+
+    def _queue(self, order: Order) -> AggregateOrderSide:
+        side = self._side(order)
+        if not isinstance(side, AggregateOrderSide):
+            raise ValueError('trailing stops are not queued at a price')
+        return side
+
     def create(
             self,
             side: Side,
             price: Decimal,
             size: int,
-            style: Style
+            style: Style,
+            *,
+            display_size: Optional[int] = None,
+            owner: Optional[str] = None,
+            expires: Optional[float] = None,
+            limit_price: Optional[Decimal] = None
     ) -> Tuple[Optional[Order], List[Order]]:
         if not self._pre_create(side, price, style):
             return None, []
 
-        order = Order(self._next_order_id, side, price, size, style)
-        self._orders[order.order_id] = order
+        order = Order(
+            self._next_order_id,
+            side,
+            price,
+            size,
+            style,
+            display_size=display_size,
+            owner=owner,
+            expires=expires,
+            limit_price=limit_price
+        )
         self._next_order_id += 1
+        return order, self._register(order)
+
+    def _register(self, order: Order) -> List[Order]:
+        """Add an order to the lookups and tell the plugins it was created.
+
+        Args:
+            order (Order): The order.
+
+        Returns:
+            List[Order]: The orders cancelled by the plugins.
+        """
+        self._orders[order.order_id] = order
+        if order.owner is not None:
+            self._owner_orders(order.owner)[order.order_id] = order
+        if order.expires is not None and self._timers is not None:
+            self._timers.schedule(order.order_id, order.expires)
 
         cancels = self._post_create(order)
         for cancel in cancels:
             self.cancel_order(cancel.order_id)
 
-        return order, cancels
+        return cancels
 
     def _pre_create(self, side: Side, price: Decimal, style: Style) -> bool:
         for plugin in self._plugins:
@@ -158,12 +702,55 @@ class OrderBookManager(AbstractOrderBookManager):
 
     def delete(self, order: Order) -> None:
         del self._orders[order.order_id]
+        if order.order_id in self._quotes:
+            del self._quotes[order.order_id]
+        if order.owner is not None:
+            orders = self._owner_orders(order.owner)
+            del orders[order.order_id]
+            if not orders:
+                del self._owners[order.owner]
+        if (
+                order.expires is not None and
+                self._timers is not None and
+                order.order_id in self._timers
+        ):
+            # The timer has already gone if the order is being expired.
+            self._timers.cancel(order.order_id)
         self._post_delete(order)
 
+    def _owner_orders(self, owner: str) -> Dict[int, Order]:
+        orders = self._owners.get(owner)
+        if orders is None:
+            orders = self._owners[owner] = {}
+        elif (
+                self._forked_owners is not None and
+                owner not in self._forked_owners
+        ):
+            # A fork copies the orders of an owner before changing them.
+            orders = self._owners[owner] = dict(orders)
+        if self._forked_owners is not None:
+            self._forked_owners.add(owner)
+        return orders
+
     def _post_delete(self, order: Order) -> None:
         for plugin in self._plugins:
             plugin.post_delete(self, order)
 
+    def _quote_aggressor(self, quotes: List[Order]) -> Order:
+        # The quotes do not cross each other, so at most the quotes of one
+        # side cross the book; the best of them is the aggressor.
+        bids = [order for order in quotes if order.side == Side.BUY]
+        offers = [order for order in quotes if order.side == Side.SELL]
+        if bids:
+            best_bid = max(bids, key=lambda order: order.price)
+            if self.offers and best_bid.price >= self.offers.best.price:
+                return best_bid
+        if offers:
+            best_offer = min(offers, key=lambda order: order.price)
+            if self.bids and best_offer.price <= self.bids.best.price:
+                return best_offer
+        return quotes[-1]
+
     def _match(
             self,
             aggressor: Order,
@@ -179,28 +766,51 @@ class OrderBookManager(AbstractOrderBookManager):
             Tuple[List[Order], List[Order]: The fills and cancels.
         """
         fills: List[Fill] = []
-        while self._can_match:
-            bids, offers = self._fillable_sides(aggressor)
+
+        if self._auction:
+            # Orders accumulate without matching until the auction uncrosses.
+            return fills, cancels
+
+        # Check if any orders require cancellation before matching.
+        for order in self._pre_match(aggressor):
+            cancels.append(order)
+            self._side(order).cancel_order(order)
+            self.delete(order)
+
+        while True:
+            self._trigger_trailing_stops()
+            self._trigger_stop_limits()
+            if not self._can_match:
+                break
+
+            sides = self._fillable_sides(aggressor)
+            if sides is None:
+                # A stop has been triggered, but there is nothing it can be
+                # filled against.
+                break
+            bids, offers = sides
 
             while bids.best and offers.best:
 
                 # Check if any orders require cancellation.
-                cancel_orders = self._pre_fill(bids, offers, aggressor)
+                allocated = self._allocate(bids, offers, aggressor)
+                cancel_orders = self._pre_fill(
+                    bids, offers, aggressor, allocated)
                 if cancel_orders:
                     for order in cancel_orders:
                         cancels.append(order)
                         self._side(order).cancel_order(order)
+                        self.delete(order)
                     break
 
-                fills.append(
-                    self._fill_best(bids, offers, aggressor)
-                )
+                fills += self._fill(bids, offers, aggressor, allocated)
 
             # Check if any orders require cancellation.
             cancel_orders = self._post_match()
             for order in cancel_orders:
                 cancels.append(order)
                 self._side(order).cancel_order(order)
+                self.delete(order)
 
             # if all orders have been executed at this price level remove the
             # price level.
@@ -212,9 +822,206 @@ class OrderBookManager(AbstractOrderBookManager):
                 self.stop_bids.delete_best()
             if self.stop_offers and not self.stop_offers.best:
                 self.stop_offers.delete_best()
+            for peg_side in self._peg_sides.values():
+                if peg_side and not peg_side.best:
+                    peg_side.delete_best()
 
         return fills, cancels
 
+    def _sweep(
+            self,
+            aggressor: Order,
+            cancels: List[Order]
+    ) -> Tuple[List[Fill], List[Order]]:
+        """Sweep the opposite side of the book with a market order.
+
+        The market order is held in a transient side of its own, so the
+        plugins see the usual pair of sides, while the book's own side is left
+        untouched. Any unfilled size is cancelled.
+
+        Args:
+            aggressor (Order): The market order.
+            cancels (List[Order]): A list of already cancelled orders.
+
+        Returns:
+            Tuple[List[Order], List[Order]: The fills and cancels.
+        """
+        own = AggregateOrderSide(aggressor.side == Side.SELL)
+        own.add_order(aggressor)
+        opposite_side = Side.SELL if aggressor.side == Side.BUY else Side.BUY
+
+        fills: List[Fill] = []
+        while own and own.best:
+            source = self._best_source(opposite_side)
+            if source is None:
+                break
+            opposite, price = source
+            if aggressor.side == Side.BUY:
+                if price > aggressor.price:
+                    break
+                bids, offers = own, opposite
+            else:
+                if price < aggressor.price:
+                    break
+                bids, offers = opposite, own
+
+            # Check if any orders require cancellation.
+            allocated = self._allocate(bids, offers, aggressor)
+            cancel_orders = self._pre_fill(bids, offers, aggressor, allocated)
+            if cancel_orders:
+                for order in cancel_orders:
+                    cancels.append(order)
+                    if order is aggressor:
+                        own.cancel_order(order)
+                    else:
+                        self._side(order).cancel_order(order)
+                    self.delete(order)
+                continue
+
+            fills += self._fill(bids, offers, aggressor, allocated)
+            if not opposite.best:
+                opposite.delete_best()
+
+        if own and own.best:
+            cancels.append(aggressor)
+            self.delete(aggressor)
+
+        # Check if any orders require cancellation.
+        for order in self._post_match():
+            cancels.append(order)
+            self._side(order).cancel_order(order)
+            self.delete(order)
+
+        # The sweep may have triggered stops.
+        stop_fills, cancels = self._match(aggressor, cancels)
+        fills += stop_fills
+
+        return fills, cancels
+
+    def _update_references(self) -> None:
+        best_bid = self.bids.best.price if self.bids else None
+        best_offer = self.offers.best.price if self.offers else None
+        self._peg_sides[(Style.PRIMARY_PEG, Side.BUY)].reference = best_bid
+        self._peg_sides[(Style.PRIMARY_PEG, Side.SELL)].reference = best_offer
+        midpoint = (
+            (best_bid + best_offer) / 2
+            if best_bid is not None and best_offer is not None
+            else None
+        )
+        self._peg_sides[(Style.MIDPOINT_PEG, Side.BUY)].reference = midpoint
+        self._peg_sides[(Style.MIDPOINT_PEG, Side.SELL)].reference = midpoint
+
+    def _trigger_trailing_stops(self) -> None:
+        """Track the best prices with the trailing stops, replacing those
+        which trigger with stop orders.
+
+        A sell stop trails the best bid, and a buy stop the best offer.
+        """
+        for side, trailing_stops in self._trailing_stops.items():
+            if not trailing_stops:
+                continue
+            opposite = self.bids if side == Side.SELL else self.offers
+            price = opposite.best.price if opposite else None
+            for order, stop_price in trailing_stops.update(price):
+                stop = self._convert(order, stop_price, Style.STOP)
+                self._stop_sides[side].add_order(stop)
+
+    def _trigger_stop_limits(self) -> None:
+        """Move the triggered stop limit orders into the limit orders.
+
+        A sell stop triggers when the best bid falls to its stop price, and a
+        buy stop when the best offer rises to it. All the stops triggered by
+        a price are moved in one batch, in the order in which they trigger.
+        """
+        for side, stop_side in self._stop_limit_sides.items():
+            if not stop_side:
+                continue
+            opposite = self.bids if side == Side.SELL else self.offers
+            if not opposite:
+                continue
+            levels = stop_side.take_at_or_better(opposite.best.price)
+            if not levels:
+                continue
+            orders: List[Order] = []
+            for level in levels:
+                for order in level.orders:
+                    assert order.limit_price is not None, (
+                        "a stop limit order has a limit price")
+                    orders.append(
+                        self._convert(order, order.limit_price, Style.LIMIT)
+                    )
+            self._limit_sides[side].add_orders(orders)
+
+    def _convert(self, order: Order, price: Decimal, style: Style) -> Order:
+        """Replace a triggered order with an order of another style.
+
+        Args:
+            order (Order): The triggered order.
+            price (Decimal): The price of the replacement.
+            style (Style): The style of the replacement.
+
+        Returns:
+            Order: The replacement, with the same order id.
+        """
+        replacement = Order(
+            order.order_id,
+            order.side,
+            price,
+            order.size,
+            style,
+            owner=order.owner,
+            expires=order.expires
+        )
+        self._orders[order.order_id] = replacement
+        if order.owner is not None:
+            self._owner_orders(order.owner)[order.order_id] = replacement
+        return replacement
+
+    def _best_source(
+            self,
+            side: Side
+    ) -> Optional[Tuple[AggregateOrderSide, Decimal]]:
+        """Find the best of the limit and pegged orders for a side.
+
+        At the same price limit orders come first, then primary pegs, then
+        midpoint pegs.
+
+        Args:
+            side (Side): The side.
+
+        Returns:
+            Optional[Tuple[AggregateOrderSide, Decimal]]: The side holding the
+            best orders and their price, or None if there are no orders.
+        """
+        limit_side = self._limit_sides[side]
+        source = (limit_side, limit_side.best.price) if limit_side else None
+        for style in PEG_STYLES:
+            peg_side = self._peg_sides[(style, side)]
+            if not peg_side.is_active:
+                continue
+            price = peg_side.best_price
+            if (
+                    source is None or
+                    (
+                        price > source[1] if side == Side.BUY
+                        else price < source[1]
+                    )
+            ):
+                source = peg_side, price
+        return source
+
+    def _has_pegs(self) -> bool:
+        return any(self._peg_sides.values())
+
+    def _crossed_sources(
+            self
+    ) -> Optional[Tuple[AggregateOrderSide, AggregateOrderSide]]:
+        bid = self._best_source(Side.BUY)
+        offer = self._best_source(Side.SELL)
+        if bid is not None and offer is not None and bid[1] >= offer[1]:
+            return bid[0], offer[0]
+        return None
+
     @property
     def _can_match(self) -> bool:
         if (
@@ -224,6 +1031,9 @@ class OrderBookManager(AbstractOrderBookManager):
         ):
             return True
 
+        if self._has_pegs() and self._crossed_sources() is not None:
+            return True
+
         # Sell stop
         # The buy price drops to at or below the sell stop
         if (
@@ -244,6 +1054,94 @@ class OrderBookManager(AbstractOrderBookManager):
 
         return False
 
+    def _allocate(
+            self,
+            bids: AggregateOrderSide,
+            offers: AggregateOrderSide,
+            aggressor: Order
+    ) -> Optional[Allocated]:
+        """Allocate the aggressor across the whole of the opposite level.
+
+        Args:
+            bids (AggregateOrderSide): The bids.
+            offers (AggregateOrderSide): The offers.
+            aggressor (Order): The order that instigated the match.
+
+        Returns:
+            Optional[Allocated]: The side of the aggressor, the opposite side
+            and the allocation, or None if the orders are matched in time
+            priority.
+        """
+        if (
+                self._allocation is None or
+                isinstance(bids, PeggedOrderSide) or
+                isinstance(offers, PeggedOrderSide)
+        ):
+            return None
+
+        if bids.best.first.order_id == aggressor.order_id:
+            own, resting = bids, offers
+        elif offers.best.first.order_id == aggressor.order_id:
+            own, resting = offers, bids
+        else:
+            # Orders crossed by a triggered stop are matched in time priority.
+            return None
+
+        level = resting.best
+        allocations = self._allocation.allocate(
+            level.orders,
+            min(own.best.first.size, level.size)
+        )
+        return own, resting, allocations
+
+    def _fill(
+            self,
+            bids: AggregateOrderSide,
+            offers: AggregateOrderSide,
+            aggressor: Order,
+            allocated: Optional[Allocated]
+    ) -> List[Fill]:
+        if allocated is None:
+            return [self._fill_best(bids, offers, aggressor)]
+        return self._fill_level(*allocated, aggressor)
+
+    def _fill_level(
+            self,
+            own: AggregateOrderSide,
+            resting: AggregateOrderSide,
+            allocations: List[Tuple[Order, int]],
+            aggressor: Order
+    ) -> List[Fill]:
+        order = own.best.first
+        level = resting.best
+        # A market order is filled at the price of the resting orders.
+        fill_price = (
+            level.price if aggressor.style == Style.MARKET
+            else order.price
+        )
+
+        fills = [
+            Fill(order.order_id, resting_order.order_id, fill_price, size)
+            if order.side == Side.BUY
+            else Fill(resting_order.order_id, order.order_id, fill_price, size)
+            for resting_order, size in allocations
+        ]
+
+        resting.reduce_best_orders(allocations)
+        for resting_order, _ in allocations:
+            if resting_order.size == 0:
+                if resting_order.reserve:
+                    resting.replenish_best(resting_order.order_id)
+                else:
+                    self.delete(resting_order)
+                    level.cancel(resting_order.order_id)
+
+        own.reduce_best(sum(size for _, size in allocations))
+        if own.best.first.size == 0:
+            self._complete_best(own)
+
+        return fills
+
     def _fill_best(
             self,
             bids: AggregateOrderSide,
@@ -253,19 +1151,30 @@ class OrderBookManager(AbstractOrderBookManager):
         # The price is that of the newest order in case of a cross;
         # where the newest order price exceeds (rather than matched)
         # the best opposing price.
-        fill_size = min(
-            bids.best.first.size,
-            offers.best.first.size
-        )
-        fill_price = (
-            bids.best.first.price
-            if bids.best.first.order_id == aggressor.order_id
-            else offers.best.first.price
-        )
+        bid, offer = bids.best.first, offers.best.first
+        fill_size = min(bid.size, offer.size)
+        # A pegged order is filled at its pegged price, and a market order at
+        # the price of the resting order.
+        if isinstance(offers, PeggedOrderSide):
+            fill_price = offers.best_price
+        elif isinstance(bids, PeggedOrderSide):
+            fill_price = bids.best_price
+        elif bid.order_id == aggressor.order_id:
+            fill_price = (
+                offer.price if aggressor.style == Style.MARKET
+                else bid.price
+            )
+        elif (
+                offer.order_id == aggressor.order_id and
+                aggressor.style == Style.MARKET
+        ):
+            fill_price = bid.price
+        else:
+            fill_price = offer.price
 
         fill = Fill(
-            bids.best.first.order_id,
-            offers.best.first.order_id,
+            bid.order_id,
+            offer.order_id,
             fill_price,
             fill_size
         )
@@ -274,19 +1183,30 @@ class OrderBookManager(AbstractOrderBookManager):
         # orders have been completely executed; if they have, delete
         # them.
 
-        bids.best.first.size -= fill_size
+        bids.reduce_best(fill_size)
         if bids.best.first.size == 0:
-            self.delete(bids.best.first)
-            bids.best.delete_first()
+            self._complete_best(bids)
 
-        offers.best.first.size -= fill_size
+        offers.reduce_best(fill_size)
         if offers.best.first.size == 0:
-            self.delete(offers.best.first)
-            offers.best.delete_first()
+            self._complete_best(offers)
 
         return fill
 
-    def _fillable_sides(self, aggressor: Order) -> Tuple[AggregateOrderSide, AggregateOrderSide]:
+    def _complete_best(self, side: AggregateOrderSide) -> None:
+        order = side.best.first
+        if order.reserve:
+            # Refresh an iceberg order from its reserve. It stays at the same
+            # level, so no search of the side is required.
+            side.replenish_best()
+        else:
+            self.delete(order)
+            side.best.delete_first()
+
+    def _fillable_sides(
+            self,
+            aggressor: Order
+    ) -> Optional[Tuple[AggregateOrderSide, AggregateOrderSide]]:
         if (
             aggressor.side == Side.SELL and
             self.stop_bids and
@@ -305,20 +1225,49 @@ class OrderBookManager(AbstractOrderBookManager):
         ):
             return self.bids, self.stop_offers
 
-        return self.bids, self.offers
+        if self._has_pegs():
+            return self._crossed_sources()
+
+        if (
+            self.bids and
+            self.offers and
+            self.bids.best.price >= self.offers.best.price
+        ):
+            return self.bids, self.offers
+
+        return None
+
+    def _pre_match(self, aggressor: Order) -> List[Order]:
+        cancels: List[Order] = []
+
+        for plugin in self._plugins:
+            cancels += plugin.pre_match(self, aggressor)
+
+        return cancels
 
     def _pre_fill(
             self,
             bids: AggregateOrderSide,
             offers: AggregateOrderSide,
-            aggressor: Order
+            aggressor: Order,
+            allocated: Optional[Allocated]
     ) -> List[Order]:
-        cancels: List[Order] = []
-
+        # The fill is abandoned by the first plugin to cancel orders, so the
+        # same order is never cancelled twice.
         for plugin in self._plugins:
-            cancels += plugin.pre_fill(self, bids, offers, aggressor)
-
-        return cancels
+            cancels = plugin.pre_fill(self, bids, offers, aggressor)
+            if cancels:
+                return cancels
+
+        if allocated is not None:
+            # The plugins see every order the allocation fills, not just the
+            # first at the level.
+            for plugin in self._plugins:
+                cancels = plugin.pre_allocate(self, *allocated, aggressor)
+                if cancels:
+                    return cancels
+
+        return []
 
     def _post_match(self) -> List[Order]:
         cancels: List[Order] = []
@@ -0,0 +1,272 @@
+"""Binary order entry.
+
+Order entry messages are fixed size, little endian records, each starting
+with a one byte message type, in the style of the market data encoding.
+Messages are decoded in batches directly from a receive buffer and
+dispatched to an exchange order book, with only the arguments of the call
+created for each message.
+
+The orders of a session are placed with the owner of the session, so the
+owner is not sent with each message. A session can only amend or cancel the
+orders of its owner.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from enum import IntEnum
+import struct
+from typing import Any, List, Optional, Tuple, Union
+
+from .encoding import SIDE_CODES, SIDES, decode_price, encode_price
+from .exchange_order_book import ExchangeOrderBook
+from .order import Side, Style
+
+# The exponent of a price which is absent, as for a market order without a
+# protection price.
+NO_PRICE_EXPONENT = -128
+# The side code of a mass cancel for both sides.
+BOTH_SIDES = 255
+
+STYLES = {style.value: style for style in Style}
+
+
+class MessageType(IntEnum):
+    """The type of an order entry message"""
+
+    NEW_ORDER = 1
+    AMEND_ORDER = 2
+    CANCEL_ORDER = 3
+    MASS_CANCEL = 4
+
+
+# The instrument id, side, style, price mantissa and exponent, size, display
+# size (zero for none), limit price mantissa and exponent, and expiry time
+# (zero for none).
+NEW_ORDER_MESSAGE = struct.Struct('<BIBBqbqqqbd')
+# The instrument id, order id and size.
+AMEND_ORDER_MESSAGE = struct.Struct('<BIqq')
+# The instrument id and order id.
+CANCEL_ORDER_MESSAGE = struct.Struct('<BIq')
+# The side.
+MASS_CANCEL_MESSAGE = struct.Struct('<BB')
+
+MESSAGES = {
+    MessageType.NEW_ORDER: NEW_ORDER_MESSAGE,
+    MessageType.AMEND_ORDER: AMEND_ORDER_MESSAGE,
+    MessageType.CANCEL_ORDER: CANCEL_ORDER_MESSAGE,
+    MessageType.MASS_CANCEL: MASS_CANCEL_MESSAGE,
+}
+
+
+def encode_new_order(
+        instrument_id: int,
+        side: Side,
+        price: Optional[Decimal],
+        size: int,
+        style: Style,
+        display_size: Optional[int] = None,
+        limit_price: Optional[Decimal] = None,
+        expires: Optional[float] = None
+) -> bytes:
+    """Encode a new order message.
+
+    Args:
+        instrument_id (int): The instrument id.
+        side (Side): The side.
+        price (Optional[Decimal]): The price, or None for a market order
+            without a protection price.
+        size (int): The size.
+        style (Style): The style.
+        display_size (Optional[int], optional): The display size of an
+            iceberg order. Defaults to None.
+        limit_price (Optional[Decimal], optional): The price of the limit
+            order placed when a stop limit order triggers. Defaults to None.
+        expires (Optional[float], optional): The time at which the order
+            expires. Defaults to None.
+
+    Returns:
+        bytes: The message.
+    """
+    return NEW_ORDER_MESSAGE.pack(
+        MessageType.NEW_ORDER,
+        instrument_id,
+        SIDE_CODES[side],
+        style.value,
+        *_encode_optional_price(price),
+        size,
+        display_size or 0,
+        *_encode_optional_price(limit_price),
+        expires or 0.0
+    )
+
+
+def _encode_optional_price(price: Optional[Decimal]) -> Tuple[int, int]:
+    return (0, NO_PRICE_EXPONENT) if price is None else encode_price(price)
+
+
+def _decode_optional_price(mantissa: int, exponent: int) -> Optional[Decimal]:
+    return (
+        None if exponent == NO_PRICE_EXPONENT
+        else decode_price(mantissa, exponent)
+    )
+
+
+def encode_amend_order(instrument_id: int, order_id: int, size: int) -> bytes:
+    """Encode an amend order message.
+
+    Args:
+        instrument_id (int): The instrument id.
+        order_id (int): The order id.
+        size (int): The new size.
+
+    Returns:
+        bytes: The message.
+    """
+    return AMEND_ORDER_MESSAGE.pack(
+        MessageType.AMEND_ORDER,
+        instrument_id,
+        order_id,
+        size
+    )
+
+
+def encode_cancel_order(instrument_id: int, order_id: int) -> bytes:
+    """Encode a cancel order message.
+
+    Args:
+        instrument_id (int): The instrument id.
+        order_id (int): The order id.
+
+    Returns:
+        bytes: The message.
+    """
+    return CANCEL_ORDER_MESSAGE.pack(
+        MessageType.CANCEL_ORDER,
+        instrument_id,
+        order_id
+    )
+
+
+def encode_mass_cancel(side: Optional[Side] = None) -> bytes:
+    """Encode a mass cancel message for the orders of the session.
+
+    Args:
+        side (Optional[Side], optional): If given only cancel orders for this
+            side. Defaults to None.
+
+    Returns:
+        bytes: The message.
+    """
+    return MASS_CANCEL_MESSAGE.pack(
+        MessageType.MASS_CANCEL,
+        BOTH_SIDES if side is None else SIDE_CODES[side]
+    )
+
+
+class OrderEntrySession:
+    """Decode the order entry messages of a session into an exchange."""
+
+    def __init__(
+            self,
+            exchange: ExchangeOrderBook,
+            owner: Optional[str] = None
+    ) -> None:
+        """Initialise the session.
+
+        Args:
+            exchange (ExchangeOrderBook): The exchange.
+            owner (Optional[str], optional): The owner of the orders placed
+                by the session, which is required for a mass cancel. Defaults
+                to None.
+        """
+        self._exchange = exchange
+        self._tickers = exchange.tickers
+        self._owner = owner
+
+    def process(
+            self,
+            buffer: Union[bytes, bytearray, memoryview]
+    ) -> Tuple[List[Any], int]:
+        """Process the whole messages in a buffer.
+
+        A message which the exchange rejects gives the exception it raised as
+        its result, and does not stop the batch. A trailing partial message
+        is left for the next call. A message with an unknown type ends the
+        batch, so the results of the messages before it are returned, and is
+        raised when it starts a batch.
+
+        Args:
+            buffer (Union[bytes, bytearray, memoryview]): The receive buffer.
+
+        Raises:
+            ValueError: If the first message has an unknown type.
+
+        Returns:
+            Tuple[List[Any], int]: The result of each message, as returned by
+            the exchange, and the number of bytes consumed.
+        """
+        view = memoryview(buffer)
+        offset, end = 0, len(view)
+        results: List[Any] = []
+        while offset < end:
+            message_type = view[offset]
+            message = MESSAGES.get(message_type)  # type: ignore
+            if message is None:
+                if offset == 0:
+                    raise ValueError('unknown message type')
+                break
+            if offset + message.size > end:
+                break
+            values = message.unpack_from(view, offset)
+            offset += message.size
+            try:
+                results.append(self._dispatch(message_type, values))
+            except (KeyError, ValueError, IndexError) as error:
+                results.append(error)
+        return results, offset
+
+    def _dispatch(self, message_type: int, values: tuple) -> Any:
+        if message_type == MessageType.NEW_ORDER:
+            (
+                _, instrument_id, side, style, mantissa, exponent, size,
+                display_size, limit_mantissa, limit_exponent, expires
+            ) = values
+            return self._exchange.add_order(
+                self._tickers[instrument_id],
+                SIDES[side],
+                _decode_optional_price(mantissa, exponent),
+                size,
+                STYLES[style],
+                display_size=display_size or None,
+                owner=self._owner,
+                expires=expires or None,
+                limit_price=_decode_optional_price(
+                    limit_mantissa,
+                    limit_exponent
+                )
+            )
+
+        if message_type == MessageType.AMEND_ORDER:
+            _, instrument_id, order_id, size = values
+            ticker = self._tickers[instrument_id]
+            self._check_owner(ticker, order_id)
+            return self._exchange.amend_order(ticker, order_id, size)
+
+        if message_type == MessageType.CANCEL_ORDER:
+            _, instrument_id, order_id = values
+            ticker = self._tickers[instrument_id]
+            self._check_owner(ticker, order_id)
+            return self._exchange.cancel_order(ticker, order_id)
+
+        _, side = values
+        if self._owner is None:
+            raise ValueError('a mass cancel requires an owner')
+        return self._exchange.mass_cancel(
+            self._owner,
+            None if side == BOTH_SIDES else SIDES[side]
+        )
+
+    def _check_owner(self, ticker: str, order_id: int) -> None:
+        if self._exchange.order_owner(ticker, order_id) != self._owner:
+            raise ValueError('the order belongs to another owner')
@@ -0,0 +1,44 @@
+"""Pegged order side"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Optional
+
+from .aggregate_order_side import AggregateOrderSide
+
+
+class PeggedOrderSide(AggregateOrderSide):
+    """The pegged orders for a side.
+
+    The price of a pegged order is its offset from a reference price, so the
+    levels are kept by offset. As every level moves with the reference, their
+    order never changes, and a change to the reference costs nothing
+    regardless of the number of pegged orders.
+
+    The orders are inactive while there is no reference price.
+    """
+
+    def __init__(self, low_is_best: bool) -> None:
+        """Initialise a pegged order side.
+
+        Args:
+            low_is_best (bool): True if the lowest offset is the best.
+        """
+        super().__init__(low_is_best)
+        self.reference: Optional[Decimal] = None
+
+    @property
+    def is_active(self) -> bool:
+        """True if the side has orders and a reference price."""
+        return self.reference is not None and bool(self)
+
+    @property
+    def best_price(self) -> Decimal:
+        """The effective price of the best level.
+
+        Returns:
+            Decimal: The reference price plus the offset of the best level.
+        """
+        assert self.reference is not None, "the side must be active"
+        return self.reference + self.best.price
@@ -3,9 +3,15 @@
 from .book_or_cancel import BookOrCancelPlugin
 from .fill_or_kill import FillOrKillPlugin
 from .immediate_or_cancel import ImmediateOrCancelPlugin
+from .self_trade_prevention import (
+    SelfTradePrevention,
+    SelfTradePreventionPlugin
+)
 
 __all__ = [
     'BookOrCancelPlugin',
     'FillOrKillPlugin',
     'ImmediateOrCancelPlugin',
+    'SelfTradePrevention',
+    'SelfTradePreventionPlugin',
 ]
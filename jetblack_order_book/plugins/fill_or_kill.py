@@ -2,13 +2,30 @@
 
 A fill-or-kill order must be completely filled; otherwise it must be cancelled.
 
-The pre_fill hook can be used to catch fill-or-kill orders that cannot be
-completely filled.
+The pre_match hook decides once whether a new fill-or-kill order can be
+completely filled by the liquidity at or through its price. An order which
+does not reach the best limit or pegged order of the opposite side has
+nothing to match against, and rests in the book. Otherwise the size of the
+limit and pegged orders at or through its price, including the reserves of
+iceberg orders, is found from the depth index in logarithmic time. An order
+for more than that size is cancelled before any fills are generated, while
+one within it sweeps the book without further checks.
+
+Some of that size may be cancelled rather than filled during the sweep:
+resting fill-or-kill orders which cannot be completely filled, and orders
+of the same owner removed by self-trade prevention. Only when such orders
+are in the way is the order decided by a dry run of its sweep on a fork of
+the book.
+
+The pre_fill hook catches resting fill-or-kill orders that cannot be
+completely filled by the order they are matched against, and the
+pre_allocate hook those given too little by an allocation across their
+level.
 """
 
 from __future__ import annotations
 
-from typing import List, Optional, Sequence
+from typing import List, Optional, Sequence, Set, Tuple
 
 from ..abstract_types import (
     AbstractOrderBookManager,
@@ -16,16 +33,111 @@ from ..abstract_types import (
 )
 from ..aggregate_order import AggregateOrder
 from ..aggregate_order_side import AggregateOrderSide
-from ..order import Order, Style
+from ..order import Order, Side, Style
 
 
 class FillOrKillPlugin(Plugin):
     """A plugin which handles fill mor kill orders"""
 
+    def __init__(self) -> None:
+        self._order_ids: Set[int] = set()
+
     @property
     def valid_styles(self) -> Sequence[Style]:
         return (Style.FILL_OR_KILL,)
 
+    def post_create(
+            self,
+            manager: AbstractOrderBookManager,
+            order: Order
+    ) -> List[Order]:
+        if order.style == Style.FILL_OR_KILL:
+            self._order_ids.add(order.order_id)
+        return []
+
+    def post_delete(
+            self,
+            manager: AbstractOrderBookManager,
+            order: Order
+    ) -> None:
+        self._order_ids.discard(order.order_id)
+
+    def pre_match(
+            self,
+            manager: AbstractOrderBookManager,
+            aggressor: Order
+    ) -> List[Order]:
+        if aggressor.style != Style.FILL_OR_KILL:
+            return []
+
+        if aggressor.side == Side.BUY:
+            best = manager.best_price(Side.SELL)
+            if best is None or best > aggressor.price:
+                return []
+        else:
+            best = manager.best_price(Side.BUY)
+            if best is None or best < aggressor.price:
+                return []
+        opposite = Side.SELL if aggressor.side == Side.BUY else Side.BUY
+        available = manager.size_at_or_better(opposite, aggressor.price)
+        if available < aggressor.size:
+            return [aggressor]
+        if (
+                self._may_cancel(manager, aggressor) and
+                self._fillable_size(manager, aggressor) < aggressor.size
+        ):
+            return [aggressor]
+
+        return []
+
+    def _may_cancel(
+            self,
+            manager: AbstractOrderBookManager,
+            aggressor: Order
+    ) -> bool:
+        # Find whether any resting fill-or-kill order, or order of the same
+        # owner, might be met by the aggressor. Pegged orders are assumed to
+        # be met, as their prices move.
+        order_ids = list(self._order_ids)
+        if aggressor.owner is not None:
+            order_ids += manager.owner_order_ids(aggressor.owner)
+        for order_id in order_ids:
+            order = manager.find(order_id)
+            if order.side == aggressor.side:
+                continue
+            if order.style in (Style.PRIMARY_PEG, Style.MIDPOINT_PEG):
+                return True
+            if (
+                    order.price <= aggressor.price
+                    if aggressor.side == Side.BUY
+                    else order.price >= aggressor.price
+            ):
+                return True
+        return False
+
+    @classmethod
+    def _fillable_size(
+            cls,
+            manager: AbstractOrderBookManager,
+            aggressor: Order
+    ) -> int:
+        # The aggressor is replaced by a limit order in a fork of the book,
+        # which is matched exactly as the book would be.
+        fork = manager.fork()
+        fork.cancel_order(aggressor.order_id)
+        order_id, fills, _ = fork.add_order(
+            aggressor.side,
+            aggressor.price,
+            aggressor.size,
+            Style.LIMIT,
+            owner=aggressor.owner
+        )
+        return sum(
+            fill.size
+            for fill in fills
+            if order_id in (fill.buy_order_id, fill.sell_order_id)
+        )
+
     def pre_fill(
             self,
             manager: AbstractOrderBookManager,
@@ -34,18 +146,28 @@ class FillOrKillPlugin(Plugin):
             aggressor: Order
     ) -> List[Order]:
 
+        # Only resting fill-or-kill orders need checking, as the aggressor
+        # was checked before matching.
+        if not self._order_ids or (
+                len(self._order_ids) == 1 and
+                aggressor.order_id in self._order_ids
+        ):
+            return []
+
         cancels: List[Order] = []
 
         # Ensure time weighted.
         order = (
             self._handle_fill_or_kill(
                 bids.best,
-                offers.best
+                offers.best,
+                aggressor
             )
             if bids.best.first.order_id < offers.best.first.order_id
             else self._handle_fill_or_kill(
                 offers.best,
-                bids.best
+                bids.best,
+                aggressor
             )
         )
 
@@ -54,24 +176,49 @@ class FillOrKillPlugin(Plugin):
 
         return cancels
 
+    def pre_allocate(
+            self,
+            manager: AbstractOrderBookManager,
+            own: AggregateOrderSide,
+            resting: AggregateOrderSide,
+            allocations: Sequence[Tuple[Order, int]],
+            aggressor: Order
+    ) -> List[Order]:
+        if not self._order_ids:
+            return []
+
+        return [
+            order
+            for order, size in allocations
+            if order.style == Style.FILL_OR_KILL and size < order.size
+        ]
+
     @classmethod
     def _handle_fill_or_kill(
             cls,
             order1: AggregateOrder,
             order2: AggregateOrder,
+            aggressor: Order
     ) -> Optional[Order]:
-        if cls._should_cancel(order1.first, order2.first):
+        if cls._should_cancel(order1.first, order2.first, aggressor):
             return order1.first
 
-        if cls._should_cancel(order2.first, order1.first):
+        if cls._should_cancel(order2.first, order1.first, aggressor):
             return order2.first
 
         return None
 
     @classmethod
-    def _should_cancel(cls, order1: Order, order2: Order) -> bool:
-        # If this is a fill-or-kill order the order must be completely filled.
+    def _should_cancel(
+            cls,
+            order1: Order,
+            order2: Order,
+            aggressor: Order
+    ) -> bool:
+        # If this is a resting fill-or-kill order the order must be completely
+        # filled.
         return (
             order1.style == Style.FILL_OR_KILL and
+            order1.order_id != aggressor.order_id and
             order1.size > order2.size
         )
@@ -23,7 +23,6 @@ from ..abstract_types import (
     AbstractOrderBookManager,
     Plugin
 )
-from ..aggregate_order import AggregateOrder
 from ..order import Order, Side, Style
 
 
@@ -35,7 +34,10 @@ class ImmediateOrCancelPlugin(Plugin):
         return (Style.IMMEDIATE_OR_CANCEL,)
 
     def __init__(self) -> None:
-        self._immediate_or_cancel: Dict[Side, AggregateOrder] = {}
+        # As orders at a worse price are rejected or cancelled, the live
+        # immediate-or-cancel orders for a side are all at the same price.
+        self._prices: Dict[Side, Decimal] = {}
+        self._orders: Dict[Side, Dict[int, Order]] = {}
 
     def pre_create(
             self,
@@ -50,15 +52,15 @@ class ImmediateOrCancelPlugin(Plugin):
         # If there are immediate and cancel orders at a better price then this
         # order is invalid.
 
-        if side not in self._immediate_or_cancel:
+        if side not in self._prices:
             # There are no immediate-or-cancel orders for this side, so the
             # order is valid.
             return True
-        if side == Side.BUY and price >= self._immediate_or_cancel[side].price:
+        if side == Side.BUY and price >= self._prices[side]:
             # The order has the same or a greater price than the exiting buy
             # immediate-or-cancel orders, so the order is valid.
             return True
-        if side == Side.SELL and price <= self._immediate_or_cancel[side].price:
+        if side == Side.SELL and price <= self._prices[side]:
             # The order has the same or a lesser price than the exiting sell
             # immediate-or-cancel orders, so the order is valid.
             return True
@@ -78,22 +80,24 @@ class ImmediateOrCancelPlugin(Plugin):
             # Only immediate-or-cancel orders are relevant.
             return []
 
-        if order.side not in self._immediate_or_cancel:
+        if order.side not in self._prices:
             # If there are no immediate-or-cancel orders for this side just
             # add it.
-            self._immediate_or_cancel[order.side] = AggregateOrder(order)
+            self._prices[order.side] = order.price
+            self._orders[order.side] = {order.order_id: order}
             return []
 
-        if order.price == self._immediate_or_cancel[order.side].price:
+        if order.price == self._prices[order.side]:
             # If this order is at the same price append it.
-            self._immediate_or_cancel[order.side].append(order)
+            self._orders[order.side][order.order_id] = order
             return []
 
         # As the pre_create function has already established this order is valid
         # there must be other immediate-or-cancel orders at a worse price. Those
         # orders must be cancelled, replaced with the new order.
-        cancels = self._immediate_or_cancel[order.side].orders
-        self._immediate_or_cancel[order.side] = AggregateOrder(order)
+        cancels = list(self._orders[order.side].values())
+        self._prices[order.side] = order.price
+        self._orders[order.side] = {order.order_id: order}
 
         return cancels
 
@@ -103,31 +107,32 @@ class ImmediateOrCancelPlugin(Plugin):
             order: Order
     ) -> None:
         # Remove the order from the local cache.
-        if (
-                order.side in self._immediate_or_cancel and
-                order.order_id in self._immediate_or_cancel[order.side]
-        ):
-            self._immediate_or_cancel[order.side].cancel(order.order_id)
+        orders = self._orders.get(order.side)
+        if orders is None or order.order_id not in orders:
+            return
+
+        del orders[order.order_id]
+        if not orders:
+            del self._prices[order.side]
+            del self._orders[order.side]
 
     def post_match(
             self,
             manager: AbstractOrderBookManager,
     ) -> List[Order]:
         # After a match any immediate-or-cancel orders at the best price level
-        # must be cancelled.
+        # must be cancelled. As all the orders for a side are at the same
+        # price, the cost is proportional to the number of those orders rather
+        # than the depth of the level.
 
         cancels: List[Order] = []
 
-        if manager.bids:
-            orders = manager.bids.best.find_all(
-                lambda x: x.style == Style.IMMEDIATE_OR_CANCEL
-            )
-            cancels += orders
-
-        if manager.offers:
-            orders = manager.offers.best.find_all(
-                lambda x: x.style == Style.IMMEDIATE_OR_CANCEL
-            )
-            cancels += orders
+        if Side.BUY in self._prices and manager.bids:
+            if manager.bids.best.price == self._prices[Side.BUY]:
+                cancels += self._orders[Side.BUY].values()
+
+        if Side.SELL in self._prices and manager.offers:
+            if manager.offers.best.price == self._prices[Side.SELL]:
+                cancels += self._orders[Side.SELL].values()
 
         return cancels
@@ -0,0 +1,116 @@
+"""A plugin for self-trade prevention.
+
+Orders with the same owner must not trade with each other. When the pair of
+orders about to be filled have the same owner, the plugin applies a policy:
+cancel the newest order, cancel the oldest order, or decrement both orders by
+the smaller size, cancelling any order left without a displayed size.
+
+The check is made in the pre_fill hook, and compares the owners of the pair
+of orders, so the cost per fill is constant. When an aggressor is allocated
+across a price level, the pre_allocate hook checks it against every order
+the allocation fills.
+
+The plugin handles no order styles, and is not in `ALL_PLUGINS`. A policy
+other than the default can be chosen with a factory.
+
+    OrderBook(
+        (
+            *ALL_PLUGINS,
+            partial(
+                SelfTradePreventionPlugin,
+                SelfTradePrevention.CANCEL_OLDEST
+            )
+        )
+    )
+"""
+
+from __future__ import annotations
+
+from enum import Enum, auto
+from typing import List, Sequence, Tuple
+
+from ..abstract_types import (
+    AbstractOrderBookManager,
+    Plugin
+)
+from ..aggregate_order_side import AggregateOrderSide
+from ..order import Order, Style
+
+
+class SelfTradePrevention(Enum):
+    """The self-trade prevention policy"""
+
+    CANCEL_NEWEST = auto()
+    CANCEL_OLDEST = auto()
+    DECREMENT_BOTH = auto()
+
+
+class SelfTradePreventionPlugin(Plugin):
+    """A plugin which prevents orders with the same owner from trading"""
+
+    def __init__(
+            self,
+            policy: SelfTradePrevention = SelfTradePrevention.CANCEL_NEWEST
+    ) -> None:
+        """Initialise the plugin.
+
+        Args:
+            policy (SelfTradePrevention, optional): The policy. Defaults to
+                SelfTradePrevention.CANCEL_NEWEST.
+        """
+        self._policy = policy
+
+    @property
+    def valid_styles(self) -> Sequence[Style]:
+        return ()
+
+    def pre_fill(
+            self,
+            manager: AbstractOrderBookManager,
+            bids: AggregateOrderSide,
+            offers: AggregateOrderSide,
+            aggressor: Order
+    ) -> List[Order]:
+        return self._prevent(bids, bids.best.first, offers, offers.best.first)
+
+    def pre_allocate(
+            self,
+            manager: AbstractOrderBookManager,
+            own: AggregateOrderSide,
+            resting: AggregateOrderSide,
+            allocations: Sequence[Tuple[Order, int]],
+            aggressor: Order
+    ) -> List[Order]:
+        for order, _ in allocations:
+            cancels = self._prevent(own, aggressor, resting, order)
+            if cancels:
+                return cancels
+        return []
+
+    def _prevent(
+            self,
+            side1: AggregateOrderSide,
+            order1: Order,
+            side2: AggregateOrderSide,
+            order2: Order
+    ) -> List[Order]:
+        # Both orders are at the best level of their sides.
+        if order1.owner is None or order1.owner != order2.owner:
+            return []
+
+        if self._policy == SelfTradePrevention.CANCEL_NEWEST:
+            return [order1 if order1.order_id > order2.order_id else order2]
+
+        if self._policy == SelfTradePrevention.CANCEL_OLDEST:
+            return [order1 if order1.order_id < order2.order_id else order2]
+
+        # Decrement both orders by the smaller size. At least one of them is
+        # left without a displayed size, and is cancelled.
+        size = min(order1.size, order2.size)
+        cancels: List[Order] = []
+        for side, order in ((side1, order1), (side2, order2)):
+            if order.size == size:
+                cancels.append(order)
+            else:
+                side.reduce_best_orders(((order, size),))
+        return cancels
@@ -0,0 +1,97 @@
+"""Queue index"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List
+
+from .fenwick_tree import FenwickTree
+from .order import Order
+
+# The number of empty slots always tolerated before compacting.
+MIN_EMPTY_SLOTS = 16
+
+
+class QueueIndex:
+    """The sizes of the orders at a price level by their slot in the queue.
+
+    An order takes the next slot when it joins the back of the queue, and its
+    slot is left empty when it leaves, so the other slots never move. The
+    size and number of orders ahead of an order are the prefix sums up to its
+    slot, found in logarithmic time. Once the empty slots outnumber the
+    orders the index is sparse, and should be rebuilt.
+    """
+
+    def __init__(self, orders: Iterable[Order]) -> None:
+        """Initialise the index in O(n).
+
+        Args:
+            orders (Iterable[Order]): The orders, front of the queue first.
+        """
+        self._slots: Dict[int, int] = {}
+        sizes: List[int] = []
+        for order in orders:
+            self._slots[order.order_id] = len(sizes)
+            sizes.append(order.size)
+        self._sizes = FenwickTree(sizes)
+        self._counts = FenwickTree([1] * len(sizes))
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._slots
+
+    @property
+    def is_sparse(self) -> bool:
+        """True if the empty slots outnumber the orders."""
+        empty = len(self._sizes) - len(self._slots)
+        return empty > max(len(self._slots), MIN_EMPTY_SLOTS)
+
+    def append(self, order: Order) -> None:
+        """Add an order at the back of the queue.
+
+        Args:
+            order (Order): The order.
+        """
+        self._slots[order.order_id] = len(self._sizes)
+        self._sizes.append(order.size)
+        self._counts.append(1)
+
+    def update(self, order_id: int, delta: int) -> None:
+        """Change the size of an order.
+
+        Args:
+            order_id (int): The order id.
+            delta (int): The change in size.
+        """
+        self._sizes.add(self._slots[order_id], delta)
+
+    def remove(self, order_id: int, size: int) -> None:
+        """Remove an order, leaving its slot empty.
+
+        Args:
+            order_id (int): The order id.
+            size (int): The size of the order.
+        """
+        slot = self._slots.pop(order_id)
+        self._sizes.add(slot, -size)
+        self._counts.add(slot, -1)
+
+    def size_ahead(self, order_id: int) -> int:
+        """The total size of the orders ahead of an order.
+
+        Args:
+            order_id (int): The order id.
+
+        Returns:
+            int: The size ahead.
+        """
+        return int(self._sizes.prefix_sum(self._slots[order_id]))
+
+    def position(self, order_id: int) -> int:
+        """The number of orders ahead of an order.
+
+        Args:
+            order_id (int): The order id.
+
+        Returns:
+            int: The position in the queue, from zero.
+        """
+        return int(self._counts.prefix_sum(self._slots[order_id]))
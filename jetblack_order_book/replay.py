@@ -0,0 +1,214 @@
+"""Replay of recorded order entry.
+
+A recording is a file of frames, each holding the time at which an order
+entry message was received, the session which sent it, and the message. The
+state of the exchange at any point in the recording is found by restoring
+the nearest earlier checkpoint and replaying only the frames after it.
+Checkpoints are taken every `interval` frames as the recording is first
+read, so the file is only ever read forward from a checkpoint, and never
+loaded whole.
+
+    with open(path, 'wb') as file:
+        write_frame(file, timestamp, 0, encode_new_order(...))
+
+    replay = Replay(path, tickers, sessions=('mm1',))
+    exchange = replay.at_sequence(1_000_000)
+    exchange = replay.at_time(timestamp)
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_right
+from copy import deepcopy
+import struct
+from typing import (
+    BinaryIO,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence
+)
+
+from .abstract_types import PluginFactory
+from .constants import ALL_PLUGINS
+from .exchange_order_book import ExchangeOrderBook
+from .order_entry import OrderEntrySession
+
+# The timestamp, the session index and the length of the message.
+FRAME = struct.Struct('<dBH')
+
+
+def write_frame(
+        file: BinaryIO,
+        timestamp: float,
+        session: int,
+        message: bytes
+) -> None:
+    """Write a frame to a recording.
+
+    Args:
+        file (BinaryIO): The recording.
+        timestamp (float): The time the message was received.
+        session (int): The index of the session which sent the message.
+        message (bytes): The order entry message.
+    """
+    file.write(FRAME.pack(timestamp, session, len(message)))
+    file.write(message)
+
+
+class _Clock:
+    """The time of the frame being replayed."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _State:
+    """The exchange after replaying a number of frames."""
+
+    def __init__(
+            self,
+            tickers: Iterable[str],
+            sessions: Sequence[Optional[str]],
+            plugins: Sequence[PluginFactory]
+    ) -> None:
+        self.clock = _Clock()
+        self.exchange = ExchangeOrderBook(tickers, plugins, self.clock)
+        self.sessions = [
+            OrderEntrySession(self.exchange, owner)
+            for owner in sessions
+        ]
+        # The number of frames replayed, the offset of the next frame, and
+        # the time of the last frame.
+        self.sequence = 0
+        self.offset = 0
+        self.timestamp = float('-inf')
+
+
+class Replay:
+    """Find the state of an exchange at any point in a recording."""
+
+    def __init__(
+            self,
+            path: str,
+            tickers: Iterable[str],
+            sessions: Sequence[Optional[str]] = (None,),
+            interval: int = 10000,
+            plugins: Sequence[PluginFactory] = ALL_PLUGINS
+    ) -> None:
+        """Initialise the replay.
+
+        Args:
+            path (str): The path of the recording.
+            tickers (Iterable[str]): The tickers of the exchange.
+            sessions (Sequence[Optional[str]], optional): The owner of each
+                session. Defaults to (None,).
+            interval (int, optional): The number of frames between
+                checkpoints. Defaults to 10000.
+            plugins (Sequence[PluginFactory], optional): The plugins.
+                Defaults to `ALL_PLUGINS`.
+
+        Raises:
+            ValueError: If the interval is less than 1.
+        """
+        if interval < 1:
+            raise ValueError('interval must be greater than 0')
+
+        self._path = path
+        self._interval = interval
+        # The furthest point read, from which checkpoints are taken.
+        self._head = _State(tickers, sessions, plugins)
+        self._checkpoints: List[_State] = [deepcopy(self._head)]
+        self._sequences: List[int] = [0]
+        self._timestamps: List[float] = [self._head.timestamp]
+        self._at_end = False
+
+    def at_sequence(self, sequence: int) -> ExchangeOrderBook:
+        """Find the exchange after a number of frames.
+
+        Args:
+            sequence (int): The number of frames.
+
+        Returns:
+            ExchangeOrderBook: A copy of the exchange, or the exchange at the
+            end of the recording if it has fewer frames.
+        """
+        if sequence > self._head.sequence and not self._at_end:
+            self._read(lambda count, _: count >= sequence)
+        index = bisect_right(self._sequences, sequence) - 1
+        return self._restore(index, lambda count, _: count >= sequence)
+
+    def at_time(self, timestamp: float) -> ExchangeOrderBook:
+        """Find the exchange after the frames received at or before a time.
+
+        The frames must be recorded in time order.
+
+        Args:
+            timestamp (float): The time.
+
+        Returns:
+            ExchangeOrderBook: A copy of the exchange.
+        """
+        if timestamp >= self._head.timestamp and not self._at_end:
+            self._read(lambda _, time: time > timestamp)
+        index = bisect_right(self._timestamps, timestamp) - 1
+        return self._restore(index, lambda _, time: time > timestamp)
+
+    def _read(self, stop: Callable[[int, float], bool]) -> None:
+        self._at_end = self._replay(self._head, stop, checkpoint=True)
+
+    def _restore(
+            self,
+            index: int,
+            stop: Callable[[int, float], bool]
+    ) -> ExchangeOrderBook:
+        state = deepcopy(self._checkpoints[max(index, 0)])
+        self._replay(state, stop, checkpoint=False)
+        return state.exchange
+
+    def _replay(
+            self,
+            state: _State,
+            stop: Callable[[int, float], bool],
+            checkpoint: bool
+    ) -> bool:
+        """Replay frames until the stop condition or the end of the
+        recording.
+
+        Args:
+            state (_State): The state to advance.
+            stop (Callable[[int, float], bool]): Called with the number of
+                frames replayed and the time of the next frame, returning
+                True to stop before it.
+            checkpoint (bool): If True take checkpoints.
+
+        Returns:
+            bool: True if the end of the recording was reached.
+        """
+        with open(self._path, 'rb') as file:
+            file.seek(state.offset)
+            while True:
+                header = file.read(FRAME.size)
+                if len(header) < FRAME.size:
+                    return True
+                timestamp, session, length = FRAME.unpack(header)
+                if stop(state.sequence, timestamp):
+                    return False
+                message = file.read(length)
+                if len(message) < length:
+                    return True
+
+                state.clock.now = timestamp
+                state.sessions[session].process(message)
+                state.sequence += 1
+                state.offset += FRAME.size + length
+                state.timestamp = timestamp
+
+                if checkpoint and state.sequence % self._interval == 0:
+                    self._checkpoints.append(deepcopy(state))
+                    self._sequences.append(state.sequence)
+                    self._timestamps.append(state.timestamp)
@@ -0,0 +1,269 @@
+"""Shared memory books.
+
+The top levels of every book of an exchange are published into a shared
+memory segment, so other processes on the host can read them without a
+socket, a copy through the publishing process, or a lock.
+
+Each instrument has a fixed size record guarded by a sequence lock. The
+publisher makes the version of the record odd while it writes, and even when
+it has finished, so a reader which sees the same even version before and
+after reading the record has read a consistent record. The publisher never
+waits for a reader.
+
+    publisher = SharedBookPublisher(exchange, levels=5)
+    exchange.add_order(...)
+    publisher.publish()
+
+    # In another process.
+    reader = SharedBookReader(name)
+    record = reader.read(instrument_id)
+"""
+
+from __future__ import annotations
+
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import struct
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from .exchange_order_book import ExchangeOrderBook
+from .snapshot import LevelSnapshot
+
+MAGIC = b'JBOB'
+# The magic number, the number of instruments and the number of levels.
+HEADER = struct.Struct('<4sII4x')
+VERSION = struct.Struct('<Q')
+NO_PRICE = float('nan')
+
+
+def _record_struct(levels: int) -> struct.Struct:
+    # The sequence number of the last change to the book, then the bid prices
+    # and sizes and the offer prices and sizes, best first.
+    return struct.Struct(f'<q{levels}d{levels}q{levels}d{levels}q')
+
+
+class SharedBookRecord(NamedTuple):
+    """The top levels of a book as read from shared memory.
+
+    Empty levels have a price of NaN and a size of zero.
+    """
+
+    sequence: int
+    bid_prices: Tuple[float, ...]
+    bid_sizes: Tuple[int, ...]
+    offer_prices: Tuple[float, ...]
+    offer_sizes: Tuple[int, ...]
+
+
+class SharedBookPublisher:
+    """Publish the top levels of the books of an exchange to shared memory.
+
+    The instrument id of a book is the index of its ticker in the tickers of
+    the exchange. Only the books changed since the last publish are written.
+    """
+
+    def __init__(
+            self,
+            exchange: ExchangeOrderBook,
+            levels: int = 5,
+            name: Optional[str] = None
+    ) -> None:
+        """Create the shared memory segment.
+
+        Args:
+            exchange (ExchangeOrderBook): The exchange.
+            levels (int, optional): The number of levels of each side to
+                publish. Defaults to 5.
+            name (Optional[str], optional): The name of the segment, or None
+                for a generated name. Defaults to None.
+
+        Raises:
+            ValueError: If the number of levels is less than 1.
+        """
+        if levels < 1:
+            raise ValueError('levels must be greater than 0')
+
+        self._exchange = exchange
+        self._levels = levels
+        self._record = _record_struct(levels)
+        self._stride = VERSION.size + self._record.size
+        count = len(exchange.tickers)
+        self._memory = SharedMemory(
+            name,
+            create=True,
+            size=HEADER.size + self._stride * count
+        )
+        self._versions = [0] * count
+        self._instrument_ids = {
+            ticker: instrument_id
+            for instrument_id, ticker in enumerate(exchange.tickers)
+        }
+        self._sequence = 0
+
+        HEADER.pack_into(self._memory.buf, 0, MAGIC, count, levels)
+        for instrument_id in range(count):
+            self._write(instrument_id, 0, (), ())
+
+    @property
+    def name(self) -> str:
+        """The name of the shared memory segment."""
+        return self._memory.name
+
+    def publish(self) -> List[str]:
+        """Write the books which have changed since the last publish.
+
+        Returns:
+            List[str]: The tickers written.
+        """
+        tickers = self._exchange.changed_since(self._sequence)
+        for ticker in tickers:
+            snapshot = self._exchange.snapshot(ticker, self._levels)
+            self._write(
+                self._instrument_ids[ticker],
+                snapshot.sequence,
+                snapshot.bids,
+                snapshot.offers
+            )
+        self._sequence = self._exchange.sequence
+        return tickers
+
+    def close(self) -> None:
+        """Close and remove the shared memory segment."""
+        self._memory.close()
+        self._memory.unlink()
+
+    def _write(
+            self,
+            instrument_id: int,
+            sequence: int,
+            bids: Sequence[LevelSnapshot],
+            offers: Sequence[LevelSnapshot]
+    ) -> None:
+        padding = self._levels
+        values = [sequence]
+        for levels in (bids, offers):
+            empty = padding - len(levels)
+            values += [float(level.price) for level in levels]
+            values += [NO_PRICE] * empty
+            values += [level.size for level in levels]
+            values += [0] * empty
+
+        offset = HEADER.size + self._stride * instrument_id
+        version = self._versions[instrument_id]
+        buf = self._memory.buf
+        # An odd version marks the record as being written.
+        VERSION.pack_into(buf, offset, version + 1)
+        self._record.pack_into(buf, offset + VERSION.size, *values)
+        VERSION.pack_into(buf, offset, version + 2)
+        self._versions[instrument_id] = version + 2
+
+
+class SharedBookReader:
+    """Read the books published by a `SharedBookPublisher`."""
+
+    def __init__(self, name: str) -> None:
+        """Attach to a shared memory segment.
+
+        Args:
+            name (str): The name of the segment.
+
+        Raises:
+            ValueError: If the segment was not written by a publisher.
+        """
+        try:
+            self._memory = SharedMemory(name, track=False)  # type: ignore
+        except TypeError:
+            # Before Python 3.13 attaching registers the segment with the
+            # resource tracker, which would remove it when this process exits.
+            self._memory = SharedMemory(name)
+            resource_tracker.unregister(
+                # pylint: disable-next=protected-access
+                self._memory._name,  # type: ignore
+                'shared_memory'
+            )
+
+        magic, count, levels = HEADER.unpack_from(self._memory.buf, 0)
+        if magic != MAGIC:
+            self._memory.close()
+            raise ValueError('not a shared book segment')
+
+        self._count = count
+        self._levels = levels
+        self._record = _record_struct(levels)
+        self._stride = VERSION.size + self._record.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def levels(self) -> int:
+        """The number of levels of each side."""
+        return self._levels
+
+    def version(self, instrument_id: int) -> int:
+        """The version of the record of an instrument.
+
+        The version changes whenever the record is written, so it can be
+        polled cheaply to find changed books.
+
+        Args:
+            instrument_id (int): The instrument id.
+
+        Returns:
+            int: The version.
+        """
+        offset = self._offset(instrument_id)
+        return VERSION.unpack_from(self._memory.buf, offset)[0]
+
+    def read(
+            self,
+            instrument_id: int,
+            retries: int = 100000
+    ) -> SharedBookRecord:
+        """Read the record of an instrument.
+
+        The record is unpacked directly from the shared memory, retrying if
+        the publisher wrote to it during the read.
+
+        Args:
+            instrument_id (int): The instrument id.
+            retries (int, optional): The number of times to retry before
+                giving up, in case the publisher died while writing. Defaults
+                to 100000.
+
+        Raises:
+            TimeoutError: If a consistent record could not be read.
+
+        Returns:
+            SharedBookRecord: The record.
+        """
+        offset = self._offset(instrument_id)
+        buf = self._memory.buf
+        levels = self._levels
+        for _ in range(retries + 1):
+            before, = VERSION.unpack_from(buf, offset)
+            if before & 1:
+                continue
+            values = self._record.unpack_from(buf, offset + VERSION.size)
+            after, = VERSION.unpack_from(buf, offset)
+            if before == after:
+                break
+        else:
+            raise TimeoutError('the record is being written')
+
+        return SharedBookRecord(
+            values[0],
+            values[1:1 + levels],
+            values[1 + levels:1 + 2 * levels],
+            values[1 + 2 * levels:1 + 3 * levels],
+            values[1 + 3 * levels:]
+        )
+
+    def close(self) -> None:
+        """Detach from the shared memory segment."""
+        self._memory.close()
+
+    def _offset(self, instrument_id: int) -> int:
+        if not 0 <= instrument_id < self._count:
+            raise IndexError('instrument id out of range')
+        return HEADER.size + self._stride * instrument_id
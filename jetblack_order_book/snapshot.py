@@ -0,0 +1,33 @@
+"""Snapshots"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import NamedTuple, Tuple
+
+
+class LevelSnapshot(NamedTuple):
+    """An immutable record of a price level."""
+
+    price: Decimal
+    size: int
+    count: int
+
+    def __str__(self) -> str:
+        return f"{self.price}x{self.size}"
+
+
+class BookSnapshot(NamedTuple):
+    """An immutable view of the price levels of a book.
+
+    The levels of each side are ordered from best to worst. As a snapshot
+    can never change, it can be handed to readers on other threads while the
+    book continues to change. The records of levels which have not changed
+    are shared between snapshots.
+    """
+
+    bids: Tuple[LevelSnapshot, ...]
+    offers: Tuple[LevelSnapshot, ...]
+    # The sequence number of the last change to the book, when the book is
+    # part of an exchange.
+    sequence: int = 0
@@ -0,0 +1,176 @@
+"""Timer wheel"""
+
+from __future__ import annotations
+
+from math import floor
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+SLOT_MASK = SLOTS - 1
+
+
+class TimerWheel:
+    """A hierarchical timer wheel.
+
+    Time is divided into ticks of a fixed resolution. The first wheel has a
+    slot for each of the next 64 ticks, the second a slot for each of the next
+    64 spans of 64 ticks, and so on. Timers beyond the last wheel are held in
+    an overflow slot. A timer is scheduled and cancelled in constant time, and
+    cascades down at most once per wheel, so advancing the time costs a
+    constant amount per timer. Spans of time with no timers in the lower
+    wheels are skipped.
+    """
+
+    def __init__(
+            self,
+            start: float,
+            resolution: float = 0.001,
+            levels: int = 4
+    ) -> None:
+        """Initialise the timer wheel.
+
+        Args:
+            start (float): The current time.
+            resolution (float, optional): The length of a tick. Defaults to
+                0.001.
+            levels (int, optional): The number of wheels. Defaults to 4.
+        """
+        self._resolution = resolution
+        self._levels = levels
+        self._tick = self._to_tick(start)
+        # The wheels of slots, then the overflow slot. Each slot maps a key to
+        # its deadline.
+        self._wheels: List[List[Dict[Hashable, float]]] = [
+            [{} for _ in range(SLOTS)]
+            for _ in range(levels)
+        ]
+        self._overflow: Dict[Hashable, float] = {}
+        self._counts = [0] * (levels + 1)
+        self._locations: Dict[Hashable, Tuple[int, Dict[Hashable, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._locations
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """Schedule a timer.
+
+        Args:
+            key (Hashable): The key of the timer.
+            deadline (float): The time at which the timer expires.
+
+        Raises:
+            KeyError: If the key is already scheduled.
+        """
+        if key in self._locations:
+            raise KeyError("timer already scheduled")
+        self._insert(key, deadline)
+
+    def cancel(self, key: Hashable) -> None:
+        """Cancel a timer.
+
+        Args:
+            key (Hashable): The key of the timer.
+
+        Raises:
+            KeyError: If the key is not scheduled.
+        """
+        level, slot = self._locations.pop(key)
+        del slot[key]
+        self._counts[level] -= 1
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Advance the time, removing the timers that have expired.
+
+        Args:
+            now (float): The current time.
+
+        Returns:
+            List[Hashable]: The keys of the expired timers, ordered by
+                deadline.
+        """
+        expired: List[Tuple[float, Hashable]] = []
+        target = self._to_tick(now)
+
+        while self._tick < target:
+            level = self._lowest_level()
+            if level is None:
+                self._tick = target
+                break
+            if level == 0:
+                # Every timer in the current slot of the first wheel is due
+                # before the target tick.
+                self._expire(lambda deadline: True, expired)
+                self._tick += 1
+            else:
+                # The lower wheels are empty, so skip to the next cascade.
+                span = 1 << (SLOT_BITS * level)
+                tick = (self._tick // span + 1) * span
+                if level == self._levels:
+                    # Skip to the cascade before the earliest overflow timer.
+                    earliest = self._to_tick(min(self._overflow.values()))
+                    tick = max(tick, earliest // span * span)
+                self._tick = min(target, tick)
+            self._cascade()
+
+        # Timers in the current tick may not yet be due.
+        self._expire(lambda deadline: deadline <= now, expired)
+
+        expired.sort(key=lambda item: item[0])
+        return [key for _, key in expired]
+
+    def _to_tick(self, time: float) -> int:
+        return floor(time / self._resolution)
+
+    def _insert(self, key: Hashable, deadline: float) -> None:
+        delta = max(self._to_tick(deadline) - self._tick, 0)
+        level = (delta.bit_length() - 1) // SLOT_BITS if delta else 0
+        if level < self._levels:
+            tick = self._tick + delta
+            index = (tick >> (SLOT_BITS * level)) & SLOT_MASK
+            slot = self._wheels[level][index]
+        else:
+            level, slot = self._levels, self._overflow
+        slot[key] = deadline
+        self._counts[level] += 1
+        self._locations[key] = (level, slot)
+
+    def _lowest_level(self) -> Optional[int]:
+        for level, count in enumerate(self._counts):
+            if count:
+                return level
+        return None
+
+    def _expire(
+            self,
+            is_due: Callable[[float], bool],
+            expired: List[Tuple[float, Hashable]]
+    ) -> None:
+        slot = self._wheels[0][self._tick & SLOT_MASK]
+        for key, deadline in list(slot.items()):
+            if is_due(deadline):
+                expired.append((deadline, key))
+                del slot[key]
+                del self._locations[key]
+                self._counts[0] -= 1
+
+    def _cascade(self) -> None:
+        # Higher wheels cascade first, as they may refill the slots of the
+        # lower wheels which are about to cascade.
+        if self._tick & ((1 << (SLOT_BITS * self._levels)) - 1) == 0:
+            self._reinsert(self._levels, self._overflow)
+        for level in range(self._levels - 1, 0, -1):
+            if self._tick & ((1 << (SLOT_BITS * level)) - 1) == 0:
+                index = (self._tick >> (SLOT_BITS * level)) & SLOT_MASK
+                self._reinsert(level, self._wheels[level][index])
+
+    def _reinsert(self, level: int, slot: Dict[Hashable, float]) -> None:
+        timers = list(slot.items())
+        slot.clear()
+        self._counts[level] -= len(timers)
+        for key, deadline in timers:
+            del self._locations[key]
+            self._insert(key, deadline)
@@ -0,0 +1,105 @@
+"""Top of book"""
+
+from __future__ import annotations
+
+from array import array
+from typing import NamedTuple, Optional, Sequence
+
+from .aggregate_order_side import AggregateOrderSide
+
+NO_PRICE = float('nan')
+
+
+class TopOfBook(NamedTuple):
+    """The best bid and offer for a set of order books as columnar arrays.
+
+    Each column is a contiguous `array.array`, so it can be wrapped without
+    copying by anything supporting the buffer protocol (e.g.
+    `numpy.frombuffer`). Prices are floats, with NaN when a side is empty.
+    """
+
+    instrument_id: array
+    bid_price: array
+    bid_size: array
+    offer_price: array
+    offer_size: array
+    sequence: array
+
+
+class TopOfBookArrays:
+    """The incrementally maintained columns of a top of book snapshot."""
+
+    def __init__(self, count: int) -> None:
+        """Initialise the arrays with empty books.
+
+        Args:
+            count (int): The number of instruments.
+        """
+        self._instrument_id = array('q', range(count))
+        self._bid_price = array('d', [NO_PRICE]) * count
+        self._bid_size = array('q', [0]) * count
+        self._offer_price = array('d', [NO_PRICE]) * count
+        self._offer_size = array('q', [0]) * count
+        self._sequence = array('q', [0]) * count
+
+    def update(
+            self,
+            instrument_id: int,
+            bids: AggregateOrderSide,
+            offers: AggregateOrderSide,
+            sequence: int
+    ) -> None:
+        """Update the row for an instrument.
+
+        Args:
+            instrument_id (int): The instrument id.
+            bids (AggregateOrderSide): The bids.
+            offers (AggregateOrderSide): The offers.
+            sequence (int): The sequence of the last change to the book.
+        """
+        if bids:
+            best = bids.best
+            self._bid_price[instrument_id] = float(best.price)
+            self._bid_size[instrument_id] = best.size
+        else:
+            self._bid_price[instrument_id] = NO_PRICE
+            self._bid_size[instrument_id] = 0
+
+        if offers:
+            best = offers.best
+            self._offer_price[instrument_id] = float(best.price)
+            self._offer_size[instrument_id] = best.size
+        else:
+            self._offer_price[instrument_id] = NO_PRICE
+            self._offer_size[instrument_id] = 0
+
+        self._sequence[instrument_id] = sequence
+
+    def snapshot(
+            self,
+            instrument_ids: Optional[Sequence[int]] = None
+    ) -> TopOfBook:
+        """Copy the columns.
+
+        Args:
+            instrument_ids (Optional[Sequence[int]], optional): If given only
+                copy the rows of these instruments. Defaults to None.
+
+        Returns:
+            TopOfBook: A copy of the current columns.
+        """
+        columns = (
+            self._instrument_id,
+            self._bid_price,
+            self._bid_size,
+            self._offer_price,
+            self._offer_size,
+            self._sequence
+        )
+        if instrument_ids is None:
+            return TopOfBook(*(column[:] for column in columns))
+
+        return TopOfBook(*(
+            array(column.typecode, [column[i] for i in instrument_ids])
+            for column in columns
+        ))
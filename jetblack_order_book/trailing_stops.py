@@ -0,0 +1,243 @@
+"""Trailing stops"""
+
+from __future__ import annotations
+
+from copy import copy
+from decimal import Decimal
+from heapq import heapify, heappop, heappush
+from typing import Dict, List, MutableMapping, Optional, Tuple
+
+from .order import Order
+from .utils import Overlay
+
+
+class _Group:
+    """Trailing stops sharing the same extreme price."""
+
+    __slots__ = ('extreme', 'stops', 'version')
+
+    def __init__(self, extreme: Decimal) -> None:
+        self.extreme = extreme
+        # A heap of (offset, token, order id), so the stop with the smallest
+        # offset, which triggers first, is at the top. The token of an entry
+        # is unique, so it breaks ties.
+        self.stops: List[Tuple[Decimal, int, int]] = []
+        # Incremented when the trigger price of the group changes, to
+        # invalidate its older entries in the trigger heap.
+        self.version = 0
+
+
+class TrailingStops:
+    """The trailing stops for a side.
+
+    The price of a trailing stop is its offset from the extreme price reached
+    since it was placed: the highest price for a sell stop, and the lowest
+    for a buy stop. Prices are negated for buy stops, so both sides track a
+    high.
+
+    Stops are grouped by their extreme price. Groups are kept on a stack with
+    the highest extreme at the bottom, as a stop placed later can only have
+    a lower extreme. When the price rises the groups it passes are merged,
+    smaller into larger, into a single group at the new extreme. Within a
+    group the stops are kept in a heap by offset, and the groups are kept in
+    a heap by the trigger price of their first stop. Price moves and triggers
+    therefore cost O(log n) per stop, amortised, rather than re-sorting every
+    stop on every move.
+
+    Stops placed while there is no price wait until there is one.
+
+    Each stop is given a unique token when added, and the entries in the
+    heaps are only live while their token is the current token of the order,
+    so the entries of a cancelled or replaced stop are skipped.
+    """
+
+    def __init__(self, is_sell: bool) -> None:
+        """Initialise the trailing stops.
+
+        Args:
+            is_sell (bool): True for sell stops, which trail the highest
+                price; False for buy stops, which trail the lowest.
+        """
+        self._is_sell = is_sell
+        self._orders: MutableMapping[int, Order] = {}
+        # The token of the live entry of each order.
+        self._tokens: MutableMapping[int, int] = {}
+        self._count = 0
+        self._pending: List[int] = []
+        self._groups: List[_Group] = []
+        # A heap of (-trigger, sequence, version, group) for the first stop
+        # of each group.
+        self._triggers: List[Tuple[Decimal, int, int, _Group]] = []
+        self._sequence = 0
+        # True if the orders belong to the trailing stops this was forked
+        # from, and while the groups are shared with them.
+        self._is_fork = False
+        self._is_shared = False
+
+    def __bool__(self) -> bool:
+        return self._count != 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._orders
+
+    def add_order(self, order: Order) -> None:
+        """Add a trailing stop.
+
+        The stop starts trailing from the price of the next update.
+
+        Args:
+            order (Order): The order, with its offset as the price.
+        """
+        self._sequence += 1
+        self._orders[order.order_id] = order
+        self._tokens[order.order_id] = self._sequence
+        self._count += 1
+        self._pending.append(order.order_id)
+
+    def amend_order(self, order: Order, size: int) -> None:
+        """Amend the size of a trailing stop.
+
+        Args:
+            order (Order): The order.
+            size (int): The new size.
+        """
+        order = self._orders[order.order_id]
+        if self._is_fork:
+            # The order belongs to the trailing stops of the book.
+            order = self._orders[order.order_id] = copy(order)
+        order.size = size
+
+    def cancel_order(self, order: Order) -> None:
+        """Cancel a trailing stop.
+
+        The stop is removed from the heaps when it reaches the top.
+
+        Args:
+            order (Order): The order.
+        """
+        del self._orders[order.order_id]
+        del self._tokens[order.order_id]
+        self._count -= 1
+
+    def update(self, price: Optional[Decimal]) -> List[Tuple[Order, Decimal]]:
+        """Track a price, removing the stops it triggers.
+
+        Args:
+            price (Optional[Decimal]): The price, or None if there is none.
+
+        Returns:
+            List[Tuple[Order, Decimal]]: The triggered stops and their stop
+                prices.
+        """
+        if price is None or not self._count:
+            return []
+
+        level = price if self._is_sell else -price
+        if self._is_shared and (
+                self._pending or
+                (self._groups and self._groups[-1].extreme < level) or
+                (self._triggers and -self._triggers[0][0] >= level)
+        ):
+            self._unshare()
+
+        if self._groups and self._groups[-1].extreme < level:
+            merged = self._groups.pop()
+            while self._groups and self._groups[-1].extreme < level:
+                merged = self._merge(merged, self._groups.pop())
+            merged.extreme = level
+            self._groups.append(merged)
+            self._push_trigger(merged)
+
+        if self._pending:
+            if not self._groups or self._groups[-1].extreme != level:
+                self._groups.append(_Group(level))
+            group = self._groups[-1]
+            for order_id in self._pending:
+                token = self._tokens.get(order_id)
+                if token is not None:
+                    offset = self._orders[order_id].price
+                    heappush(group.stops, (offset, token, order_id))
+            self._pending.clear()
+            self._push_trigger(group)
+
+        triggered: List[Tuple[Order, Decimal]] = []
+        while self._triggers and -self._triggers[0][0] >= level:
+            _, _, version, group = heappop(self._triggers)
+            if version != group.version:
+                continue
+            stops = group.stops
+            while stops and group.extreme - stops[0][0] >= level:
+                offset, token, order_id = heappop(stops)
+                if self._tokens.get(order_id) != token:
+                    continue
+                order = self._orders[order_id]
+                self.cancel_order(order)
+                stop = group.extreme - offset
+                triggered.append((order, stop if self._is_sell else -stop))
+            self._push_trigger(group)
+
+        return triggered
+
+    def fork(self) -> TrailingStops:
+        """Create a copy of the trailing stops which shares their state.
+
+        The orders are layered over those of this object, and the groups are
+        copied only when the fork first changes them. This object must not be
+        changed while the fork is in use.
+
+        Returns:
+            TrailingStops: The fork.
+        """
+        trailing_stops = copy(self)
+        trailing_stops._orders = Overlay(self._orders)
+        trailing_stops._tokens = Overlay(self._tokens)
+        trailing_stops._pending = list(self._pending)
+        trailing_stops._is_fork = True
+        trailing_stops._is_shared = True
+        return trailing_stops
+
+    def _unshare(self) -> None:
+        # Copy the groups and the trigger heap before they are changed.
+        groups: Dict[int, _Group] = {}
+        for group in self._groups:
+            copied = groups[id(group)] = _Group(group.extreme)
+            copied.stops = list(group.stops)
+            copied.version = group.version
+        self._groups = [groups[id(group)] for group in self._groups]
+        # Entries for groups which have been merged away are stale.
+        self._triggers = [
+            (trigger, sequence, version, groups[id(group)])
+            for trigger, sequence, version, group in self._triggers
+            if id(group) in groups
+        ]
+        heapify(self._triggers)
+        self._is_shared = False
+
+    def _is_live(self, item: Tuple[Decimal, int, int]) -> bool:
+        return self._tokens.get(item[2]) == item[1]
+
+    def _merge(self, first: _Group, second: _Group) -> _Group:
+        if len(first.stops) < len(second.stops):
+            first, second = second, first
+        for item in second.stops:
+            if self._is_live(item):
+                heappush(first.stops, item)
+        second.stops = []
+        second.version += 1
+        return first
+
+    def _push_trigger(self, group: _Group) -> None:
+        group.version += 1
+        # Cancelled stops are dropped so they do not set the trigger.
+        while group.stops and not self._is_live(group.stops[0]):
+            heappop(group.stops)
+        if group.stops:
+            trigger = group.extreme - group.stops[0][0]
+            self._sequence += 1
+            heappush(
+                self._triggers,
+                (-trigger, self._sequence, group.version, group)
+            )
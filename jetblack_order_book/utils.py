@@ -1,8 +1,19 @@
 """Utilities"""
 
-from typing import Callable, Iterable, TypeVar
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+    Set,
+    TypeVar
+)
 
 T = TypeVar('T')
+K = TypeVar('K')
+V = TypeVar('V')
 
 
 def index_of(seq: Iterable[T], predicate: Callable[[T], bool]) -> int:
@@ -23,3 +34,52 @@ def index_of(seq: Iterable[T], predicate: Callable[[T], bool]) -> int:
         ),
         -1
     )
+
+
+class Overlay(MutableMapping[K, V]):
+    """A mutable mapping layered over another mapping.
+
+    Changes are held by the overlay, leaving the underlying mapping unchanged.
+    """
+
+    def __init__(self, base: Mapping[K, V]) -> None:
+        """Initialise the overlay.
+
+        Args:
+            base (Mapping[K, V]): The underlying mapping.
+        """
+        self._base = base
+        self._changes: Dict[K, V] = {}
+        self._deleted: Set[K] = set()
+
+    def __getitem__(self, key: K) -> V:
+        if key in self._changes:
+            return self._changes[key]
+        if key in self._deleted:
+            raise KeyError(key)
+        return self._base[key]
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self._changes[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key: K) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self._changes.pop(key, None)
+        if key in self._base:
+            self._deleted.add(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._changes or (
+            key not in self._deleted and key in self._base
+        )
+
+    def __iter__(self) -> Iterator[K]:
+        yield from self._changes
+        for key in self._base:
+            if key not in self._changes and key not in self._deleted:
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
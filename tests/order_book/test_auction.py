@@ -0,0 +1,143 @@
+"""Tests for auctions"""
+
+from decimal import Decimal
+import random
+
+import pytest
+
+from jetblack_order_book import AuctionTieBreak, OrderBook, Fill, Side, Style
+
+
+def test_auction():
+    """Orders accumulate during an auction and uncross at a single price"""
+    order_book = OrderBook()
+    order_book.start_auction()
+    assert order_book.in_auction
+
+    buy1, _, _ = order_book.add_order(Side.BUY, Decimal('12'), 5, Style.LIMIT)
+    buy2, _, _ = order_book.add_order(Side.BUY, Decimal('11'), 10, Style.LIMIT)
+    order_book.add_order(Side.BUY, Decimal('9'), 10, Style.LIMIT)
+    sell1, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 8, Style.LIMIT)
+    assert not fills, "orders should not match during an auction"
+    sell2, _, _ = order_book.add_order(
+        Side.SELL, Decimal('11'), 10, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('13'), 10, Style.LIMIT)
+    assert str(order_book) == '9x10,11x10,12x5 : 10x8,11x10,13x10'
+
+    with pytest.raises(ValueError):
+        order_book.add_order(Side.BUY, None, 5, Style.MARKET)
+
+    # At 11 the bids for 15 meet the offers for 18.
+    price, fills, _ = order_book.uncross()
+    assert price == Decimal('11')
+    assert fills == [
+        Fill(buy1, sell1, Decimal('11'), 5),
+        Fill(buy2, sell1, Decimal('11'), 3),
+        Fill(buy2, sell2, Decimal('11'), 7),
+    ]
+    assert not order_book.in_auction
+    assert str(order_book) == '9x10 : 11x3,13x10'
+
+    with pytest.raises(ValueError):
+        order_book.uncross()
+
+
+def test_auction_tie_break():
+    """Prices with the same volume and imbalance use the tie break"""
+    for tie_break, reference, expected in (
+            (AuctionTieBreak.HIGHEST, None, Decimal('12')),
+            (AuctionTieBreak.LOWEST, None, Decimal('10')),
+            (AuctionTieBreak.REFERENCE, Decimal('11.5'), Decimal('11.5')),
+            (AuctionTieBreak.REFERENCE, Decimal('9'), Decimal('10')),
+            (AuctionTieBreak.REFERENCE, Decimal('14'), Decimal('12')),
+    ):
+        order_book = OrderBook()
+        order_book.start_auction()
+        order_book.add_order(Side.BUY, Decimal('12'), 5, Style.LIMIT)
+        order_book.add_order(Side.BUY, Decimal('9'), 1, Style.LIMIT)
+        order_book.add_order(Side.SELL, Decimal('10'), 5, Style.LIMIT)
+        order_book.add_order(Side.SELL, Decimal('13'), 1, Style.LIMIT)
+        price, fills, _ = order_book.uncross(tie_break, reference)
+        assert price == expected
+        assert sum(fill.size for fill in fills) == 5
+        assert str(order_book) == '9x1 : 13x1'
+
+    order_book = OrderBook()
+    order_book.start_auction()
+    with pytest.raises(ValueError):
+        order_book.uncross(AuctionTieBreak.REFERENCE)
+
+
+def test_auction_random():
+    """Compare the uncrossing volume against a brute force search"""
+    rng = random.Random(7)
+    for _ in range(50):
+        order_book = OrderBook()
+        order_book.start_auction()
+        orders = []
+        for _ in range(rng.randint(1, 40)):
+            side = rng.choice((Side.BUY, Side.SELL))
+            price = Decimal(rng.randint(90, 110))
+            size = rng.randint(1, 20)
+            order_book.add_order(side, price, size, Style.LIMIT)
+            orders.append((side, price, size))
+
+        def volume(price: Decimal) -> int:
+            return min(
+                sum(
+                    s for side, p, s in orders
+                    if side == Side.BUY and p >= price
+                ),
+                sum(
+                    s for side, p, s in orders
+                    if side == Side.SELL and p <= price
+                )
+            )
+        expected = max(volume(price) for _, price, _ in orders)
+
+        price, fills, _ = order_book.uncross()
+        assert sum(fill.size for fill in fills) == expected
+        if expected:
+            assert volume(price) == expected
+        bids, offers = order_book.bids, order_book.offers
+        assert not (bids and offers and bids.best.price >= offers.best.price)
+
+
+def test_auction_iceberg():
+    """The reserves of iceberg orders are included in the auction"""
+    order_book = OrderBook()
+    order_book.start_auction()
+
+    buy_id, _, _ = order_book.add_order(
+        Side.BUY, Decimal('10'), 20, Style.ICEBERG, display_size=5)
+    sell_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 15, Style.LIMIT)
+
+    price, fills, cancels = order_book.uncross()
+    assert price == Decimal('10')
+    assert fills == [Fill(buy_id, sell_id, Decimal('10'), 5)] * 3
+    assert not cancels
+    assert str(order_book) == '10x5 : '
+
+
+def test_auction_triggers_stops():
+    """Stops triggered by the uncrossing prices are matched"""
+    order_book = OrderBook()
+    order_book.start_auction()
+
+    stop_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 5, Style.STOP)
+    buy1, _, _ = order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+    buy2, _, _ = order_book.add_order(Side.BUY, Decimal('11'), 5, Style.LIMIT)
+    sell_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('11'), 5, Style.LIMIT)
+
+    price, fills, _ = order_book.uncross()
+    assert price == Decimal('11')
+    assert fills == [
+        Fill(buy2, sell_id, Decimal('11'), 5),
+        Fill(buy1, stop_id, Decimal('10'), 5),
+    ]
+    assert str(order_book) == ' : '
+    assert not order_book.stop_offers
@@ -0,0 +1,48 @@
+"""Tests for depth arrays"""
+
+from decimal import Decimal
+
+from jetblack_order_book import OrderBook, Side, Style
+
+
+def test_depth_arrays():
+    """Test exporting the depth as arrays"""
+    order_book = OrderBook()
+
+    bids, offers = order_book.depth_arrays(None)
+    assert len(bids.prices) == 0 and len(offers.prices) == 0
+    assert bids.counts is None and bids.cumulative_sizes is None
+
+    order_book.add_order(Side.BUY, Decimal('10.0'), 10, Style.LIMIT)
+    order_book.add_order(Side.BUY, Decimal('10.5'), 5, Style.LIMIT)
+    order_book.add_order(Side.BUY, Decimal('10.0'), 20, Style.LIMIT)
+    order_book.add_order(Side.BUY, Decimal('9.5'), 30, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('11.5'), 15, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('11.0'), 10, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('12.0'), 20, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('8.0'), 5, Style.STOP)
+
+    bids, offers = order_book.depth_arrays(None, counts=True, cumulative=True)
+    assert list(bids.prices) == [10.5, 10.0, 9.5], "bids should be best first"
+    assert list(bids.sizes) == [5, 30, 30]
+    assert bids.counts is not None and list(bids.counts) == [1, 2, 1]
+    assert bids.cumulative_sizes is not None
+    assert list(bids.cumulative_sizes) == [5, 35, 65]
+
+    assert list(offers.prices) == [11.0, 11.5, 12.0], (
+        "offers should be best first")
+    assert list(offers.sizes) == [10, 15, 20]
+
+    bids, offers = order_book.depth_arrays(2)
+    assert list(bids.prices) == [10.5, 10.0]
+    assert list(offers.prices) == [11.0, 11.5]
+
+    stops = order_book.stop_offers.depth_arrays(1, cumulative=True)
+    assert list(stops.prices) == [8.0]
+    assert stops.cumulative_sizes is not None
+    assert list(stops.cumulative_sizes) == [5]
+
+    # Partially fill the best bid.
+    order_book.add_order(Side.SELL, Decimal('10.5'), 3, Style.LIMIT)
+    bids, _ = order_book.depth_arrays(1)
+    assert list(bids.sizes) == [2]
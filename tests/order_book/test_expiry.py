@@ -0,0 +1,74 @@
+"""Tests for good till time orders"""
+
+from decimal import Decimal
+
+import pytest
+
+from jetblack_order_book import OrderBook, Side, Style
+
+
+class Clock:
+    """A clock which is moved by hand"""
+
+    def __init__(self, now: float) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_expiry():
+    """Orders are cancelled when they expire"""
+    clock = Clock(1000.0)
+    order_book = OrderBook(clock=clock)
+
+    order_book.add_order(
+        Side.BUY, Decimal('10'), 5, Style.LIMIT, expires=1000.0 + 86400
+    )
+    early_id, _, _ = order_book.add_order(
+        Side.BUY, Decimal('9'), 5, Style.LIMIT, expires=1000.5
+    )
+    late_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('12'), 5, Style.LIMIT, expires=1001.25
+    )
+    order_book.add_order(Side.SELL, Decimal('13'), 5, Style.LIMIT)
+    _, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 5, Style.LIMIT, expires=1001.0
+    )
+    assert len(fills) == 1
+    assert str(order_book) == '9x5 : 12x5,13x5'
+
+    clock.now = 1000.4
+    assert order_book.expire() == []
+
+    clock.now = 1000.5
+    assert order_book.expire() == [early_id]
+    assert str(order_book) == ' : 12x5,13x5'
+
+    # The filled orders no longer expire.
+    clock.now = 2000.0
+    assert order_book.expire() == [late_id]
+    assert str(order_book) == ' : 13x5'
+
+    with pytest.raises(ValueError):
+        order_book.add_order(
+            Side.BUY, Decimal('10'), 5, Style.LIMIT, expires=2000.0
+        )
+
+
+def test_expiry_cancelled():
+    """Cancelled orders do not expire"""
+    clock = Clock(0.0)
+    order_book = OrderBook(clock=clock)
+
+    first_id, _, _ = order_book.add_order(
+        Side.BUY, Decimal('10'), 5, Style.LIMIT, expires=10.0
+    )
+    second_id, _, _ = order_book.add_order(
+        Side.BUY, Decimal('10'), 5, Style.LIMIT, expires=5.0
+    )
+    order_book.cancel_order(first_id)
+
+    clock.now = 100.0
+    assert order_book.expire() == [second_id]
+    assert str(order_book) == ' : '
@@ -1,8 +1,18 @@
 """Tests for fill-or-kill orders"""
 
 from decimal import Decimal
+from functools import partial
+import random
+
+import pytest
 
 from jetblack_order_book import OrderBook, Fill, Side, Style
+from jetblack_order_book.constants import ALL_PLUGINS
+from jetblack_order_book.order_book_manager import OrderBookManager
+from jetblack_order_book.plugins import (
+    SelfTradePrevention,
+    SelfTradePreventionPlugin
+)
 
 
 def test_fill_of_kill_buy():
@@ -133,3 +143,199 @@ def test_fill_or_kill_cancel_sell_order():
 
     assert not fills, "should not fill"
     assert cancels == [sell_id1, sell_id2], "should cancel in order"
+
+
+def test_fill_or_kill_sweep():
+    """A fill-or-kill order can be filled across orders and levels"""
+
+    order_book = OrderBook()
+
+    sell_id1, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 5, Style.LIMIT)
+    sell_id2, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 5, Style.LIMIT)
+    sell_id3, _, _ = order_book.add_order(
+        Side.SELL, Decimal('11'), 10, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('12'), 10, Style.LIMIT)
+
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY,
+        Decimal('11'),
+        21,
+        Style.FILL_OR_KILL
+    )
+    assert not fills, "should not fill"
+    assert cancels == [buy_id], "should kill the order"
+    assert str(order_book) == " : 10x10,11x10,12x10", (
+        "the book should not change")
+
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY,
+        Decimal('11'),
+        15,
+        Style.FILL_OR_KILL
+    )
+    assert fills == [
+        Fill(buy_id, sell_id1, Decimal('11'), 5),
+        Fill(buy_id, sell_id2, Decimal('11'), 5),
+        Fill(buy_id, sell_id3, Decimal('11'), 5),
+    ], "should fill across orders and levels"
+    assert not cancels, "should be no cancels"
+    assert str(order_book) == " : 11x5,12x10"
+
+
+def test_fill_or_kill_meets_resting_fill_or_kill():
+    """An order is killed if resting fill-or-kill orders leave too little"""
+
+    order_book = OrderBook()
+
+    order_book.add_order(Side.SELL, Decimal('10'), 10, Style.FILL_OR_KILL)
+    order_book.add_order(Side.SELL, Decimal('10'), 5, Style.LIMIT)
+
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY,
+        Decimal('10'),
+        6,
+        Style.FILL_OR_KILL
+    )
+    assert not fills, "should not fill"
+    assert cancels == [buy_id], "should kill the order"
+    assert str(order_book) == " : 10x15", "the book should not change"
+
+
+def test_fill_or_kill_random():
+    """Fill-or-kill orders are never partly filled"""
+
+    for seed in range(25):
+        rng = random.Random(seed)
+        order_book = OrderBook()
+        sizes = {}
+        for _ in range(100):
+            size = rng.randint(1, 10)
+            style = rng.choice((Style.LIMIT, Style.FILL_OR_KILL))
+            order_id, fills, _ = order_book.add_order(
+                rng.choice((Side.BUY, Side.SELL)),
+                Decimal(rng.randint(8, 12)),
+                size,
+                style
+            )
+            if style == Style.FILL_OR_KILL:
+                sizes[order_id] = size
+                filled = sum(
+                    fill.size
+                    for fill in fills
+                    if order_id in (fill.buy_order_id, fill.sell_order_id)
+                )
+                assert filled in (0, size), (
+                    "should fill completely or not at all")
+
+            for order_side in (order_book.bids, order_book.offers):
+                for level in order_side.depth(None):
+                    for order in level.orders:
+                        if order.style == Style.FILL_OR_KILL:
+                            assert order.size == sizes[order.order_id], (
+                                "a resting order should not be partly filled")
+
+
+def test_fill_or_kill_iceberg():
+    """The reserve of an iceberg order counts towards a fill-or-kill order"""
+
+    order_book = OrderBook()
+
+    sell_id, _, _ = order_book.add_order(
+        Side.SELL,
+        Decimal('10'),
+        100,
+        Style.ICEBERG,
+        display_size=5
+    )
+
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY,
+        Decimal('10'),
+        20,
+        Style.FILL_OR_KILL
+    )
+    assert fills == [Fill(buy_id, sell_id, Decimal('10'), 5)] * 4, (
+        "should fill from the reserve")
+    assert not cancels, "should be no cancels"
+    assert str(order_book) == " : 10x5"
+
+
+def test_fill_or_kill_pegged():
+    """Pegged orders count towards a fill-or-kill order"""
+
+    order_book = OrderBook()
+
+    sell_id1, _, _ = order_book.add_order(
+        Side.SELL, Decimal('11'), 5, Style.LIMIT)
+    sell_id2, _, _ = order_book.add_order(
+        Side.SELL, Decimal('0'), 50, Style.PRIMARY_PEG)
+
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY,
+        Decimal('11'),
+        20,
+        Style.FILL_OR_KILL
+    )
+    assert fills == [
+        Fill(buy_id, sell_id1, Decimal('11'), 5),
+        Fill(buy_id, sell_id2, Decimal('11'), 15),
+    ], "should fill from the pegged order"
+    assert not cancels, "should be no cancels"
+
+    # A midpoint peg is the only liquidity at the price, and is too small.
+    order_book.add_order(Side.BUY, Decimal('9'), 5, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('11'), 5, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('0'), 10, Style.MIDPOINT_PEG)
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY,
+        Decimal('10'),
+        20,
+        Style.FILL_OR_KILL
+    )
+    assert not fills, "should not fill"
+    assert cancels == [buy_id], "should kill the order"
+
+
+def test_fill_or_kill_decided_by_index(monkeypatch: pytest.MonkeyPatch):
+    """Without orders which may be cancelled the book is not forked"""
+
+    order_book = OrderBook()
+    order_book.add_order(Side.SELL, Decimal('10'), 5, Style.LIMIT)
+    order_book.add_order(
+        Side.SELL, Decimal('11'), 20, Style.ICEBERG, display_size=5)
+    order_book.add_order(Side.BUY, Decimal('9'), 5, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('0'), 10, Style.PRIMARY_PEG)
+
+    def fork(manager: OrderBookManager) -> OrderBookManager:
+        raise AssertionError('should not fork')
+
+    monkeypatch.setattr(OrderBookManager, 'fork', fork)
+
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY, Decimal('11'), 36, Style.FILL_OR_KILL)
+    assert not fills, "should not fill"
+    assert cancels == [buy_id], "should kill the order"
+
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY, Decimal('11'), 35, Style.FILL_OR_KILL)
+    assert sum(fill.size for fill in fills) == 35, "should fill"
+    assert not cancels, "should be no cancels"
+
+
+def test_fill_or_kill_self_trade():
+    """An order meeting an order of its owner is decided by a dry run"""
+
+    order_book = OrderBook((
+        *ALL_PLUGINS,
+        partial(SelfTradePreventionPlugin, SelfTradePrevention.CANCEL_OLDEST)
+    ))
+    order_book.add_order(Side.SELL, Decimal('10'), 5, Style.LIMIT, owner='a')
+    order_book.add_order(Side.SELL, Decimal('10'), 5, Style.LIMIT, owner='b')
+
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY, Decimal('10'), 10, Style.FILL_OR_KILL, owner='a')
+    assert not fills, "should not fill"
+    assert cancels == [buy_id], "should kill the order"
+    assert str(order_book) == " : 10x10", "the book should not change"
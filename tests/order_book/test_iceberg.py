@@ -0,0 +1,75 @@
+"""Tests for iceberg orders"""
+
+from decimal import Decimal
+
+from jetblack_order_book import OrderBook, Fill, Side, Style
+
+
+def test_iceberg():
+    """An iceberg order displays part of its size, replenishing when filled"""
+    order_book = OrderBook()
+
+    iceberg_id, fills, cancels = order_book.add_order(
+        Side.SELL,
+        Decimal('10'),
+        25,
+        Style.ICEBERG,
+        display_size=10
+    )
+    assert iceberg_id is not None and not fills and not cancels
+    sell_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 5, Style.LIMIT)
+    assert str(order_book) == ' : 10x15', "should only show the display size"
+
+    bids, offers = order_book.depth_arrays(None)
+    assert not bids.prices and list(offers.sizes) == [15]
+
+    # Fill the displayed size, which is replenished behind the limit order.
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY,
+        Decimal('10'),
+        12,
+        Style.LIMIT
+    )
+    assert fills == [
+        Fill(buy_id, iceberg_id, Decimal('10'), 10),
+        Fill(buy_id, sell_id, Decimal('10'), 2),
+    ], "the replenished order should lose time priority"
+    assert not cancels
+    assert str(order_book) == ' : 10x13'
+
+    order_book.amend_order(iceberg_id, 6)
+    assert str(order_book) == ' : 10x9', "amend should change the total size"
+
+    buy_id, fills, _ = order_book.add_order(
+        Side.BUY,
+        Decimal('10'),
+        20,
+        Style.LIMIT
+    )
+    assert fills == [
+        Fill(buy_id, sell_id, Decimal('10'), 3),
+        Fill(buy_id, iceberg_id, Decimal('10'), 6),
+    ]
+    assert str(order_book) == '10x11 : '
+
+
+def test_iceberg_display_size():
+    """Only iceberg orders have a display size"""
+    order_book = OrderBook()
+    for style, display_size in (
+            (Style.ICEBERG, None),
+            (Style.LIMIT, 10),
+            (Style.ICEBERG, 0)
+    ):
+        try:
+            order_book.add_order(
+                Side.BUY,
+                Decimal('10'),
+                20,
+                style,
+                display_size=display_size
+            )
+            assert False, "should be invalid"
+        except ValueError:
+            pass
@@ -0,0 +1,91 @@
+"""Tests for market orders"""
+
+from decimal import Decimal
+
+from jetblack_order_book import OrderBook, Fill, Side, Style
+
+
+def test_market_buy():
+    """A market buy sweeps the offers at their prices"""
+    order_book = OrderBook()
+
+    order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+    sell_id1, _, _ = order_book.add_order(
+        Side.SELL, Decimal('11'), 5, Style.LIMIT)
+    sell_id2, _, _ = order_book.add_order(
+        Side.SELL, Decimal('12'), 5, Style.LIMIT)
+
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY,
+        None,
+        8,
+        Style.MARKET
+    )
+    assert buy_id is not None
+    assert fills == [
+        Fill(buy_id, sell_id1, Decimal('11'), 5),
+        Fill(buy_id, sell_id2, Decimal('12'), 3),
+    ], "should fill at the resting prices"
+    assert not cancels, "should be no cancels"
+    assert str(order_book) == '10x5 : 12x2'
+
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY,
+        None,
+        5,
+        Style.MARKET
+    )
+    assert fills == [
+        Fill(buy_id, sell_id2, Decimal('12'), 2)
+    ]
+    assert cancels == [buy_id], "should cancel the unfilled size"
+    assert str(order_book) == '10x5 : ', "should not rest in the book"
+
+
+def test_market_sell_protection_price():
+    """A market sell stops at its protection price"""
+    order_book = OrderBook()
+
+    buy_id1, _, _ = order_book.add_order(
+        Side.BUY, Decimal('10'), 5, Style.LIMIT)
+    order_book.add_order(Side.BUY, Decimal('9'), 5, Style.LIMIT)
+
+    sell_id, fills, cancels = order_book.add_order(
+        Side.SELL,
+        Decimal('9.5'),
+        8,
+        Style.MARKET
+    )
+    assert fills == [
+        Fill(buy_id1, sell_id, Decimal('10'), 5)
+    ]
+    assert cancels == [sell_id], "should cancel beyond the protection price"
+    assert str(order_book) == '9x5 : '
+
+    sell_id, fills, cancels = order_book.add_order(
+        Side.SELL,
+        None,
+        5,
+        Style.MARKET
+    )
+    assert len(fills) == 1 and not cancels
+    assert str(order_book) == ' : '
+
+    sell_id, fills, cancels = order_book.add_order(
+        Side.SELL,
+        None,
+        5,
+        Style.MARKET
+    )
+    assert not fills, "should not fill an empty book"
+    assert cancels == [sell_id]
+
+
+def test_price_required():
+    """Only market orders can be without a price"""
+    order_book = OrderBook()
+    try:
+        order_book.add_order(Side.BUY, None, 5, Style.LIMIT)
+        assert False, "should require a price"
+    except ValueError:
+        pass
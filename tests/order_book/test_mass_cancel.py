@@ -0,0 +1,42 @@
+"""Tests for owners and mass cancels"""
+
+from decimal import Decimal
+
+from jetblack_order_book import OrderBook, Side, Style
+
+
+def test_mass_cancel():
+    """The orders of an owner can be cancelled together"""
+    order_book = OrderBook()
+
+    buy_id1, _, _ = order_book.add_order(
+        Side.BUY, Decimal('10'), 5, Style.LIMIT, owner='mm1')
+    order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT, owner='mm2')
+    buy_id2, _, _ = order_book.add_order(
+        Side.BUY, Decimal('9'), 5, Style.LIMIT, owner='mm1')
+    sell_id1, _, _ = order_book.add_order(
+        Side.SELL, Decimal('11'), 5, Style.LIMIT, owner='mm1')
+    sell_id2, _, _ = order_book.add_order(
+        Side.SELL, Decimal('12'), 5, Style.LIMIT, owner='mm1')
+    order_book.add_order(Side.SELL, Decimal('12'), 5, Style.LIMIT)
+
+    assert str(order_book) == '9x5,10x10 : 11x5,12x10'
+    assert order_book.owner_order_ids('mm1') == [
+        buy_id1, buy_id2, sell_id1, sell_id2
+    ]
+
+    assert order_book.mass_cancel(
+        'mm1',
+        Side.SELL,
+        min_price=Decimal('12')
+    ) == [sell_id2], "should filter by side and price"
+    assert str(order_book) == '9x5,10x10 : 11x5,12x5'
+
+    # A fill removes the order from the owner.
+    order_book.add_order(Side.BUY, Decimal('11'), 5, Style.LIMIT)
+    assert order_book.owner_order_ids('mm1') == [buy_id1, buy_id2]
+
+    assert order_book.mass_cancel('mm1') == [buy_id1, buy_id2]
+    assert str(order_book) == '10x5 : 12x5'
+    assert order_book.owner_order_ids('mm1') == []
+    assert order_book.mass_cancel('mm1') == []
@@ -0,0 +1,127 @@
+"""Tests for mass quotes"""
+
+from decimal import Decimal
+
+import pytest
+
+from jetblack_order_book import OrderBook, Fill, Side, Style
+
+
+def test_mass_quote():
+    """Quotes are replaced, keeping unchanged orders"""
+    order_book = OrderBook()
+
+    other_id, _, _ = order_book.add_order(
+        Side.BUY, Decimal('10'), 7, Style.LIMIT)
+
+    order_ids, fills, cancels = order_book.mass_quote(
+        'mm1',
+        [(Decimal('10'), 5), (Decimal('9'), 10)],
+        [(Decimal('11'), 5), (Decimal('12'), 10)]
+    )
+    assert len(order_ids) == 4 and not fills and not cancels
+    bid10, bid9, offer11, offer12 = order_ids
+    assert str(order_book) == '9x10,10x12 : 11x5,12x10'
+
+    order_ids, fills, cancels = order_book.mass_quote(
+        'mm1',
+        [(Decimal('10'), 4), (Decimal('9'), 20)],
+        [(Decimal('11'), 5), (Decimal('11.5'), 10)]
+    )
+    assert order_ids[0] == bid10, "a reduced quote should be amended"
+    assert order_ids[1] != bid9, "an increased quote should be replaced"
+    assert order_ids[2] == offer11, "an unchanged quote should be kept"
+    assert not fills
+    assert sorted(cancels) == sorted([bid9, offer12])
+    assert str(order_book) == '9x20,10x11 : 11x5,11.5x10'
+
+    # The reduced quote keeps its priority behind the other order.
+    sell_id, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 8, Style.LIMIT)
+    assert fills == [
+        Fill(other_id, sell_id, Decimal('10'), 7),
+        Fill(bid10, sell_id, Decimal('10'), 1),
+    ]
+
+
+def test_mass_quote_cross():
+    """A crossing quote is matched once the quote is placed"""
+    order_book = OrderBook()
+
+    sell_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 5, Style.LIMIT)
+
+    order_ids, fills, cancels = order_book.mass_quote(
+        'mm1',
+        [(Decimal('10'), 3), (Decimal('9'), 10)],
+        []
+    )
+    assert fills == [Fill(order_ids[0], sell_id, Decimal('10'), 3)]
+    assert not cancels
+    assert str(order_book) == '9x10 : 10x2'
+    assert order_book.owner_order_ids('mm1') == [order_ids[1]]
+
+    order_ids, fills, cancels = order_book.mass_quote('mm1', [], [])
+    assert not order_ids and not fills
+    assert str(order_book) == ' : 10x2'
+
+
+def test_mass_quote_keeps_orders():
+    """Orders placed other than by a mass quote are not replaced"""
+    order_book = OrderBook()
+
+    order_id, _, _ = order_book.add_order(
+        Side.BUY, Decimal('10'), 5, Style.LIMIT, owner='mm1')
+
+    order_ids, fills, cancels = order_book.mass_quote(
+        'mm1',
+        [(Decimal('10'), 3)],
+        [(Decimal('11'), 3)]
+    )
+    assert not fills and not cancels
+    assert order_id not in order_ids
+    assert str(order_book) == '10x8 : 11x3'
+
+    _, _, cancels = order_book.mass_quote('mm1', [], [])
+    assert sorted(cancels) == sorted(order_ids)
+    assert order_book.owner_order_ids('mm1') == [order_id]
+
+
+def test_mass_quote_matches_once():
+    """The quotes are placed then matched together, with the best crossing
+    quote as the aggressor"""
+    order_book = OrderBook()
+
+    sell_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('9'), 5, Style.LIMIT)
+
+    order_ids, fills, _ = order_book.mass_quote(
+        'mm1',
+        [(Decimal('9.5'), 3), (Decimal('10'), 3)],
+        [(Decimal('11'), 3)]
+    )
+    assert fills == [
+        Fill(order_ids[1], sell_id, Decimal('10'), 3),
+        Fill(order_ids[0], sell_id, Decimal('9'), 2),
+    ]
+    assert str(order_book) == '9.5x1 : 11x3'
+
+
+def test_mass_quote_crossed():
+    """Quotes which cross each other are rejected"""
+    order_book = OrderBook()
+
+    with pytest.raises(ValueError):
+        order_book.mass_quote(
+            'mm1',
+            [(Decimal('101'), 10)],
+            [(Decimal('100'), 10)]
+        )
+    with pytest.raises(ValueError):
+        order_book.mass_quote(
+            'mm1',
+            [(Decimal('100'), 10)],
+            [(Decimal('100'), 10)]
+        )
+    assert str(order_book) == ' : '
+    assert not order_book.owner_order_ids('mm1')
@@ -0,0 +1,84 @@
+"""Tests for pegged orders"""
+
+from decimal import Decimal
+
+import pytest
+
+from jetblack_order_book import OrderBook, Fill, Side, Style
+
+
+def test_midpoint_peg():
+    """A midpoint peg is filled at the midpoint before the limit orders"""
+    order_book = OrderBook()
+    order_book.add_order(Side.BUY, Decimal('9'), 10, Style.LIMIT)
+    sell_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('11'), 10, Style.LIMIT)
+    peg_id, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('0'), 5, Style.MIDPOINT_PEG)
+    assert not fills
+    assert str(order_book) == '9x10 : 11x10', "pegged orders are not displayed"
+
+    buy_id, fills, _ = order_book.add_order(
+        Side.BUY, Decimal('11'), 8, Style.LIMIT)
+    assert fills == [
+        Fill(buy_id, peg_id, Decimal('10'), 5),
+        Fill(buy_id, sell_id, Decimal('11'), 3),
+    ]
+    assert str(order_book) == '9x10 : 11x7'
+
+
+def test_midpoint_pegs_cross():
+    """Midpoint pegs on both sides are matched"""
+    order_book = OrderBook()
+    order_book.add_order(Side.BUY, Decimal('9'), 10, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('12'), 10, Style.LIMIT)
+    buy_id, _, _ = order_book.add_order(
+        Side.BUY, Decimal('0'), 5, Style.MIDPOINT_PEG)
+    sell_id, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('0'), 3, Style.MIDPOINT_PEG)
+    assert fills == [Fill(buy_id, sell_id, Decimal('10.5'), 3)]
+
+
+def test_primary_peg():
+    """Primary pegs move with the best price, behind limit orders"""
+    order_book = OrderBook()
+    bid9_id, _, _ = order_book.add_order(
+        Side.BUY, Decimal('9'), 10, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('11'), 10, Style.LIMIT)
+    peg0_id, _, _ = order_book.add_order(
+        Side.BUY, Decimal('0'), 5, Style.PRIMARY_PEG)
+    peg1_id, _, _ = order_book.add_order(
+        Side.BUY, Decimal('-1'), 5, Style.PRIMARY_PEG)
+
+    # The best bid moves, taking the pegs with it.
+    bid10_id, fills, _ = order_book.add_order(
+        Side.BUY, Decimal('10'), 5, Style.LIMIT)
+    assert not fills
+
+    sell_id, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('8'), 30, Style.LIMIT)
+    assert fills == [
+        Fill(bid10_id, sell_id, Decimal('8'), 5),
+        Fill(peg0_id, sell_id, Decimal('10'), 5),
+        Fill(bid9_id, sell_id, Decimal('8'), 10),
+        Fill(peg1_id, sell_id, Decimal('9'), 5),
+    ]
+    assert str(order_book) == ' : 8x5,11x10'
+
+
+def test_inactive_peg():
+    """A peg without a reference price is not matched"""
+    order_book = OrderBook()
+    order_book.add_order(Side.BUY, Decimal('9'), 10, Style.LIMIT)
+    peg_id, _, _ = order_book.add_order(
+        Side.BUY, Decimal('0'), 5, Style.MIDPOINT_PEG)
+
+    _, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('5'), 20, Style.LIMIT)
+    assert sum(fill.size for fill in fills) == 10
+    assert str(order_book) == ' : 5x10'
+
+    order_book.cancel_order(peg_id)
+
+    with pytest.raises(ValueError):
+        order_book.add_order(Side.BUY, Decimal('1'), 5, Style.PRIMARY_PEG)
@@ -0,0 +1,144 @@
+"""Tests for pro-rata allocation"""
+
+from decimal import Decimal
+from functools import partial
+import random
+
+from jetblack_order_book import (
+    OrderBook,
+    Fill,
+    Order,
+    ProRataAllocation,
+    Side,
+    Style
+)
+from jetblack_order_book.constants import ALL_PLUGINS
+from jetblack_order_book.plugins import (
+    SelfTradePrevention,
+    SelfTradePreventionPlugin
+)
+
+
+def _sizes(allocation: ProRataAllocation, sizes, size):
+    orders = [
+        Order(order_id, Side.SELL, Decimal('10'), order_size, Style.LIMIT)
+        for order_id, order_size in enumerate(sizes, 1)
+    ]
+    return [
+        (order.order_id, fill_size)
+        for order, fill_size in allocation.allocate(orders, size)
+    ]
+
+
+def test_allocate():
+    """Test the allocation rules"""
+    assert _sizes(ProRataAllocation(), [10, 30, 60], 50) == [
+        (1, 5), (2, 15), (3, 30)
+    ]
+    # The top order is filled first, and the rounding remainder goes in time
+    # priority.
+    assert _sizes(ProRataAllocation(top_order=True), [10, 30, 60], 50) == [
+        (1, 10), (2, 14), (3, 26)
+    ]
+    # Allocations below the minimum are dropped.
+    assert _sizes(ProRataAllocation(minimum=5), [4, 6, 90], 50) == [
+        (1, 4), (2, 1), (3, 45)
+    ]
+    # Half is allocated in time priority.
+    assert _sizes(ProRataAllocation(time_share=0.5), [20, 20, 60], 40) == [
+        (1, 20), (2, 5), (3, 15)
+    ]
+
+
+def test_allocate_random():
+    """Allocations fill exactly the size without overfilling an order"""
+    rng = random.Random(11)
+    for _ in range(200):
+        allocation = ProRataAllocation(
+            top_order=rng.random() < 0.5,
+            minimum=rng.randint(1, 5),
+            time_share=rng.choice((0.0, 0.25, 1.0))
+        )
+        sizes = [rng.randint(1, 50) for _ in range(rng.randint(1, 10))]
+        size = rng.randint(1, sum(sizes))
+        allocated = dict(_sizes(allocation, sizes, size))
+        assert sum(allocated.values()) == size
+        assert all(
+            0 < allocated[order_id] <= sizes[order_id - 1]
+            for order_id in allocated
+        )
+
+
+def test_pro_rata_book():
+    """An aggressor is allocated across the level"""
+    order_book = OrderBook(allocation=ProRataAllocation())
+
+    sell1, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 10, Style.LIMIT)
+    sell2, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 30, Style.LIMIT)
+    sell3, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 60, Style.ICEBERG, display_size=20
+    )
+    order_book.add_order(Side.SELL, Decimal('11'), 10, Style.LIMIT)
+
+    buy_id, fills, _ = order_book.add_order(
+        Side.BUY, Decimal('10'), 30, Style.LIMIT)
+    assert fills == [
+        Fill(buy_id, sell1, Decimal('10'), 5),
+        Fill(buy_id, sell2, Decimal('10'), 15),
+        Fill(buy_id, sell3, Decimal('10'), 10),
+    ]
+    assert str(order_book) == ' : 10x30,11x10'
+
+    # The iceberg is replenished when its displayed size is filled.
+    buy_id, fills, _ = order_book.add_order(
+        Side.BUY, Decimal('11'), 35, Style.LIMIT)
+    assert fills == [
+        Fill(buy_id, sell1, Decimal('11'), 5),
+        Fill(buy_id, sell2, Decimal('11'), 15),
+        Fill(buy_id, sell3, Decimal('11'), 10),
+        Fill(buy_id, sell3, Decimal('11'), 5),
+    ]
+    assert str(order_book) == ' : 10x15,11x10'
+
+
+def test_pro_rata_self_trade_prevention():
+    """Self-trade prevention applies to every order the allocation fills"""
+    order_book = OrderBook(
+        (
+            *ALL_PLUGINS,
+            partial(
+                SelfTradePreventionPlugin,
+                SelfTradePrevention.CANCEL_OLDEST
+            )
+        ),
+        allocation=ProRataAllocation()
+    )
+
+    sell1, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 10, Style.LIMIT, owner='other')
+    sell2, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 10, Style.LIMIT, owner='me')
+
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY, Decimal('10'), 10, Style.LIMIT, owner='me')
+    assert fills == [Fill(buy_id, sell1, Decimal('10'), 10)]
+    assert cancels == [sell2]
+    assert str(order_book) == ' : '
+
+
+def test_pro_rata_fill_or_kill():
+    """A resting fill-or-kill order is not partly filled by an allocation"""
+    order_book = OrderBook(allocation=ProRataAllocation())
+
+    sell1, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 10, Style.LIMIT)
+    sell2, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 10, Style.FILL_OR_KILL)
+
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY, Decimal('10'), 10, Style.LIMIT)
+    assert fills == [Fill(buy_id, sell1, Decimal('10'), 10)]
+    assert cancels == [sell2]
+    assert str(order_book) == ' : '
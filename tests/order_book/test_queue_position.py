@@ -0,0 +1,83 @@
+"""Tests for queue positions"""
+
+import random
+from decimal import Decimal
+
+import pytest
+
+from jetblack_order_book import OrderBook, Side, Style
+
+
+def test_queue_position():
+    """The size and orders ahead follow fills, amends and cancels"""
+    order_book = OrderBook()
+    buy1, _, _ = order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+    buy2, _, _ = order_book.add_order(Side.BUY, Decimal('10'), 3, Style.LIMIT)
+    buy3, _, _ = order_book.add_order(Side.BUY, Decimal('10'), 4, Style.LIMIT)
+    assert [order_book.size_ahead(o) for o in (buy1, buy2, buy3)] == [0, 5, 8]
+    assert [
+        order_book.queue_position(o) for o in (buy1, buy2, buy3)
+    ] == [0, 1, 2]
+
+    order_book.add_order(Side.SELL, Decimal('10'), 2, Style.LIMIT)
+    assert order_book.size_ahead(buy3) == 6
+
+    order_book.amend_order(buy2, 1)
+    assert order_book.size_ahead(buy3) == 4
+
+    order_book.cancel_order(buy1)
+    assert order_book.size_ahead(buy3) == 1
+    assert order_book.queue_position(buy3) == 1
+
+    with pytest.raises(KeyError):
+        order_book.size_ahead(buy1)
+
+
+def test_queue_position_random():
+    """Compare the queue positions against a walk of the queue"""
+    rng = random.Random(11)
+    order_book = OrderBook()
+    order_ids = []
+
+    for _ in range(500):
+        action = rng.random()
+        if action < 0.5:
+            order_id, _, _ = order_book.add_order(
+                Side.BUY,
+                Decimal(rng.randint(1, 3)),
+                rng.randint(1, 10),
+                Style.LIMIT
+            )
+            order_ids.append(order_id)
+        elif action < 0.6:
+            order_book.add_order(
+                Side.BUY,
+                Decimal(rng.randint(1, 3)),
+                rng.randint(5, 20),
+                Style.ICEBERG,
+                display_size=3
+            )
+        elif action < 0.8:
+            order_book.add_order(
+                Side.SELL, Decimal(1), rng.randint(1, 15), Style.LIMIT)
+        else:
+            order_ids = [
+                order_id for order_id in order_ids
+                if any(
+                    order_id in level
+                    for level in order_book.bids.depth(None)
+                )
+            ]
+            if order_ids:
+                order_id = rng.choice(order_ids)
+                if rng.random() < 0.5:
+                    order_book.cancel_order(order_id)
+                else:
+                    order_book.amend_order(order_id, rng.randint(1, 10))
+
+        for level in order_book.bids.depth(None):
+            ahead = 0
+            for position, order in enumerate(level.orders):
+                assert order_book.size_ahead(order.order_id) == ahead
+                assert order_book.queue_position(order.order_id) == position
+                ahead += order.size
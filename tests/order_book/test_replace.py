@@ -0,0 +1,101 @@
+"""Tests for replacing orders"""
+
+from decimal import Decimal
+
+import pytest
+
+from jetblack_order_book import OrderBook, Fill, Side, Style
+
+
+def test_replace_size_down_keeps_priority():
+    """Reducing the size at the same price keeps the time priority"""
+    order_book = OrderBook()
+    buy1, _, _ = order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+    buy2, _, _ = order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+
+    assert order_book.replace_order(buy1, Decimal('10'), 3) == ([], [])
+    assert str(order_book) == '10x8 : '
+
+    sell3, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 4, Style.LIMIT)
+    assert fills == [
+        Fill(buy1, sell3, Decimal('10'), 3),
+        Fill(buy2, sell3, Decimal('10'), 1),
+    ]
+
+
+def test_replace_size_up_loses_priority():
+    """Increasing the size moves the order to the back of the queue"""
+    order_book = OrderBook()
+    buy1, _, _ = order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+    buy2, _, _ = order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+
+    assert order_book.replace_order(buy1, Decimal('10'), 6) == ([], [])
+
+    sell3, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 6, Style.LIMIT)
+    assert fills == [
+        Fill(buy2, sell3, Decimal('10'), 5),
+        Fill(buy1, sell3, Decimal('10'), 1),
+    ]
+
+
+def test_replace_price_matches():
+    """A new price which crosses the book is matched, keeping the order id"""
+    order_book = OrderBook()
+    buy1, _, _ = order_book.add_order(Side.BUY, Decimal('9'), 5, Style.LIMIT)
+    sell2, _, _ = order_book.add_order(
+        Side.SELL, Decimal('11'), 3, Style.LIMIT)
+
+    fills, cancels = order_book.replace_order(buy1, Decimal('11'), 5)
+    assert fills == [Fill(buy1, sell2, Decimal('11'), 3)]
+    assert not cancels
+    assert str(order_book) == '11x2 : '
+
+    order_book.cancel_order(buy1)
+    assert str(order_book) == ' : '
+
+    with pytest.raises(ValueError):
+        order_book.replace_order(sell2, Decimal('11'), 0)
+
+
+def test_replace_is_validated():
+    """A replacement must satisfy the rules of its style"""
+    order_book = OrderBook()
+    order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+    peg_id, _, _ = order_book.add_order(
+        Side.BUY, Decimal('-1'), 5, Style.PRIMARY_PEG)
+    stop_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('2'), 5, Style.TRAILING_STOP)
+
+    with pytest.raises(ValueError):
+        order_book.replace_order(peg_id, Decimal('1'), 5)
+    with pytest.raises(ValueError):
+        order_book.replace_order(stop_id, Decimal('0'), 5)
+
+    order_book.start_auction()
+    with pytest.raises(ValueError):
+        order_book.replace_order(peg_id, Decimal('-2'), 5)
+
+
+def test_replace_plugin_order():
+    """The plugins see a replaced order as deleted and created again"""
+    order_book = OrderBook()
+    sell1, _, _ = order_book.add_order(
+        Side.SELL, Decimal('103'), 5, Style.IMMEDIATE_OR_CANCEL)
+    assert order_book.replace_order(sell1, Decimal('104'), 5) == ([], [])
+
+    sell2, _, _ = order_book.add_order(
+        Side.SELL, Decimal('103'), 5, Style.LIMIT)
+    buy3, fills, cancels = order_book.add_order(
+        Side.BUY, Decimal('103'), 1, Style.LIMIT)
+    assert fills == [Fill(buy3, sell2, Decimal('103'), 1)]
+    assert cancels == []
+    assert str(order_book) == ' : 103x4,104x5'
+
+    # A replacement the plugins reject leaves the order cancelled.
+    sell4, _, _ = order_book.add_order(
+        Side.SELL, Decimal('104'), 5, Style.IMMEDIATE_OR_CANCEL)
+    assert order_book.replace_order(sell4, Decimal('105'), 5) == (
+        [], [sell4])
+    assert str(order_book) == ' : 103x4,104x5'
@@ -0,0 +1,76 @@
+"""Tests for self-trade prevention"""
+
+from decimal import Decimal
+from functools import partial
+
+from jetblack_order_book import OrderBook, Fill, Side, Style
+from jetblack_order_book.constants import ALL_PLUGINS
+from jetblack_order_book.plugins import (
+    SelfTradePrevention,
+    SelfTradePreventionPlugin
+)
+
+
+def _order_book(policy: SelfTradePrevention) -> OrderBook:
+    return OrderBook(
+        (*ALL_PLUGINS, partial(SelfTradePreventionPlugin, policy))
+    )
+
+
+def test_cancel_newest():
+    """The newest order is cancelled, and other owners still trade"""
+    order_book = _order_book(SelfTradePrevention.CANCEL_NEWEST)
+
+    other_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 5, Style.LIMIT, owner='mm2')
+    order_book.add_order(
+        Side.SELL, Decimal('11'), 5, Style.LIMIT, owner='mm1')
+    buy_id, fills, cancels = order_book.add_order(
+        Side.BUY, Decimal('11'), 10, Style.LIMIT, owner='mm1')
+
+    assert fills == [Fill(buy_id, other_id, Decimal('11'), 5)]
+    assert cancels == [buy_id]
+    assert str(order_book) == ' : 11x5'
+
+
+def test_cancel_oldest():
+    """The oldest order is cancelled, and the new order rests"""
+    order_book = _order_book(SelfTradePrevention.CANCEL_OLDEST)
+
+    sell_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 5, Style.LIMIT, owner='mm1')
+    _, fills, cancels = order_book.add_order(
+        Side.BUY, Decimal('10'), 3, Style.LIMIT, owner='mm1')
+
+    assert not fills
+    assert cancels == [sell_id]
+    assert str(order_book) == '10x3 : '
+
+
+def test_decrement_both():
+    """Both orders are decremented by the smaller size"""
+    order_book = _order_book(SelfTradePrevention.DECREMENT_BOTH)
+
+    order_book.add_order(
+        Side.SELL, Decimal('10'), 5, Style.LIMIT, owner='mm1')
+    other_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 5, Style.LIMIT, owner='mm2')
+    buy_id, fills, _ = order_book.add_order(
+        Side.BUY, Decimal('10'), 7, Style.LIMIT, owner='mm1')
+
+    assert fills == [Fill(buy_id, other_id, Decimal('10'), 2)]
+    assert str(order_book) == ' : 10x3'
+
+
+def test_market_cancel_newest():
+    """A market order can be cancelled by self-trade prevention"""
+    order_book = _order_book(SelfTradePrevention.CANCEL_NEWEST)
+
+    order_book.add_order(
+        Side.BUY, Decimal('10'), 5, Style.LIMIT, owner='mm1')
+    sell_id, fills, cancels = order_book.add_order(
+        Side.SELL, None, 5, Style.MARKET, owner='mm1')
+
+    assert not fills
+    assert cancels == [sell_id]
+    assert str(order_book) == '10x5 : '
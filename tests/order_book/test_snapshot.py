@@ -0,0 +1,29 @@
+"""Tests for snapshots"""
+
+from decimal import Decimal
+
+from jetblack_order_book import LevelSnapshot, OrderBook, Side, Style
+
+
+def test_snapshot_is_immutable():
+    """A snapshot is unaffected by later changes to the book"""
+    order_book = OrderBook()
+    buy1, _, _ = order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+    order_book.add_order(Side.BUY, Decimal('10'), 3, Style.LIMIT)
+    order_book.add_order(Side.BUY, Decimal('9'), 4, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('11'), 2, Style.LIMIT)
+
+    before = order_book.snapshot()
+    assert before.bids == (
+        LevelSnapshot(Decimal('10'), 8, 2),
+        LevelSnapshot(Decimal('9'), 4, 1),
+    )
+    assert before.offers == (LevelSnapshot(Decimal('11'), 2, 1),)
+
+    order_book.cancel_order(buy1)
+    order_book.add_order(Side.SELL, Decimal('10'), 1, Style.LIMIT)
+    after = order_book.snapshot(1)
+
+    assert after.bids == (LevelSnapshot(Decimal('10'), 2, 1),)
+    assert before.bids[0] == LevelSnapshot(Decimal('10'), 8, 2)
+    assert after.offers[0] is before.offers[0], "unchanged levels are shared"
@@ -0,0 +1,69 @@
+"""Tests for stop limit orders"""
+
+from decimal import Decimal
+
+import pytest
+
+from jetblack_order_book import OrderBook, Fill, Side, Style
+
+
+def test_stop_limit_sell():
+    """Sell stop limits triggered together become limit orders"""
+    order_book = OrderBook()
+    buy1, _, _ = order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+    sell2, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('9'), 5, Style.STOP_LIMIT, limit_price=Decimal('8'))
+    assert not fills
+    sell3, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('9'), 3, Style.STOP_LIMIT, limit_price=Decimal('9'))
+    assert not fills
+    assert str(order_book) == '10x5 : '
+
+    sell4, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 5, Style.LIMIT)
+    assert fills == [Fill(buy1, sell4, Decimal('10'), 5)]
+
+    # A bid at the stop price triggers both stops.
+    buy5, fills, _ = order_book.add_order(
+        Side.BUY, Decimal('9'), 2, Style.LIMIT)
+    assert fills == [Fill(buy5, sell2, Decimal('9'), 2)]
+    assert str(order_book) == ' : 8x3,9x3'
+
+    order_book.cancel_order(sell3)
+    assert str(order_book) == ' : 8x3'
+
+
+def test_stop_limit_buy_keeps_trigger_order():
+    """Buy stop limits keep the order in which they trigger"""
+    order_book = OrderBook()
+    order_book.add_order(Side.SELL, Decimal('10'), 5, Style.LIMIT)
+    buy2, _, _ = order_book.add_order(
+        Side.BUY, Decimal('12'), 1, Style.STOP_LIMIT, limit_price=Decimal('9'))
+    buy3, _, _ = order_book.add_order(
+        Side.BUY, Decimal('11'), 1, Style.STOP_LIMIT, limit_price=Decimal('9'))
+    buy4, _, _ = order_book.add_order(
+        Side.BUY, Decimal('11'), 1, Style.STOP_LIMIT, limit_price=Decimal('9'))
+
+    # The offer rises to 12, triggering the stop at 11 before the stop at 12.
+    buy5, _, _ = order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+    sell6, _, _ = order_book.add_order(
+        Side.SELL, Decimal('12'), 5, Style.LIMIT)
+    assert str(order_book) == '9x3 : 12x5'
+
+    sell7, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('9'), 3, Style.LIMIT)
+    assert fills == [
+        Fill(buy3, sell7, Decimal('9'), 1),
+        Fill(buy4, sell7, Decimal('9'), 1),
+        Fill(buy2, sell7, Decimal('9'), 1),
+    ]
+
+
+def test_stop_limit_invalid():
+    """Only stop limit orders have a limit price"""
+    order_book = OrderBook()
+    with pytest.raises(ValueError):
+        order_book.add_order(Side.BUY, Decimal('10'), 5, Style.STOP_LIMIT)
+    with pytest.raises(ValueError):
+        order_book.add_order(
+            Side.BUY, Decimal('10'), 5, Style.LIMIT, limit_price=Decimal('9'))
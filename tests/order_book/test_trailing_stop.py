@@ -0,0 +1,95 @@
+"""Tests for trailing stops"""
+
+from decimal import Decimal
+
+import pytest
+
+from jetblack_order_book import OrderBook, Fill, Side, Style
+
+
+def test_trailing_stop_sell():
+    """A sell stop trails the best bid, then behaves as a stop"""
+    order_book = OrderBook()
+    buy1, _, _ = order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+
+    # Trail two below the best bid.
+    sell2, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('2'), 5, Style.TRAILING_STOP)
+    assert not fills
+    assert not order_book.stop_offers
+
+    # The bid rises to 12, moving the stop to 10.
+    buy3, _, _ = order_book.add_order(Side.BUY, Decimal('12'), 5, Style.LIMIT)
+    assert not order_book.stop_offers
+
+    # The bid falls back to 10, triggering the stop.
+    sell4, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('12'), 5, Style.LIMIT)
+    assert fills == [Fill(buy3, sell4, Decimal('12'), 5)]
+    assert str(order_book.stop_offers) == '10x5'
+
+    sell5, fills, _ = order_book.add_order(
+        Side.SELL, Decimal('10'), 5, Style.LIMIT)
+    assert fills == [Fill(buy1, sell5, Decimal('10'), 5)]
+
+    buy6, fills, _ = order_book.add_order(
+        Side.BUY, Decimal('10'), 5, Style.LIMIT)
+    assert fills == [Fill(buy6, sell2, Decimal('10'), 5)]
+
+
+def test_trailing_stop_cancel_and_what_if():
+    """A trailing stop can be cancelled, and a what-if leaves it alone"""
+    order_book = OrderBook()
+    order_book.add_order(Side.SELL, Decimal('10'), 5, Style.LIMIT)
+    buy2, _, _ = order_book.add_order(
+        Side.BUY, Decimal('1'), 5, Style.TRAILING_STOP)
+
+    # An offer at 8 moves the stop to 9, and removing it triggers the stop.
+    order_book.add_order(Side.SELL, Decimal('8'), 5, Style.LIMIT)
+    order_book.what_if(Side.BUY, Decimal('8'), 5, Style.LIMIT)
+    assert not order_book.stop_bids
+
+    order_book.cancel_order(buy2)
+    order_book.add_order(Side.BUY, Decimal('8'), 5, Style.LIMIT)
+    assert not order_book.stop_bids
+
+    with pytest.raises(ValueError):
+        order_book.add_order(Side.BUY, Decimal('0'), 5, Style.TRAILING_STOP)
+
+
+def test_trailing_stop_what_if_empty():
+    """A what-if trailing stop leaves a book without trailing stops alone"""
+    order_book = OrderBook()
+    order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+
+    order_book.what_if(Side.SELL, Decimal('2'), 5, Style.TRAILING_STOP)
+
+    # A rise and fall of the bid would trigger the stop if it were live.
+    order_book.add_order(Side.BUY, Decimal('12'), 5, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('12'), 5, Style.LIMIT)
+    assert not order_book.stop_offers
+
+    # The id of the what-if order can be used by a real trailing stop.
+    sell_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('2'), 5, Style.TRAILING_STOP)
+    assert sell_id == 4
+    order_book.what_if(Side.SELL, Decimal('3'), 5, Style.TRAILING_STOP)
+    order_book.cancel_order(sell_id)
+    order_book.add_order(Side.BUY, Decimal('12'), 5, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('12'), 5, Style.LIMIT)
+    assert not order_book.stop_offers
+
+
+def test_trailing_stop_replace():
+    """A replaced trailing stop trails at its new offset"""
+    order_book = OrderBook()
+    order_book.add_order(Side.BUY, Decimal('100'), 5, Style.LIMIT)
+    order_book.add_order(Side.BUY, Decimal('98'), 5, Style.LIMIT)
+    order_book.add_order(Side.BUY, Decimal('95'), 5, Style.LIMIT)
+    sell4, _, _ = order_book.add_order(
+        Side.SELL, Decimal('2'), 5, Style.TRAILING_STOP)
+    assert order_book.replace_order(sell4, Decimal('5'), 5) == ([], [])
+
+    # The bid falls to 98, which no longer triggers the stop.
+    order_book.add_order(Side.SELL, Decimal('100'), 5, Style.LIMIT)
+    assert not order_book.stop_offers
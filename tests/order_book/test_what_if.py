@@ -0,0 +1,91 @@
+"""Tests for what-if orders"""
+
+from copy import deepcopy
+from decimal import Decimal
+import random
+
+from jetblack_order_book import OrderBook, Fill, Side, Style
+
+
+def _state(order_book: OrderBook) -> tuple:
+    return (
+        repr(order_book),
+        repr(order_book.stop_bids),
+        repr(order_book.stop_offers)
+    )
+
+
+def test_what_if():
+    """A what-if order reports fills without changing the book"""
+    order_book = OrderBook()
+
+    order_book.add_order(Side.SELL, Decimal('11.0'), 10, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('11.5'), 15, Style.LIMIT)
+    order_book.add_order(Side.BUY, Decimal('10.5'), 5, Style.LIMIT)
+
+    order_id, fills, cancels = order_book.what_if(
+        Side.BUY,
+        Decimal('11.5'),
+        20,
+        Style.LIMIT
+    )
+    assert order_id == 4
+    assert fills == [
+        Fill(4, 1, Decimal('11.5'), 10),
+        Fill(4, 2, Decimal('11.5'), 10),
+    ]
+    assert not cancels
+    assert str(order_book) == '10.5x5 : 11.0x10,11.5x15', (
+        "the book should not change")
+
+    order_id, fills, cancels = order_book.what_if(
+        Side.BUY,
+        Decimal('11.0'),
+        20,
+        Style.FILL_OR_KILL
+    )
+    assert order_id == 4 and not fills and cancels == [4]
+    assert str(order_book) == '10.5x5 : 11.0x10,11.5x15', (
+        "the book should not change")
+
+    # The what-if orders should not have used order ids.
+    order_id, _, _ = order_book.add_order(
+        Side.BUY,
+        Decimal('11.0'),
+        4,
+        Style.LIMIT
+    )
+    assert order_id == 4
+    assert str(order_book) == '10.5x5 : 11.0x6,11.5x15'
+
+
+def test_what_if_random():
+    """Compare what-if orders with adding orders to a copy of the book"""
+    rng = random.Random(7)
+    styles = [
+        Style.LIMIT,
+        Style.LIMIT,
+        Style.STOP,
+        Style.FILL_OR_KILL,
+        Style.IMMEDIATE_OR_CANCEL,
+        Style.BOOK_OR_CANCEL,
+        Style.MARKET
+    ]
+    order_book = OrderBook()
+
+    for _ in range(500):
+        side = rng.choice([Side.BUY, Side.SELL])
+        price = Decimal(rng.randint(95, 105))
+        size = rng.randint(1, 20)
+        style = rng.choice(styles)
+
+        expected_book = deepcopy(order_book)
+        expected = expected_book.add_order(side, price, size, style)
+
+        before = _state(order_book)
+        assert order_book.what_if(side, price, size, style) == expected
+        after = _state(order_book)
+        assert before == after, "the book should not change"
+
+        assert order_book.add_order(side, price, size, style) == expected
+        assert order_book == expected_book
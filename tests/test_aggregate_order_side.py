@@ -0,0 +1,162 @@
+"""Tests for the aggregate order side"""
+
+from decimal import Decimal
+import random
+from typing import List, Optional, Tuple
+
+from jetblack_order_book import AggregateOrderSide, OrderBook, Side, Style
+
+
+def _sweep(
+        side: AggregateOrderSide,
+        size: int
+) -> Optional[Tuple[Decimal, Decimal]]:
+    """Walk the levels to find the worst price and notional for a size"""
+    levels = side.depth(None)
+    levels = levels if side.best is levels[0] else list(reversed(levels))
+    notional = Decimal(0)
+    for level in levels:
+        fill_size = min(size, level.size)
+        notional += level.price * fill_size
+        size -= fill_size
+        if size == 0:
+            return level.price, notional
+    return None
+
+
+def test_depth_queries():
+    """Test sweep and band queries"""
+    order_book = OrderBook()
+    order_book.add_order(Side.SELL, Decimal('11.0'), 10, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('11.5'), 15, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('12.0'), 20, Style.LIMIT)
+    order_book.add_order(Side.BUY, Decimal('10.5'), 5, Style.LIMIT)
+    order_book.add_order(Side.BUY, Decimal('10.0'), 30, Style.LIMIT)
+
+    offers = order_book.offers
+    assert offers.price_for_size(10) == Decimal('11.0')
+    assert offers.price_for_size(11) == Decimal('11.5')
+    assert offers.price_for_size(45) == Decimal('12.0')
+    assert offers.price_for_size(46) is None
+    assert offers.cost_to_fill(20) == (
+        Decimal('11.0') * 10 + Decimal('11.5') * 10)
+    assert offers.vwap(20) == Decimal('11.25')
+    assert offers.size_at_or_better(Decimal('11.5')) == 25
+    assert offers.size_at_or_better(Decimal('10.0')) == 0
+    assert offers.size_within(Decimal('0.5')) == 25
+
+    bids = order_book.bids
+    assert bids.price_for_size(6) == Decimal('10.0')
+    assert bids.size_at_or_better(Decimal('10.5')) == 5
+    assert bids.size_within(Decimal('1')) == 35
+
+    # The index follows fills and cancels.
+    order_book.add_order(Side.BUY, Decimal('11.0'), 4, Style.LIMIT)
+    assert offers.price_for_size(6) == Decimal('11.0')
+    assert offers.price_for_size(7) == Decimal('11.5')
+
+    try:
+        offers.price_for_size(0)
+        assert False, "size must be greater than 0"
+    except ValueError:
+        pass
+
+
+def test_depth_queries_random():
+    """Compare the index with walking the levels after random changes"""
+    rng = random.Random(42)
+    order_book = OrderBook()
+    order_ids: List[int] = []
+
+    for _ in range(2000):
+        action = rng.random()
+        if action < 0.6 or not order_ids:
+            side = rng.choice([Side.BUY, Side.SELL])
+            price = Decimal(rng.randint(90, 110)) / 10
+            order_id, _, _ = order_book.add_order(
+                side,
+                price,
+                rng.randint(1, 20),
+                Style.LIMIT
+            )
+            if order_id is not None:
+                order_ids.append(order_id)
+        else:
+            order_id = order_ids.pop(rng.randrange(len(order_ids)))
+            try:
+                if action < 0.8:
+                    order_book.cancel_order(order_id)
+                else:
+                    order_book.amend_order(order_id, rng.randint(1, 20))
+                    order_ids.append(order_id)
+            except KeyError:
+                pass  # The order was filled.
+
+        for side in (order_book.bids, order_book.offers):
+            if not side:
+                continue
+            total = sum(level.size for level in side.depth(None))
+            size = rng.randint(1, total + 5)
+            expected = _sweep(side, size)
+            if expected is None:
+                assert side.price_for_size(size) is None
+                assert side.cost_to_fill(size) is None
+            else:
+                assert side.price_for_size(size) == expected[0]
+                assert side.cost_to_fill(size) == expected[1]
+            price = side.best.price
+            assert side.size_at_or_better(price) == side.best.size
+
+
+def test_depth_index_is_maintained():
+    """Levels inserted or removed away from the best keep the index"""
+    order_book = OrderBook()
+    for price in ('10', '12', '14'):
+        order_book.add_order(Side.SELL, Decimal(price), 10, Style.LIMIT)
+    offers = order_book.offers
+    assert offers.size_at_or_better(Decimal('12')) == 20
+    index = offers._index
+
+    order_id, _, _ = order_book.add_order(
+        Side.SELL, Decimal('11'), 5, Style.LIMIT)
+    assert offers.size_at_or_better(Decimal('12')) == 25
+    order_book.cancel_order(order_id)
+    order_book.add_order(Side.SELL, Decimal('13'), 5, Style.LIMIT)
+    assert offers.size_at_or_better(Decimal('13')) == 25
+    assert offers.cost_to_fill(35) == Decimal(10 + 12 + 14) * 10 + 13 * 5
+    assert offers._index is index
+
+
+def test_reserve_at_or_better_random():
+    """Compare the indexed reserves with walking the levels"""
+    rng = random.Random(7)
+    order_book = OrderBook()
+    order_ids: List[int] = []
+
+    for _ in range(1000):
+        if rng.random() < 0.7 or not order_ids:
+            order_id, _, _ = order_book.add_order(
+                rng.choice([Side.BUY, Side.SELL]),
+                Decimal(rng.randint(90, 110)) / 10,
+                rng.randint(1, 40),
+                Style.ICEBERG,
+                display_size=rng.randint(1, 10)
+            )
+            if order_id is not None:
+                order_ids.append(order_id)
+        else:
+            order_id = order_ids.pop(rng.randrange(len(order_ids)))
+            try:
+                order_book.cancel_order(order_id)
+            except KeyError:
+                pass  # The order was filled.
+
+        for side in (order_book.bids, order_book.offers):
+            if not side:
+                continue
+            levels = side.depth(None)
+            price = levels[rng.randrange(len(levels))].price
+            assert side.reserve_at_or_better(price) == sum(
+                level.reserve
+                for level in side.depth_at_or_better(price)
+            )
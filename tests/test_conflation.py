@@ -0,0 +1,50 @@
+"""Tests for the conflating publisher"""
+
+from decimal import Decimal
+
+from jetblack_order_book import ExchangeOrderBook, Side, Style
+from jetblack_order_book.conflation import ConflatingPublisher, LevelUpdate
+
+
+def test_conflation():
+    """Changes are coalesced between the updates of each subscriber"""
+    now = [0.0]
+    exchange = ExchangeOrderBook(["AAPL", "MSFT"])
+    publisher = ConflatingPublisher(exchange, clock=lambda: now[0])
+    fast, slow = [], []
+    publisher.subscribe(fast.append, interval=1.0)
+    publisher.subscribe(slow.append, interval=10.0, levels=1)
+
+    exchange.add_order('AAPL', Side.BUY, Decimal('134.72'), 50, Style.LIMIT)
+    exchange.add_order('AAPL', Side.BUY, Decimal('134.70'), 10, Style.LIMIT)
+    publisher.publish()
+    assert fast == [[
+        LevelUpdate('AAPL', Side.BUY, Decimal('134.72'), 50, 1),
+        LevelUpdate('AAPL', Side.BUY, Decimal('134.70'), 10, 1),
+    ]]
+    assert slow == [[LevelUpdate('AAPL', Side.BUY, Decimal('134.72'), 50, 1)]]
+
+    # Several changes before the next update are sent once.
+    sell_id, _, _ = exchange.add_order(
+        'AAPL', Side.SELL, Decimal('134.80'), 5, Style.LIMIT)
+    exchange.amend_order('AAPL', sell_id, 3)
+    exchange.add_order('AAPL', Side.SELL, Decimal('134.72'), 50, Style.LIMIT)
+    publisher.publish()
+    assert len(fast) == 1, "the fast subscriber is throttled"
+
+    now[0] = 1.0
+    publisher.publish()
+    assert fast[1] == [
+        LevelUpdate('AAPL', Side.BUY, Decimal('134.72'), 0, 0),
+        LevelUpdate('AAPL', Side.SELL, Decimal('134.80'), 3, 1),
+    ]
+    assert len(slow) == 1
+
+    now[0] = 10.0
+    publisher.publish()
+    assert fast[2:] == [], "nothing changed for the fast subscriber"
+    assert slow[1] == [
+        LevelUpdate('AAPL', Side.BUY, Decimal('134.70'), 10, 1),
+        LevelUpdate('AAPL', Side.BUY, Decimal('134.72'), 0, 0),
+        LevelUpdate('AAPL', Side.SELL, Decimal('134.80'), 3, 1),
+    ]
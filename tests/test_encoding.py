@@ -0,0 +1,66 @@
+"""Tests for the binary encoding"""
+
+from decimal import Decimal
+
+import pytest
+
+from jetblack_order_book import Fill, OrderBook, Side, Style
+from jetblack_order_book.encoding import (
+    DepthEncoder,
+    FillEvent,
+    LevelEvent,
+    OrderAdded,
+    OrderChanged,
+    OrderDeleted,
+    decode,
+    encode_fill,
+    encode_order_added,
+    encode_order_changed,
+    encode_order_deleted,
+    encode_price
+)
+
+
+def test_round_trip():
+    """Records decode to the values encoded"""
+    buffer = bytearray()
+    buffer += encode_fill(3, Fill(1, 2, Decimal('134.725'), 10))
+    buffer += encode_order_added(3, 4, Side.SELL, Decimal('-0.5'), 7)
+    buffer += encode_order_changed(3, 4, 5)
+    buffer += encode_order_deleted(3, 4)
+
+    assert list(decode(memoryview(buffer))) == [
+        FillEvent(3, 1, 2, Decimal('134.725'), 10),
+        OrderAdded(3, 4, Side.SELL, Decimal('-0.5'), 7),
+        OrderChanged(3, 4, 5),
+        OrderDeleted(3, 4),
+    ]
+
+    with pytest.raises(ValueError):
+        list(decode(buffer[:-1]))
+    with pytest.raises(ValueError):
+        encode_price(Decimal('Infinity'))
+
+
+def test_depth_encoder_reuses_unchanged_levels():
+    """Only the changed levels are encoded again"""
+    order_book = OrderBook()
+    order_book.add_order(Side.BUY, Decimal('10'), 5, Style.LIMIT)
+    order_book.add_order(Side.BUY, Decimal('9.5'), 3, Style.LIMIT)
+    order_book.add_order(Side.SELL, Decimal('11'), 2, Style.LIMIT)
+
+    encoder = DepthEncoder()
+    first = encoder.encode(0, order_book.snapshot())
+    assert list(decode(first)) == [
+        LevelEvent(0, Side.BUY, Decimal('10'), 5, 1),
+        LevelEvent(0, Side.BUY, Decimal('9.5'), 3, 1),
+        LevelEvent(0, Side.SELL, Decimal('11'), 2, 1),
+    ]
+
+    order_book.add_order(Side.BUY, Decimal('10'), 1, Style.LIMIT)
+    encodings = dict(encoder._cache[(0, Side.BUY)])
+    second = encoder.encode(0, order_book.snapshot())
+    cached = encoder._cache[(0, Side.BUY)][Decimal('9.5')]
+    assert cached[1] is encodings[Decimal('9.5')][1]
+    assert list(decode(second))[0] == LevelEvent(
+        0, Side.BUY, Decimal('10'), 6, 2)
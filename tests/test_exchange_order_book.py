@@ -1,5 +1,6 @@
 """Tests for the exchange order book"""
 
+import math
 from decimal import Decimal
 
 from jetblack_order_book import ExchangeOrderBook, Side, Fill, Style
@@ -47,3 +48,177 @@ def test_smoke():
     assert fills == [
         Fill(8, 3, Decimal('134.79'), 20)
     ]
+
+
+def test_top_of_book():
+    """Test the columnar top of book"""
+    order_book = ExchangeOrderBook(["AAPL", "MSFT", "IBM"])
+
+    top_of_book = order_book.top_of_book()
+    assert list(top_of_book.instrument_id) == [0, 1, 2]
+    assert all(math.isnan(price) for price in top_of_book.bid_price)
+    assert list(top_of_book.bid_size) == [0, 0, 0]
+    assert list(top_of_book.sequence) == [0, 0, 0]
+
+    order_book.add_order('AAPL', Side.BUY, Decimal('134.72'), 50, Style.LIMIT)
+    order_book.add_order('AAPL', Side.BUY, Decimal('134.76'), 10, Style.LIMIT)
+    order_book.add_order('MSFT', Side.SELL, Decimal('239.28'), 15, Style.LIMIT)
+    order_id, _, _ = order_book.add_order(
+        'MSFT',
+        Side.SELL,
+        Decimal('239.28'),
+        5,
+        Style.LIMIT
+    )
+    assert order_id is not None
+    assert order_book.changed_since(0) == ['MSFT', 'AAPL']
+    assert order_book.changed_since(order_book.sequence) == []
+
+    top_of_book = order_book.top_of_book()
+    assert list(top_of_book.bid_price[:1]) == [134.76]
+    assert list(top_of_book.bid_size) == [10, 0, 0]
+    assert math.isnan(top_of_book.offer_price[0])
+    assert list(top_of_book.offer_price[1:2]) == [239.28]
+    assert list(top_of_book.offer_size) == [0, 20, 0]
+    assert list(top_of_book.sequence) == [2, 4, 0]
+
+    order_book.cancel_order('MSFT', order_id)
+    assert order_book.changed_since(4) == ['MSFT']
+
+    previous = top_of_book
+    top_of_book = order_book.top_of_book()
+    assert list(top_of_book.offer_size) == [0, 15, 0]
+    assert list(top_of_book.sequence) == [2, 5, 0]
+    assert list(previous.offer_size) == [0, 20, 0], "snapshots are copies"
+
+    changes = order_book.top_of_book(4)
+    assert list(changes.instrument_id) == [1]
+    assert list(changes.offer_size) == [15]
+    assert list(changes.sequence) == [5]
+    assert len(order_book.top_of_book(order_book.sequence).instrument_id) == 0
+    assert list(order_book.top_of_book(0).instrument_id) == [0, 1]
+
+
+def test_mass_cancel():
+    """Test cancelling the orders of an owner across books"""
+    order_book = ExchangeOrderBook(["AAPL", "MSFT", "IBM"])
+
+    aapl_id, _, _ = order_book.add_order(
+        'AAPL', Side.BUY, Decimal('134.72'), 50, Style.LIMIT, owner='mm1')
+    msft_id1, _, _ = order_book.add_order(
+        'MSFT', Side.SELL, Decimal('239.28'), 15, Style.LIMIT, owner='mm1')
+    msft_id2, _, _ = order_book.add_order(
+        'MSFT', Side.BUY, Decimal('239.20'), 15, Style.LIMIT, owner='mm1')
+    order_book.add_order(
+        'MSFT', Side.SELL, Decimal('239.30'), 5, Style.LIMIT, owner='mm2')
+
+    assert order_book.mass_cancel('mm1', Side.SELL) == {'MSFT': [msft_id1]}
+    sequence = order_book.sequence
+    assert order_book.mass_cancel('mm1') == {
+        'AAPL': [aapl_id],
+        'MSFT': [msft_id2]
+    }
+    assert set(order_book.changed_since(sequence)) == {'AAPL', 'MSFT'}
+    assert str(order_book.books['MSFT']) == ' : 239.30x5'
+    assert str(order_book.books['AAPL']) == ' : '
+    assert order_book.mass_cancel('mm1') == {}
+
+
+def test_owners_are_forgotten():
+    """Test an owner is forgotten when its last order in a book goes"""
+    order_book = ExchangeOrderBook(["AAPL", "MSFT"])
+
+    aapl_id, _, _ = order_book.add_order(
+        'AAPL', Side.BUY, Decimal('134.72'), 50, Style.LIMIT, owner='mm1')
+    order_book.add_order(
+        'MSFT', Side.SELL, Decimal('239.28'), 15, Style.LIMIT, owner='mm1')
+    order_book.add_order(
+        'MSFT', Side.SELL, Decimal('239.30'), 5, Style.LIMIT, owner='mm2')
+    assert order_book._owner_tickers == {
+        'mm1': {'AAPL', 'MSFT'},
+        'mm2': {'MSFT'}
+    }
+
+    order_book.cancel_order('AAPL', aapl_id)
+    assert order_book._owner_tickers == {'mm1': {'MSFT'}, 'mm2': {'MSFT'}}
+
+    # The orders of both owners are filled, and the owners are forgotten
+    # when they next cancel.
+    order_book.add_order(
+        'MSFT', Side.BUY, Decimal('239.30'), 20, Style.LIMIT, owner='mm3')
+    assert order_book._owner_tickers == {'mm1': {'MSFT'}, 'mm2': {'MSFT'}}
+    assert order_book.mass_cancel('mm1') == {}
+    assert order_book._owner_tickers == {'mm2': {'MSFT'}}
+
+    # An order which is filled in full on entry is not recorded.
+    order_book.add_order('AAPL', Side.SELL, Decimal('135'), 5, Style.LIMIT)
+    order_book.add_order(
+        'AAPL', Side.BUY, Decimal('135'), 5, Style.LIMIT, owner='mm4')
+    assert 'mm4' not in order_book._owner_tickers
+
+
+def test_expire():
+    """Test expiring orders across books"""
+    now = [100.0]
+    order_book = ExchangeOrderBook(
+        ["AAPL", "MSFT", "IBM"], clock=lambda: now[0])
+
+    aapl_id, _, _ = order_book.add_order(
+        'AAPL', Side.BUY, Decimal('134.72'), 50, Style.LIMIT, expires=110.0)
+    msft_id, _, _ = order_book.add_order(
+        'MSFT', Side.SELL, Decimal('239.28'), 15, Style.LIMIT, expires=120.0)
+    order_book.add_order('IBM', Side.SELL, Decimal('120.5'), 5, Style.LIMIT)
+
+    assert order_book.expire() == {}
+    now[0] = 115.0
+    sequence = order_book.sequence
+    assert order_book.expire() == {'AAPL': [aapl_id]}
+    assert order_book.changed_since(sequence) == ['AAPL']
+    now[0] = 130.0
+    assert order_book.expire() == {'MSFT': [msft_id]}
+    assert str(order_book.books['MSFT']) == ' : '
+    assert str(order_book.books['IBM']) == ' : 120.5x5'
+
+
+def test_expiring_tickers_are_forgotten():
+    """Test a book is no longer visited by the expiry sweep once its
+    expiring orders have gone"""
+    now = [100.0]
+    order_book = ExchangeOrderBook(["AAPL", "MSFT"], clock=lambda: now[0])
+
+    aapl_id, _, _ = order_book.add_order(
+        'AAPL', Side.BUY, Decimal('134.72'), 50, Style.LIMIT, expires=110.0)
+    order_book.add_order(
+        'MSFT', Side.SELL, Decimal('239.28'), 15, Style.LIMIT, expires=120.0)
+    assert order_book._expiring_tickers == {'AAPL', 'MSFT'}
+
+    order_book.cancel_order('AAPL', aapl_id)
+    assert order_book._expiring_tickers == {'MSFT'}
+
+    order_book.add_order('MSFT', Side.BUY, Decimal('239.28'), 15, Style.LIMIT)
+    assert order_book._expiring_tickers == set()
+
+    now[0] = 130.0
+    sequence = order_book.sequence
+    assert order_book.expire() == {}
+    assert order_book.sequence == sequence
+
+
+def test_snapshot():
+    """Test snapshots are reused until the book changes"""
+    order_book = ExchangeOrderBook(["AAPL", "MSFT"])
+    order_book.add_order('AAPL', Side.BUY, Decimal('134.72'), 50, Style.LIMIT)
+    order_book.add_order('AAPL', Side.SELL, Decimal('134.80'), 10, Style.LIMIT)
+
+    first = order_book.snapshot('AAPL')
+    assert first.sequence == order_book.sequence
+    order_book.add_order('MSFT', Side.BUY, Decimal('239.20'), 15, Style.LIMIT)
+    assert order_book.snapshot('AAPL') is first
+
+    order_book.add_order('AAPL', Side.SELL, Decimal('134.90'), 5, Style.LIMIT)
+    second = order_book.snapshot('AAPL')
+    assert second.sequence == order_book.sequence
+    assert second.bids is not first.bids
+    assert second.bids[0] is first.bids[0], "unchanged levels are shared"
+    assert [str(level) for level in second.offers] == ['134.80x10', '134.90x5']
+    assert [str(level) for level in first.offers] == ['134.80x10']
@@ -0,0 +1,104 @@
+"""Tests for binary order entry"""
+
+from decimal import Decimal
+
+import pytest
+
+from jetblack_order_book import ExchangeOrderBook, Fill, Side, Style
+from jetblack_order_book.order_entry import (
+    OrderEntrySession,
+    encode_amend_order,
+    encode_cancel_order,
+    encode_mass_cancel,
+    encode_new_order
+)
+
+
+def test_order_entry():
+    """Messages are dispatched to the exchange in batches"""
+    exchange = ExchangeOrderBook(["AAPL", "MSFT"])
+    session = OrderEntrySession(exchange, 'mm1')
+
+    buffer = bytearray()
+    buffer += encode_new_order(
+        1, Side.BUY, Decimal('239.20'), 10, Style.LIMIT)
+    buffer += encode_new_order(
+        1, Side.SELL, Decimal('239.30'), 10, Style.LIMIT)
+    buffer += encode_amend_order(1, 1, 5)
+    buffer += encode_cancel_order(1, 99)
+    partial = encode_new_order(1, Side.SELL, None, 3, Style.MARKET)
+    buffer += partial[:10]
+
+    results, consumed = session.process(buffer)
+    assert consumed == len(buffer) - 10
+    assert results[:3] == [(1, [], []), (2, [], []), None]
+    assert isinstance(results[3], KeyError)
+    assert str(exchange.books['MSFT']) == '239.20x5 : 239.30x10'
+
+    # The rest of the partial message arrives.
+    buffer = buffer[consumed:] + partial[10:]
+    buffer += encode_mass_cancel(Side.SELL)
+    results, consumed = session.process(memoryview(buffer))
+    assert consumed == len(buffer)
+    assert results == [
+        (3, [Fill(1, 3, Decimal('239.20'), 3)], []),
+        {'MSFT': [2]},
+    ]
+    assert str(exchange.books['MSFT']) == '239.20x2 : '
+
+    # A message with an unknown type ends the batch.
+    cancel = encode_cancel_order(1, 1)
+    buffer = cancel + b'\xff' + encode_cancel_order(1, 3)
+    results, consumed = session.process(buffer)
+    assert results == [None] and consumed == len(cancel)
+    with pytest.raises(ValueError):
+        session.process(buffer[consumed:])
+
+
+def test_order_entry_owner():
+    """A session cannot amend or cancel the orders of another owner"""
+    exchange = ExchangeOrderBook(["AAPL"])
+    session1 = OrderEntrySession(exchange, 'mm1')
+    session2 = OrderEntrySession(exchange, 'mm2')
+
+    session1.process(
+        encode_new_order(0, Side.BUY, Decimal('10'), 10, Style.LIMIT))
+    results, _ = session2.process(
+        encode_amend_order(0, 1, 5) + encode_cancel_order(0, 1))
+    assert all(isinstance(result, ValueError) for result in results)
+    assert str(exchange.books['AAPL']) == '10x10 : '
+
+    results, _ = session1.process(encode_cancel_order(0, 1))
+    assert results == [None]
+    assert str(exchange.books['AAPL']) == ' : '
+
+
+def test_order_entry_stop_limit_and_expiry():
+    """Stop limit and good till time orders can be entered"""
+    now = [100.0]
+    exchange = ExchangeOrderBook(["AAPL"], clock=lambda: now[0])
+    session = OrderEntrySession(exchange, 'mm1')
+
+    buffer = encode_new_order(
+        0, Side.BUY, Decimal('7'), 1, Style.LIMIT, expires=110.0)
+    buffer += encode_new_order(
+        0,
+        Side.SELL,
+        Decimal('9'),
+        3,
+        Style.STOP_LIMIT,
+        limit_price=Decimal('8.5')
+    )
+    results, consumed = session.process(buffer)
+    assert consumed == len(buffer)
+    assert results == [(1, [], []), (2, [], [])]
+
+    # A bid at 9 triggers the stop, placing a limit order at 8.5.
+    buy_id, fills, _ = exchange.add_order(
+        'AAPL', Side.BUY, Decimal('9'), 1, Style.LIMIT)
+    assert fills == [Fill(buy_id, 2, Decimal('9'), 1)]
+    assert str(exchange.books['AAPL']) == '7x1 : 8.5x2'
+
+    now[0] = 115.0
+    assert exchange.expire() == {'AAPL': [1]}
+    assert str(exchange.books['AAPL']) == ' : 8.5x2'
@@ -0,0 +1,55 @@
+"""Tests for the replay of recordings"""
+
+import random
+from decimal import Decimal
+
+from jetblack_order_book import ExchangeOrderBook, Side, Style
+from jetblack_order_book.order_entry import (
+    OrderEntrySession,
+    encode_cancel_order,
+    encode_new_order
+)
+from jetblack_order_book.replay import Replay, write_frame
+
+
+def test_replay(tmp_path):
+    """Replays from checkpoints match a replay from the start"""
+    rng = random.Random(3)
+    frames = []
+    for index in range(95):
+        if index > 5 and rng.random() < 0.2:
+            message = encode_cancel_order(0, rng.randint(1, index))
+        else:
+            message = encode_new_order(
+                0,
+                rng.choice((Side.BUY, Side.SELL)),
+                Decimal(rng.randint(95, 105)),
+                rng.randint(1, 10),
+                Style.LIMIT
+            )
+        frames.append((100.0 + index, message))
+
+    path = tmp_path / 'recording.bin'
+    with open(path, 'wb') as file:
+        for timestamp, message in frames:
+            write_frame(file, timestamp, 0, message)
+
+    def expected(count: int) -> str:
+        exchange = ExchangeOrderBook(['AAPL'])
+        session = OrderEntrySession(exchange)
+        for _, message in frames[:count]:
+            session.process(message)
+        return str(exchange.books['AAPL'])
+
+    replay = Replay(str(path), ['AAPL'], interval=10)
+    for count in (37, 5, 90, 0, 95, 61):
+        assert str(replay.at_sequence(count).books['AAPL']) == expected(count)
+    assert str(replay.at_sequence(1000).books['AAPL']) == expected(95)
+
+    assert str(replay.at_time(142.5).books['AAPL']) == expected(43)
+    assert str(replay.at_time(0.0).books['AAPL']) == expected(0)
+
+    # A copy is returned, so changing it does not affect the replay.
+    replay.at_sequence(50).add_order(
+        'AAPL', Side.BUY, Decimal('200'), 1000, Style.LIMIT)
+    assert str(replay.at_sequence(50).books['AAPL']) == expected(50)
@@ -0,0 +1,65 @@
+"""Tests for the shared memory books"""
+
+import math
+from decimal import Decimal
+
+import pytest
+
+from jetblack_order_book import ExchangeOrderBook, Side, Style
+from jetblack_order_book.shared_book import (
+    HEADER,
+    VERSION,
+    SharedBookPublisher,
+    SharedBookReader
+)
+
+
+def test_shared_book():
+    """Books are published to shared memory and read back"""
+    exchange = ExchangeOrderBook(["AAPL", "MSFT"])
+    publisher = SharedBookPublisher(exchange, levels=2)
+    try:
+        reader = SharedBookReader(publisher.name)
+        assert len(reader) == 2 and reader.levels == 2
+        assert reader.version(0) == 2
+
+        exchange.add_order(
+            'AAPL', Side.BUY, Decimal('134.72'), 50, Style.LIMIT)
+        exchange.add_order(
+            'AAPL', Side.BUY, Decimal('134.70'), 10, Style.LIMIT)
+        exchange.add_order(
+            'AAPL', Side.BUY, Decimal('134.60'), 10, Style.LIMIT)
+        exchange.add_order(
+            'AAPL', Side.SELL, Decimal('134.80'), 5, Style.LIMIT)
+        assert publisher.publish() == ['AAPL']
+        assert publisher.publish() == []
+
+        record = reader.read(0)
+        assert record.sequence == exchange.sequence
+        assert record.bid_prices == (134.72, 134.70)
+        assert record.bid_sizes == (50, 10)
+        assert record.offer_prices[0] == 134.80
+        assert math.isnan(record.offer_prices[1])
+        assert record.offer_sizes == (5, 0)
+        assert reader.version(0) == 4 and reader.version(1) == 2
+
+        empty = reader.read(1)
+        assert empty.sequence == 0 and all(map(math.isnan, empty.bid_prices))
+        reader.close()
+    finally:
+        publisher.close()
+
+
+def test_shared_book_dead_publisher():
+    """A record left half written is not retried forever"""
+    exchange = ExchangeOrderBook(["AAPL"])
+    publisher = SharedBookPublisher(exchange, levels=2)
+    try:
+        reader = SharedBookReader(publisher.name)
+        # The publisher died while writing the record.
+        VERSION.pack_into(publisher._memory.buf, HEADER.size, 3)
+        with pytest.raises(TimeoutError):
+            reader.read(0, retries=10)
+        reader.close()
+    finally:
+        publisher.close()
@@ -0,0 +1,49 @@
+"""Tests for the timer wheel"""
+
+import random
+
+from jetblack_order_book.timer_wheel import TimerWheel
+
+
+def test_timer_wheel():
+    """Timers expire in deadline order"""
+    wheel = TimerWheel(0.0, resolution=1.0)
+    wheel.schedule('a', 100.5)
+    wheel.schedule('b', 3.0)
+    wheel.schedule('c', 1e9)
+    wheel.schedule('d', 50.0)
+    wheel.cancel('d')
+
+    assert wheel.advance(2.9) == []
+    assert wheel.advance(100.5) == ['b', 'a']
+    assert len(wheel) == 1 and 'c' in wheel
+    assert wheel.advance(1e9) == ['c']
+
+
+def test_timer_wheel_random():
+    """Compare the timer wheel against a brute force search"""
+    rng = random.Random(42)
+    now = 1000.0
+    wheel = TimerWheel(now, resolution=0.5, levels=2)
+    timers = {}
+
+    for key in range(2000):
+        action = rng.random()
+        if action < 0.5:
+            deadline = now + rng.choice([1.0, 100.0, 1e4, 1e6]) * rng.random()
+            wheel.schedule(key, deadline)
+            timers[key] = deadline
+        elif action < 0.6 and timers:
+            cancelled = rng.choice(list(timers))
+            wheel.cancel(cancelled)
+            del timers[cancelled]
+        else:
+            now += rng.choice([1.0, 100.0, 1e4]) * rng.random()
+            expired = wheel.advance(now)
+            assert sorted(expired) == sorted(
+                key for key, deadline in timers.items() if deadline <= now
+            )
+            for key in expired:
+                del timers[key]
+
+    assert len(wheel) == len(timers)
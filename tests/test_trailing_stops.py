@@ -0,0 +1,129 @@
+"""Tests for trailing stops"""
+
+import random
+from decimal import Decimal
+
+from jetblack_order_book import Order, Side, Style
+from jetblack_order_book.trailing_stops import TrailingStops
+
+
+def _stop(order_id: int, side: Side, offset: int) -> Order:
+    return Order(order_id, side, Decimal(offset), 1, Style.TRAILING_STOP)
+
+
+def test_trailing_sell_stops():
+    """Sell stops trail the highest price"""
+    stops = TrailingStops(True)
+    stops.add_order(_stop(1, Side.SELL, 2))
+    assert stops.update(Decimal('10')) == []
+    stops.add_order(_stop(2, Side.SELL, 1))
+    assert stops.update(Decimal('9')) == []  # stop 2 trails from 9
+    assert stops.update(Decimal('12')) == []  # both trail from 12
+    triggered = stops.update(Decimal('11'))
+    assert [(order.order_id, price) for order, price in triggered] == [
+        (2, Decimal('11'))
+    ]
+    assert [
+        (order.order_id, price)
+        for order, price in stops.update(Decimal('8'))
+    ] == [(1, Decimal('10'))]
+    assert not stops
+
+
+def test_trailing_buy_stops_cancel():
+    """Buy stops trail the lowest price, and cancelled stops never trigger"""
+    stops = TrailingStops(False)
+    first, second = _stop(1, Side.BUY, 2), _stop(2, Side.BUY, 3)
+    stops.add_order(first)
+    stops.add_order(second)
+    assert stops.update(Decimal('10')) == []
+    assert stops.update(Decimal('7')) == []
+    stops.cancel_order(first)
+    assert [
+        (order.order_id, price)
+        for order, price in stops.update(Decimal('10'))
+    ] == [(2, Decimal('10'))]
+
+
+def test_trailing_stops_replaced():
+    """A stop replaced under the same id only triggers at its new offset"""
+    stops = TrailingStops(True)
+    stops.add_order(_stop(1, Side.SELL, 2))
+    assert stops.update(Decimal('100')) == []
+
+    # The same offset ties with the stale entry.
+    stops.cancel_order(_stop(1, Side.SELL, 2))
+    same = _stop(1, Side.SELL, 2)
+    stops.add_order(same)
+    assert stops.update(Decimal('100')) == []
+
+    stops.cancel_order(same)
+    wider = _stop(1, Side.SELL, 5)
+    stops.add_order(wider)
+    assert stops.update(Decimal('100')) == []
+    assert stops.update(Decimal('98')) == []
+    assert stops.update(Decimal('95')) == [(wider, Decimal('95'))]
+    assert not stops
+
+
+def test_trailing_stops_fork():
+    """A fork shares the stops until it changes them"""
+    stops = TrailingStops(True)
+    first, second = _stop(1, Side.SELL, 2), _stop(2, Side.SELL, 4)
+    stops.add_order(first)
+    stops.add_order(second)
+    assert stops.update(Decimal('10')) == []
+
+    fork = stops.fork()
+    assert fork._groups is stops._groups
+    fork.amend_order(first, 5)
+    assert fork.update(Decimal('9')) == []
+    assert fork._groups is stops._groups
+    assert [
+        (order.order_id, order.size, price)
+        for order, price in fork.update(Decimal('7'))
+    ] == [(1, 5, Decimal('8'))]
+    assert len(fork) == 1
+
+    # The stops the fork was taken from are unchanged.
+    assert first.size == 1 and len(stops) == 2
+    assert stops.update(Decimal('7')) == [(first, Decimal('8'))]
+
+
+def test_trailing_stops_random():
+    """Compare the trailing stops against a brute force search"""
+    rng = random.Random(7)
+    stops = TrailingStops(True)
+    extremes = {}
+    offsets = {}
+    price = Decimal(100)
+
+    for order_id in range(1, 3000):
+        action = rng.random()
+        if action < 0.3:
+            offset = rng.randint(1, 10)
+            stops.add_order(_stop(order_id, Side.SELL, offset))
+            offsets[order_id] = offset
+            extremes[order_id] = price
+        elif action < 0.35 and offsets:
+            cancelled = rng.choice(list(offsets))
+            stops.cancel_order(_stop(cancelled, Side.SELL, 1))
+            del offsets[cancelled], extremes[cancelled]
+            continue
+        else:
+            price += rng.randint(-3, 3)
+
+        for key in extremes:
+            extremes[key] = max(extremes[key], price)
+        expected = sorted(
+            key for key, offset in offsets.items()
+            if price <= extremes[key] - offset
+        )
+        triggered = stops.update(price)
+        assert sorted(order.order_id for order, _ in triggered) == expected
+        for order, stop_price in triggered:
+            order_id = order.order_id
+            assert stop_price == extremes[order_id] - offsets[order_id]
+            del offsets[order_id], extremes[order_id]
+
+    assert len(stops) == len(offsets)